@@ -0,0 +1,40 @@
+import os
+import pickle
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Resolver import Resolver
+from Interpreter import Interpreter
+from AstCodec import encode, decode
+from parallel_parse import generate
+
+
+def best(function, repeat: int) -> tuple[float, object]:
+    elapsed, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed, result
+
+
+def main(declarations: int = 20000, repeat: int = 5) -> None:
+    source_code = generate(declarations)
+    parse, ast_list = best(lambda: Parser().parse(Scanner(source_code).scan()), repeat)
+    interpreter = Interpreter()
+    resolve, _ = best(lambda: Resolver(Interpreter()).resolve(ast_list), repeat)
+    Resolver(interpreter).resolve(ast_list)
+    print(f"script: {len(source_code) / 1024 / 1024:.1f} MB, parse {parse:.2f}s, resolve {resolve:.2f}s")
+    dump, pickled = best(lambda: pickle.dumps(ast_list, pickle.HIGHEST_PROTOCOL), repeat)
+    load, _ = best(lambda: pickle.loads(pickled), repeat)
+    print(f"pickle : {len(pickled) / 1024 / 1024:5.1f} MB, write {dump:.2f}s, read {load:.2f}s")
+    write, encoded = best(lambda: encode(ast_list, interpreter), repeat)
+    read, _ = best(lambda: decode(encoded, Interpreter()), repeat)
+    print(f"codec  : {len(encoded) / 1024 / 1024:5.1f} MB, write {write:.2f}s, read {read:.2f}s (resolution included)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import AST
+from Scanner import Scanner
+from Parser import Parser
+
+
+class DictNode:
+    # stand-in for the old dict-backed node layout, used as the comparison baseline
+    def __init__(self, node: AST.AST) -> None:
+        for name in type(node).__slots__:
+            setattr(self, name, to_dict_nodes(getattr(node, name)))
+
+
+def to_dict_nodes(val: object) -> object:
+    if isinstance(val, AST.AST):
+        return DictNode(val)
+    if isinstance(val, list):
+        return [to_dict_nodes(item) for item in val]
+    return val
+
+
+def count_nodes(val: object) -> int:
+    if isinstance(val, (AST.AST, DictNode)):
+        names = type(val).__slots__ if isinstance(val, AST.AST) else vars(val)
+        return 1 + sum(count_nodes(getattr(val, name)) for name in names)
+    if isinstance(val, list):
+        return sum(count_nodes(item) for item in val)
+    return 0
+
+
+def generate_program(functions: int) -> str:
+    lines = []
+    for i in range(functions):
+        name = "f" + "".join(chr(ord("a") + int(d)) for d in str(i))
+        lines.append(f"fun {name}(a, b) {{ var c = a * 2 + b - 1; if (c > 10) {{ return c / 2; }} "
+                     f"while (c < 100) {{ c = c + a; }} return -c; }}")
+        lines.append(f"print {name}(1, 2) + {name}(3, 4) * 5;")
+    return "\n".join(lines)
+
+
+def measure(build) -> tuple[object, int]:
+    tracemalloc.start()
+    tree = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, size
+
+
+def main(functions: int = 5000) -> None:
+    tokens = Scanner(generate_program(functions)).scan()
+    slotted, slotted_size = measure(lambda: Parser().parse(tokens))
+    dict_backed, dict_size = measure(lambda: to_dict_nodes(slotted))
+    nodes = count_nodes(slotted)
+    print(f"nodes: {nodes}")
+    print(f"__slots__ AST:   {slotted_size / 1e6:8.2f} MB  {slotted_size / nodes:6.1f} B/node")
+    print(f"dict-backed AST: {dict_size / 1e6:8.2f} MB  {dict_size / nodes:6.1f} B/node")
+    print(f"saving: {100 * (1 - slotted_size / dict_size):.1f}%")
+
+    for label, tree in (("__slots__", slotted), ("dict-backed", dict_backed)):
+        start = time.perf_counter()
+        for _ in range(5):
+            count_nodes(tree)
+        print(f"{label} traversal: {(time.perf_counter() - start) / 5 * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
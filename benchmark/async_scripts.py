@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from AsyncInterpreter import AsyncInterpreter
+
+PROGRAM = """
+var total = 0;
+for (var i = 0; i < 2000; i = i + 1) {
+  total = total + i;
+}
+sleep(0.01);
+fun fib(n) {
+  if (n < 2) { return n; }
+  return fib(n - 1) + fib(n - 2);
+}
+var result = fib(12) + total;
+"""
+
+
+async def heartbeat(stalls: list[float], stop: asyncio.Event) -> None:
+    # how long the loop goes without getting back to us is the latency every other task would see
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0)
+        now = time.perf_counter()
+        stalls.append(now - last)
+        last = now
+
+
+async def run_all(scripts: int, yield_every: int) -> tuple[float, float, int]:
+    interpreters = [AsyncInterpreter(yield_every) for _ in range(scripts)]
+    programs = [interpreter.compile(PROGRAM) for interpreter in interpreters]
+    stalls, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(stalls, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(interpreter.run(program) for interpreter, program in zip(interpreters, programs)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    return elapsed, max(stalls), sum(interpreter.yields for interpreter in interpreters)
+
+
+def main(scripts: int = 200) -> None:
+    for yield_every in (100, 1000, 10000):
+        elapsed, stall, yields = asyncio.run(run_all(scripts, yield_every))
+        print(f"{scripts} scripts, yield every {yield_every:5d}: {elapsed * 1000:8.1f} ms total, "
+              f"longest gap between loop turns {stall * 1000:6.2f} ms, {yields} yields")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+from ExecutionBudget import ExecutionBudget
+
+PROGRAM = """
+class Point { init(x) { this.x = x; } }
+fun add(a, b) { return a + b; }
+var total = 0;
+for (var i = 0; i < COUNT; i = i + 1) {
+  total = add(total, Point(i).x);
+}
+"""
+
+
+def run(count: int, budget: ExecutionBudget | None) -> float:
+    interpreter = Interpreter(budget=budget)
+    ast = Parser().parse(Scanner(PROGRAM.replace("COUNT", str(count))).scan())
+    Resolver(interpreter).resolve(ast)
+    start = time.perf_counter()
+    interpreter.interpreter(ast)
+    return time.perf_counter() - start
+
+
+def main(count: int = 50000, repeat: int = 7) -> None:
+    limits = dict(steps=10 ** 9, seconds=3600, depth=1000, instances=10 ** 9, environments=10 ** 9,
+                  output_bytes=10 ** 9)
+    # alternate the two so drift in machine load hits both equally
+    without, with_budget = float("inf"), float("inf")
+    for _ in range(repeat):
+        without = min(without, run(count, None))
+        with_budget = min(with_budget, run(count, ExecutionBudget(**limits)))
+    print(f"no budget:   {without * 1000:8.1f} ms")
+    print(f"all limits:  {with_budget * 1000:8.1f} ms  ({(with_budget / without - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+
+PROGRAMS = {
+    "0 args": "fun f() { return 1; } var t = 0; for (var i = 0; i < COUNT; i = i + 1) { t = t + f(); }",
+    "1 arg": "fun f(a) { return a; } var t = 0; for (var i = 0; i < COUNT; i = i + 1) { t = t + f(i); }",
+    "3 args": "fun f(a, b, c) { return b; } var t = 0; for (var i = 0; i < COUNT; i = i + 1) { t = t + f(i, i, i); }",
+    "ctor": "class P { init(x) { this.x = x; } } var t = 0; for (var i = 0; i < COUNT; i = i + 1) { t = t + P(i).x; }",
+}
+
+
+def prepare(source_code: str) -> tuple[Interpreter, list]:
+    interpreter = Interpreter()
+    ast = Parser().parse(Scanner(source_code).scan())
+    Resolver(interpreter).resolve(ast)
+    return interpreter, ast
+
+
+def measure(source_code: str, count: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        interpreter, ast = prepare(source_code.replace("COUNT", str(count)))
+        start = time.perf_counter()
+        interpreter.interpreter(ast)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(count: int = 50000, repeat: int = 7) -> None:
+    for name, source_code in PROGRAMS.items():
+        elapsed = measure(source_code, count, repeat)
+        print(f"{name:7s}: {elapsed / count * 1e6:6.2f} us per loop iteration")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,54 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+
+PROGRAM = """
+class Node {
+  init(cb, next) { this.cb = cb; this.next = next; }
+}
+fun make(i) {
+  var big = 'x';
+  var k = 0;
+  while (k < 10) { big = big + big; k = k + 1; }
+  var id = i;
+  fun cb() { return id; }
+  return cb;
+}
+var head = nil;
+for (var i = 0; i < COUNT; i = i + 1) {
+  head = Node(make(i), head);
+}
+"""
+
+
+def main(count: int = 2000) -> None:
+    interpreter = Interpreter()
+    ast = Parser().parse(Scanner(PROGRAM.replace("COUNT", str(count))).scan())
+    Resolver(interpreter).resolve(ast)
+
+    gc.collect()
+    collections = [stats["collections"] for stats in gc.get_stats()]
+    tracemalloc.start()
+    start = time.perf_counter()
+    interpreter.interpreter(ast)
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    collections = [stats["collections"] - before for stats, before in zip(gc.get_stats(), collections)]
+
+    print(f"callbacks kept alive: {count}")
+    print(f"retained after run:  {retained / 1e6:8.2f} MB  ({retained / count:.0f} B per callback)")
+    print(f"gc collections (gen0, gen1, gen2): {tuple(collections)}")
+    print(f"run time: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,83 @@
+import gc
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Resolver import Resolver
+from Interpreter import Interpreter
+from GcMonitor import GcMonitor
+
+# a long-lived heap (a linked list of instances) that every full collection has to walk
+SETUP = """
+class Node {
+    init(value, next) {
+        this.value = value;
+        this.next = next;
+    }
+}
+var head = nil;
+for (var i = 0; i < %(live)d; i = i + 1) {
+    head = Node(i, head);
+}
+"""
+# a hot function that declares a recursive helper and nested blocks on every call
+WORK = """
+fun work(n) {
+    fun walk(k) {
+        if (k <= 0) {
+            return 0;
+        }
+        return k + walk(k - 1);
+    }
+    var total = 0;
+    for (var i = 0; i < n; i = i + 1) {
+        var a = i * 2;
+        {
+            var b = a + 1;
+            total = total + b;
+        }
+    }
+    return total + walk(8);
+}
+var sum = 0;
+for (var r = 0; r < %(calls)d; r = r + 1) {
+    sum = sum + work(6);
+}
+print sum;
+"""
+
+
+def load(interpreter: Interpreter, source_code: str) -> list:
+    ast_list = Parser().parse(Scanner(source_code).scan())
+    Resolver(interpreter).resolve(ast_list)
+    return ast_list
+
+
+def child(mode: str, live: int, calls: int) -> None:
+    interpreter = Interpreter(release_frames=mode == "release")
+    interpreter.interpreter(load(interpreter, SETUP % {"live": live}))
+    ast_list = load(interpreter, WORK % {"calls": calls})
+    gc.collect()
+    with GcMonitor() as monitor:
+        start = time.perf_counter()
+        interpreter.interpreter(ast_list)
+        elapsed = time.perf_counter() - start
+    print(f"{mode:7s}: {elapsed:6.2f}s, {monitor}")
+    if interpreter.releaser is not None:
+        print("         frames: released={released} cells emptied={cells}".format(**interpreter.releaser.stats()))
+
+
+def main(live: int = 200000, calls: int = 20000) -> None:
+    for mode in ("keep", "release"):
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, str(live), str(calls)], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 4 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main(*map(int, sys.argv[1:3]))
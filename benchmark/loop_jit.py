@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+
+PROGRAMS = {
+    "sum": "var t = 0; for (var i = 0; i < COUNT; i = i + 1) { t = t + i; }",
+    "branchy": "var t = 0; for (var i = 0; i < COUNT; i = i + 1) { if (i * i / 2 > 10) { t = t + 1; } else { t = t - 1; } }",
+    "nested": "var t = 0; for (var i = 0; i < COUNT / 10; i = i + 1) { for (var j = 0; j < 10; j = j + 1) { t = t + j; } }",
+    "float": "var x = 1.5; var n = 0; while (n < COUNT) { x = x * 1.0001; n = n + 1; }",
+    "mixed": "var t = 0; for (var i = 0; i < COUNT; i = i + 1) { if (i == COUNT - 10) { t = 0.5; } t = t + 1; }",
+}
+
+
+def prepare(source_code: str, jit: bool) -> tuple[Interpreter, list]:
+    interpreter = Interpreter(jit=jit)
+    ast = Parser().parse(Scanner(source_code).scan())
+    Resolver(interpreter).resolve(ast)
+    return interpreter, ast
+
+
+def measure(source_code: str, jit: bool, repeat: int) -> tuple[float, Interpreter]:
+    best = float("inf")
+    for _ in range(repeat):
+        interpreter, ast = prepare(source_code, jit)
+        start = time.perf_counter()
+        interpreter.interpreter(ast)
+        best = min(best, time.perf_counter() - start)
+    return best, interpreter
+
+
+def main(count: int = 100000, repeat: int = 5) -> None:
+    for name, source_code in PROGRAMS.items():
+        source_code = source_code.replace("COUNT", str(count))
+        plain, _ = measure(source_code, False, repeat)
+        jitted, interpreter = measure(source_code, True, repeat)
+        print(f"{name:8s}: interpreter {plain * 1000:8.2f} ms, jit {jitted * 1000:8.2f} ms "
+              f"({plain / jitted:5.1f}x)  {interpreter.jit.stats()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,58 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from pLox import PLox
+
+NAMES = ("alpha", "beta", "gamma", "delta", "rows", "total", "label")
+
+
+def generate(path: str, megabytes: int) -> None:
+    # a generated data script: many short statements over a small vocabulary of names
+    with open(path, "w") as f:
+        size, row = 0, 0
+        while size < megabytes * 1024 * 1024:
+            name = NAMES[row % len(NAMES)]
+            line = f"var {name} = {row}.5; {name} = {name} + {row % 97}; var label = 'row' + 'data';\n"
+            f.write(line)
+            size += len(line)
+            row += 1
+
+
+def peak_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode: str, path: str) -> None:
+    before = peak_mb()
+    start = time.perf_counter()
+    if mode == "read":
+        with open(path, "r") as f:
+            source_code = f.read()
+        token_list = Scanner(source_code).scan()
+    else:
+        token_list = PLox.scan_mapped(path).token_list
+    elapsed = time.perf_counter() - start
+    print(f"{mode:5s}: {len(token_list)} tokens in {elapsed:6.2f}s, peak RSS +{peak_mb() - before:7.1f} MB")
+
+
+def main(megabytes: int = 50) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.lox")
+        generate(path, megabytes)
+        print(f"script: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        for mode in ("read", "mmap"):
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
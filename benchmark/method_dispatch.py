@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+
+
+def generate_program(depth: int, calls: int) -> str:
+    lines = ["class Base { init(x) { this.x = x; } get() { return this.x; } }"]
+    parent = "Base"
+    for level in range(depth):
+        name = "Level" + "".join(chr(ord("a") + int(digit)) for digit in str(level))
+        lines.append(f"class {name} < {parent} {{}}")
+        parent = name
+    lines.append(f"var total = 0;")
+    lines.append(f"for (var i = 0; i < {calls}; i = i + 1) {{ total = total + {parent}(i).get(); }}")
+    return "\n".join(lines)
+
+
+def run(depth: int, calls: int) -> float:
+    interpreter = Interpreter()
+    ast = Parser().parse(Scanner(generate_program(depth, calls)).scan())
+    Resolver(interpreter).resolve(ast)
+    start = time.perf_counter()
+    interpreter.interpreter(ast)
+    return time.perf_counter() - start
+
+
+def main(calls: int = 20000) -> None:
+    for depth in (0, 10, 50):
+        elapsed = min(run(depth, calls) for _ in range(3))
+        print(f"hierarchy depth {depth:3d}: {elapsed * 1000:8.1f} ms for {calls} constructions and calls")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from ParallelParser import ParallelParser
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def name(index: int) -> str:
+    # Lox identifiers are letters only
+    text = ""
+    while True:
+        text = LETTERS[index % 26] + text
+        index //= 26
+        if index == 0:
+            return text
+
+
+def generate(declarations: int) -> str:
+    # a flat list of top-level declarations, the shape of our largest generated scripts
+    lines = []
+    for index in range(declarations):
+        suffix = name(index)
+        match index % 3:
+            case 0:
+                lines.append(f"fun f{suffix}(a, b) {{\n    var t = a * {index} + b;\n"
+                             f"    if (t > 10) {{\n        return t - 1;\n    }} else {{\n        return t + 1;\n    }}\n}}")
+            case 1:
+                lines.append(f"class C{suffix} {{\n    init(x) {{\n        this.x = x;\n    }}\n"
+                             f"    get(y) {{\n        return this.x + y * {index};\n    }}\n}}")
+            case _:
+                lines.append(f"var v{suffix} = ({index} + 1) * 2 - {index} / 4;")
+    return "\n".join(lines) + "\n"
+
+
+def serial(source_code: str) -> int:
+    return len(Parser().parse(Scanner(source_code).scan()))
+
+
+def timed(function, source_code: str) -> float:
+    start = time.perf_counter()
+    function(source_code)
+    return time.perf_counter() - start
+
+
+def main(declarations: int = 60000, repeat: int = 3) -> None:
+    source_code = generate(declarations)
+    print(f"script: {len(source_code) / 1024 / 1024:.1f} MB, {declarations} declarations, {os.cpu_count()} cores")
+    best = min(timed(serial, source_code) for _ in range(repeat))
+    print(f"serial     : {best:6.2f}s")
+    workers = 2
+    while workers <= max(os.cpu_count() or 1, 2):
+        parser = ParallelParser(workers)
+        elapsed = min(timed(parser.parse, source_code) for _ in range(repeat))
+        print(f"{workers:2d} workers : {elapsed:6.2f}s ({best / elapsed:4.2f}x, {parser.chunks} chunks)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 60000)
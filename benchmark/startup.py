@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+SCRIPT = "print 1;\n"
+
+
+def first_statement_latency(script_path: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(SRC, "pLox.py"), script_path],
+                            stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()
+    first_line = time.perf_counter() - start
+    proc.wait()
+    return first_line, time.perf_counter() - start
+
+
+def bare_interpreter_latency() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "print(1)"], stdout=subprocess.PIPE)
+    return time.perf_counter() - start
+
+
+def main(runs: int = 30) -> None:
+    with tempfile.NamedTemporaryFile("w", suffix=".lox", delete=False) as f:
+        f.write(SCRIPT)
+    try:
+        first_statement_latency(f.name)
+        samples = [first_statement_latency(f.name) for _ in range(runs)]
+        baseline = sorted(bare_interpreter_latency() for _ in range(runs))
+    finally:
+        os.remove(f.name)
+    first_lines = sorted(sample[0] for sample in samples)
+    totals = sorted(sample[1] for sample in samples)
+    print(f"runs: {runs}")
+    print(f"python -c 'print(1)'      median {baseline[runs // 2] * 1000:7.2f} ms")
+    print(f"launch -> first statement median {first_lines[runs // 2] * 1000:7.2f} ms  "
+          f"min {first_lines[0] * 1000:7.2f} ms")
+    print(f"launch -> exit            median {totals[runs // 2] * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
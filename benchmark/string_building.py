@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+
+PROGRAM = """
+var report = '';
+for (var i = 0; i < COUNT; i = i + 1) {
+  report = report + 'line of a generated report with some padding text\\n';
+}
+var done = report == '';
+"""
+
+
+def run(count: int) -> float:
+    interpreter = Interpreter()
+    ast = Parser().parse(Scanner(PROGRAM.replace("COUNT", str(count))).scan())
+    Resolver(interpreter).resolve(ast)
+    start = time.perf_counter()
+    interpreter.interpreter(ast)
+    return time.perf_counter() - start
+
+
+def main(largest: int = 64000) -> None:
+    count = largest // 8
+    while count <= largest:
+        elapsed = run(count)
+        print(f"{count:7d} appends: {elapsed * 1000:8.1f} ms  ({elapsed / count * 1e6:.2f} us per append)")
+        count *= 2
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64000)
@@ -0,0 +1,57 @@
+import contextlib
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+from Optimizer import Optimizer
+
+PROGRAMS = {
+    "counter": "var t = 0; for (var i = 0; i < COUNT; i = i + 1) { t = t + 2; }",
+    "local": "fun f() { var t = 0; for (var i = 0; i < COUNT; i = i + 1) { t = t * 1; } return t; } f();",
+    "field": "class C { init() { this.n = 0; } run() { for (var i = 0; i < COUNT; i = i + 1) { this.n = this.n + i; } } }"
+             " C().run();",
+    "compare": "var t = 0; for (var i = 0; i < COUNT; i = i + 1) { if (i >= 100) { t = t - 1; } }",
+    "print": "for (var i = 0; i < COUNT; i = i + 1) { print i; }",
+}
+
+
+def prepare(source_code: str, optimize: bool) -> tuple[Interpreter, list, dict]:
+    interpreter = Interpreter()
+    ast = Parser().parse(Scanner(source_code).scan())
+    Resolver(interpreter).resolve(ast)
+    fused = {}
+    if optimize:
+        optimizer = Optimizer(interpreter)
+        optimizer.optimize(ast)
+        fused = optimizer.fused
+    return interpreter, ast, fused
+
+
+def measure(source_code: str, optimize: bool, count: int, repeat: int) -> tuple[float, dict]:
+    best = float("inf")
+    fused = {}
+    for _ in range(repeat):
+        interpreter, ast, fused = prepare(source_code.replace("COUNT", str(count)), optimize)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            interpreter.interpreter(ast)
+            best = min(best, time.perf_counter() - start)
+    return best, fused
+
+
+def main(count: int = 50000, repeat: int = 5) -> None:
+    for name, source_code in PROGRAMS.items():
+        plain, _ = measure(source_code, False, count, repeat)
+        fused_time, fused = measure(source_code, True, count, repeat)
+        nodes = ", ".join(f"{node} x{times}" for node, times in sorted(fused.items()))
+        print(f"{name:8s}: {plain / count * 1e6:6.2f} -> {fused_time / count * 1e6:6.2f} us per iteration "
+              f"({plain / fused_time:4.2f}x; {nodes})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,76 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Program import Program
+
+# a request-sized script: a class, a recursive helper and a loop, run many times by every thread
+SCRIPT = """
+class Account {
+    init(balance) {
+        this.balance = balance;
+    }
+    deposit(amount) {
+        this.balance = this.balance + amount;
+    }
+}
+fun fib(n) {
+    if (n < 2) {
+        return n;
+    }
+    return fib(n - 1) + fib(n - 2);
+}
+var account = Account(0);
+for (var i = 0; i < 200; i = i + 1) {
+    account.deposit(i);
+}
+var result = account.balance + fib(12);
+"""
+
+
+def worker(program: Program, runs: int) -> None:
+    for _ in range(runs):
+        program.run()
+
+
+def compile_each_time(source_code: str, runs: int) -> None:
+    for _ in range(runs):
+        Program.compile(source_code).run()
+
+
+def measure(target, argument, threads: int, runs: int) -> float:
+    workers = [threading.Thread(target=target, args=(argument, runs)) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def gil_enabled() -> bool:
+    # free-threaded builds (3.13t and later) can report the GIL as disabled
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_enabled() if is_enabled else True
+
+
+def main(runs: int = 40, max_threads: int = 8) -> None:
+    program = Program.compile(SCRIPT)
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled() else 'disabled'}, "
+          f"{os.cpu_count()} cores, {runs} runs per thread")
+    single = None
+    threads = 1
+    while threads <= max_threads:
+        shared = measure(worker, program, threads, runs)
+        private = measure(compile_each_time, SCRIPT, threads, runs)
+        rate = threads * runs / shared
+        single = single or rate
+        print(f"{threads:2d} threads: shared program {rate:7.1f} runs/s ({rate / single:4.2f}x), "
+              f"compiled per run {threads * runs / private:7.1f} runs/s")
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
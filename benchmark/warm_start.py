@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+from Snapshot import Snapshot
+
+PRELUDE = """
+class Entry { init(key, next) { this.key = key; this.value = key * key; this.next = next; } }
+class Table {
+  init() { this.head = nil; this.size = 0; }
+  add(key) { this.head = Entry(key, this.head); this.size = this.size + 1; }
+}
+var table = Table();
+for (var i = 0; i < COUNT; i = i + 1) { table.add(i); }
+"""
+JOB = "var first = table.head.value;"
+
+
+def run(interpreter: Interpreter, source_code: str) -> None:
+    ast = Parser().parse(Scanner(source_code).scan())
+    Resolver(interpreter).resolve(ast)
+    interpreter.interpreter(ast)
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(count: int = 2000) -> None:
+    prelude = PRELUDE.replace("COUNT", str(count))
+    cold = timed(lambda: run(Interpreter(), prelude + JOB))
+
+    interpreter = Interpreter()
+    run(interpreter, prelude)
+    snapshot = Snapshot.capture(interpreter)
+    data = snapshot.dumps()
+    in_process = timed(lambda: run(snapshot.restore(), JOB))
+    from_bytes = timed(lambda: run(Snapshot.loads(data).restore(), JOB))
+
+    print(f"cold start (prelude + job):  {cold * 1000:8.2f} ms")
+    print(f"in-process restore + job:    {in_process * 1000:8.2f} ms")
+    print(f"unpickle + restore + job:    {from_bytes * 1000:8.2f} ms  ({len(data) / 1024:.0f} KiB snapshot)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -1,22 +1,24 @@
 from __future__ import annotations
-from Token import Token
-from typing import Optional
 
 
 class AST:
+    __slots__ = ()
+
     def accept(self, visitor: VisitorExpr) -> object:
         pass
 
 
 class Stmt(AST):
-    pass
+    __slots__ = ()
 
 
 class Expr(AST):
-    pass
+    __slots__ = ()
 
 
 class Block(Stmt):
+    __slots__ = ("stmts",)
+
     def __init__(self, stmts: list[Stmt]) -> None:
         self.stmts = stmts
 
@@ -25,6 +27,8 @@ class Block(Stmt):
 
 
 class FuncDecl(Stmt):
+    __slots__ = ("name", "arg_list", "body")
+
     def __init__(self, name: str, arguments: list[str], body: Block) -> None:
         self.name = name
         self.arg_list = arguments
@@ -35,6 +39,8 @@ class FuncDecl(Stmt):
 
 
 class ReturnStmt(Stmt):
+    __slots__ = ("expr",)
+
     def __init__(self, expr: Expr) -> None:
         self.expr = expr
 
@@ -43,6 +49,8 @@ class ReturnStmt(Stmt):
 
 
 class VarDecl(Stmt):
+    __slots__ = ("name", "val")
+
     def __init__(self, name: str, val: Expr) -> None:
         self.name = name
         self.val = val
@@ -52,6 +60,8 @@ class VarDecl(Stmt):
 
 
 class ForStmt(Stmt):
+    __slots__ = ("initialization", "condition", "increment", "body")
+
     def __init__(self, initialization: VarDecl, condition: Expr, increment: Expr, body: Block):
         self.initialization = initialization
         self.condition = condition
@@ -63,6 +73,8 @@ class ForStmt(Stmt):
 
 
 class WhileStmt(Stmt):
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition: Expr, body: Block) -> None:
         self.condition = condition
         self.body = body
@@ -72,7 +84,9 @@ class WhileStmt(Stmt):
 
 
 class IfStmt(Stmt):
-    def __init__(self, condition: Expr, if_block: Block, else_block: Optional[Block]) -> None:
+    __slots__ = ("condition", "if_block", "else_block")
+
+    def __init__(self, condition: Expr, if_block: Block, else_block: Block | None) -> None:
         self.condition = condition
         self.if_block = if_block
         self.else_block = else_block
@@ -82,6 +96,8 @@ class IfStmt(Stmt):
 
 
 class PrintStmt(Stmt):
+    __slots__ = ("val",)
+
     def __init__(self, val: Expr) -> None:
         self.val = val
 
@@ -90,6 +106,8 @@ class PrintStmt(Stmt):
 
 
 class Class(Stmt):
+    __slots__ = ("name", "methods", "superclass")
+
     def __init__(self, name: str, superclass: Class, methods: list[FuncDecl]) -> None:
         self.name = name
         self.methods = methods
@@ -100,6 +118,8 @@ class Class(Stmt):
 
 
 class Assign(Expr):
+    __slots__ = ("name", "val")
+
     def __init__(self, name: str, val: Expr) -> None:
         self.name = name
         self.val = val
@@ -109,6 +129,8 @@ class Assign(Expr):
 
 
 class Binary(Expr):
+    __slots__ = ("left", "right", "operator")
+
     def __init__(self, left: Expr, right: Expr, operator: object) -> None:
         self.left = left
         self.right = right
@@ -122,6 +144,8 @@ class Binary(Expr):
 
 
 class Unary(Expr):
+    __slots__ = ("operator", "right")
+
     def __init__(self, operator: object, right: Expr):
         self.operator = operator
         self.right = right
@@ -131,6 +155,8 @@ class Unary(Expr):
 
 
 class Call(Expr):
+    __slots__ = ("name", "arg_list")
+
     def __init__(self, name: Expr, arguments: list[Expr]) -> None:
         self.name = name
         self.arg_list = arguments
@@ -140,6 +166,8 @@ class Call(Expr):
 
 
 class Get(Expr):
+    __slots__ = ("obj", "name")
+
     def __init__(self, obj: Expr, name: str):
         self.obj = obj
         self.name = name
@@ -149,6 +177,8 @@ class Get(Expr):
 
 
 class Set(Expr):
+    __slots__ = ("expr", "name", "val")
+
     def __init__(self, expr: Expr, name: str, val: Expr):
         self.expr = expr
         self.name = name
@@ -159,6 +189,8 @@ class Set(Expr):
 
 
 class This(Expr):
+    __slots__ = ("keyword",)
+
     def __init__(self, keyword: str):
         self.keyword = keyword
 
@@ -167,6 +199,8 @@ class This(Expr):
 
 
 class Super(Expr):
+    __slots__ = ("keyword", "method")
+
     def __init__(self, keyword: str, method: str):
         self.keyword = keyword
         self.method = method
@@ -176,24 +210,97 @@ class Super(Expr):
 
 
 class Primary(Expr):
-    def __init__(self, literal: Token) -> None:
-        self.literal = literal
+    __slots__ = ("value",)
+
+    def __init__(self, value: object) -> None:
+        self.value = value
 
     def accept(self, visitor) -> object:
         return visitor.visit_primary(self)
 
     def __str__(self) -> str:
-        return str(self.literal.val)
+        return str(self.value)
 
 
 class Variable(Expr):
-    def __init__(self, name: Token) -> None:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str) -> None:
         self.name = name
 
     def accept(self, visitor) -> object:
         return visitor.visit_variable(self)
 
 
+# Superinstructions: common shapes the Optimizer fuses after resolution, each run in a single visit with the
+# resolved distance baked in (None for a global). `original` is the subtree a node replaced, kept for the
+# printer and the loop JIT.
+class UpdateVariable(Expr):
+    # name = name <operator> constant
+    __slots__ = ("name", "distance", "operator", "operand", "original")
+
+    def __init__(self, name: str, distance: int | None, operator: str, operand: object, original: Assign) -> None:
+        self.name = name
+        self.distance = distance
+        self.operator = operator
+        self.operand = operand
+        self.original = original
+
+    def accept(self, visitor) -> object:
+        return visitor.visit_update_variable(self)
+
+
+class UpdateField(Expr):
+    # obj.name = obj.name <operator> operand, where obj is a variable or 'this' and operand a variable or literal
+    __slots__ = ("obj", "distance", "name", "operator", "operand", "original")
+
+    def __init__(self, obj: str, distance: int | None, name: str, operator: str, operand: Expr,
+                 original: Set) -> None:
+        self.obj = obj
+        self.distance = distance
+        self.name = name
+        self.operator = operator
+        self.operand = operand
+        self.original = original
+
+    def accept(self, visitor) -> object:
+        return visitor.visit_update_field(self)
+
+
+class CompareConstant(Expr):
+    # name <comparison> number
+    __slots__ = ("name", "distance", "operator", "constant", "original")
+
+    def __init__(self, name: str, distance: int | None, operator: str, constant: object, original: Binary) -> None:
+        self.name = name
+        self.distance = distance
+        self.operator = operator
+        self.constant = constant
+        self.original = original
+
+    def accept(self, visitor) -> object:
+        return visitor.visit_compare_constant(self)
+
+
+class PrintVariable(Stmt):
+    __slots__ = ("name", "distance", "original")
+
+    def __init__(self, name: str, distance: int | None, original: PrintStmt) -> None:
+        self.name = name
+        self.distance = distance
+        self.original = original
+
+    def accept(self, visitor) -> object:
+        return visitor.visit_print_variable(self)
+
+
+FUSED_NODES = frozenset((UpdateVariable, UpdateField, CompareConstant, PrintVariable))
+
+
+def unfused(node: AST) -> AST:
+    return node.original if type(node) in FUSED_NODES else node
+
+
 class VisitorExpr:
     def visit_binary(self, binary: Binary):
         pass
@@ -252,3 +359,14 @@ class VisitorExpr:
     def visit_super(self, lox_super: Super):
         pass
 
+    def visit_update_variable(self, update: UpdateVariable):
+        pass
+
+    def visit_update_field(self, update: UpdateField):
+        pass
+
+    def visit_compare_constant(self, compare: CompareConstant):
+        pass
+
+    def visit_print_variable(self, print_var: PrintVariable):
+        pass
@@ -0,0 +1,109 @@
+import AST
+
+FUNCTION_KINDS = frozenset(("function", "method", "initializer"))
+
+
+class FrameLayout:
+    __slots__ = ("node", "kind", "parent", "function", "slots", "captured", "free_variables", "calls",
+                 "contains_closures", "escapes", "effects", "global_reads", "retained")
+
+    def __init__(self, node: AST.AST, kind: str, parent: "FrameLayout" = None) -> None:
+        self.node = node
+        self.kind = kind
+        self.parent = parent
+        self.function = self if kind in FUNCTION_KINDS else (parent.function if parent else None)
+        self.slots = {}
+        self.captured = set()
+        self.free_variables = set()
+        self.calls = False
+        self.contains_closures = False
+        # methods can always be fetched off an instance; plain functions escape only if read as values
+        self.escapes = kind == "method" or kind == "initializer"
+        self.effects = set()
+        self.global_reads = set()
+        # something created in this frame (a class, or a function read as a value) may outlive it
+        self.retained = False
+
+    def declare(self, name: str) -> int:
+        return self.slots.setdefault(name, len(self.slots))
+
+    @property
+    def local_count(self) -> int:
+        return len(self.slots)
+
+    @property
+    def needs_environment(self) -> bool:
+        return bool(self.slots)
+
+    def is_cell(self, name: str) -> bool:
+        # 'this' and 'super' are never reassigned, so closures can hold them by value
+        return name in self.captured and self.kind != "this" and self.kind != "super"
+
+    @property
+    def is_confined(self) -> bool:
+        # nothing can reach this frame's environment or its cells once the frame has run
+        return self.needs_environment and not self.retained
+
+    @property
+    def is_function(self) -> bool:
+        return self.kind in FUNCTION_KINDS
+
+    @property
+    def is_leaf(self) -> bool:
+        return not self.calls
+
+    @property
+    def is_capturing(self) -> bool:
+        return bool(self.free_variables)
+
+    def __repr__(self) -> str:
+        name = getattr(self.node, "name", None)
+        return f"<FrameLayout {self.kind}{' ' + name if name else ''} slots={self.slots} captured={self.captured}>"
+
+
+class Analysis:
+    def __init__(self) -> None:
+        self.layouts = {}
+        self.bindings = {}
+        self.frameless = set()
+        self.cells = set()
+        self.cell_params = {}
+        self.captures = {}
+        self.confined = set()
+
+    def copy(self) -> "Analysis":
+        analysis = Analysis()
+        analysis.layouts = dict(self.layouts)
+        analysis.bindings = dict(self.bindings)
+        analysis.frameless = set(self.frameless)
+        analysis.cells = set(self.cells)
+        analysis.cell_params = dict(self.cell_params)
+        analysis.captures = dict(self.captures)
+        analysis.confined = set(self.confined)
+        return analysis
+
+    def add(self, layout: FrameLayout) -> None:
+        self.layouts[layout.node] = layout
+
+    def close(self, layout: FrameLayout) -> None:
+        if not layout.needs_environment:
+            self.frameless.add(layout.node)
+        else:
+            self.frameless.discard(layout.node)
+        # only frames that own cells can be part of a cycle, the others are freed by refcounting
+        if layout.is_confined and layout.captured:
+            self.confined.add(layout.node)
+        else:
+            self.confined.discard(layout.node)
+
+    def layout_of(self, node: AST.AST) -> FrameLayout | None:
+        return self.layouts.get(node)
+
+    def binding_of(self, node: AST.Expr) -> tuple[FrameLayout, int] | None:
+        return self.bindings.get(node)
+
+    def functions(self) -> list[FrameLayout]:
+        return [layout for layout in self.layouts.values() if layout.is_function]
+
+    def blocks(self) -> list[FrameLayout]:
+        return [layout for layout in self.layouts.values() if layout.kind == "block"]
@@ -0,0 +1,379 @@
+import struct
+import AST
+
+# a compiled program starts with MAGIC and the format version; bump FORMAT_VERSION whenever a node
+# type, a field or a section changes, older data is then refused instead of misread
+MAGIC = b"PLXA"
+FORMAT_VERSION = 2
+HAS_RESOLUTION = 1
+HAS_POSITIONS = 2
+
+# field kinds: a child node, a list of child nodes, an entry of the constant table, a list of entries
+NODE, NODES, CONST, CONSTS = range(4)
+
+# a node's tag is its position in this table, the fields are listed in constructor order
+NODE_TYPES = (
+    (AST.Block, (("stmts", NODES),)),
+    (AST.FuncDecl, (("name", CONST), ("arg_list", CONSTS), ("body", NODE))),
+    (AST.ReturnStmt, (("expr", NODE),)),
+    (AST.VarDecl, (("name", CONST), ("val", NODE))),
+    (AST.ForStmt, (("initialization", NODE), ("condition", NODE), ("increment", NODE), ("body", NODE))),
+    (AST.WhileStmt, (("condition", NODE), ("body", NODE))),
+    (AST.IfStmt, (("condition", NODE), ("if_block", NODE), ("else_block", NODE))),
+    (AST.PrintStmt, (("val", NODE),)),
+    (AST.Class, (("name", CONST), ("superclass", NODE), ("methods", NODES))),
+    (AST.Assign, (("name", CONST), ("val", NODE))),
+    (AST.Binary, (("left", NODE), ("right", NODE), ("operator", CONST))),
+    (AST.Unary, (("operator", CONST), ("right", NODE))),
+    (AST.Call, (("name", NODE), ("arg_list", NODES))),
+    (AST.Get, (("obj", NODE), ("name", CONST))),
+    (AST.Set, (("expr", NODE), ("name", CONST), ("val", NODE))),
+    (AST.This, (("keyword", CONST),)),
+    (AST.Super, (("keyword", CONST), ("method", CONST))),
+    (AST.Primary, (("value", CONST),)),
+    (AST.Variable, (("name", CONST),)),
+)
+TAGS = {node_type: (tag, tuple(field for field, _ in fields)) for tag, (node_type, fields) in enumerate(NODE_TYPES)}
+
+# constant table entries
+STR, INT, FLOAT, TRUE, FALSE, NIL = range(6)
+FLOAT_FORMAT = struct.Struct("<d")
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        if position >= len(data):
+            raise Exception("Compiled program is truncated")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def read_varints(data: bytes) -> list[int]:
+    # the whole node stream is decoded in one pass; most values fit one byte
+    values = []
+    append = values.append
+    value = shift = 0
+    for byte in data:
+        if byte < 0x80:
+            if shift:
+                append(value | (byte << shift))
+                value = shift = 0
+            else:
+                append(byte)
+        else:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+    if shift:
+        raise Exception("Compiled program is truncated")
+    return values
+
+
+def reader(node_type: type, kinds: tuple[int, ...]):
+    # one specialised reader per node type, generated from its field kinds: a generic loop over the
+    # kinds costs more than building the node itself
+    lines, args, offset = [], [], 0
+    for number, kind in enumerate(kinds):
+        if kind == NODE:
+            lines.append(f"    a{number} = values[cursor + {offset}]")
+            args.append(f"nodes[index - a{number}] if a{number} else None")
+            offset += 1
+        elif kind == CONST:
+            lines.append(f"    a{number} = table[values[cursor + {offset}]]")
+            args.append(f"a{number}")
+            offset += 1
+        else:
+            element = "nodes[index - val]" if kind == NODES else "table[val]"
+            lines.append(f"    size = values[cursor + {offset}]")
+            lines.append(f"    cursor += {offset + 1}")
+            lines.append(f"    a{number} = [{element} for val in values[cursor:cursor + size]]")
+            lines.append("    cursor += size")
+            args.append(f"a{number}")
+            offset = 0
+    name = f"read_{node_type.__name__}"
+    source = "\n".join([f"def {name}(values, cursor, index, nodes, table):", *lines,
+                        f"    return node_type({', '.join(args)}), cursor + {offset}"])
+    namespace = {"node_type": node_type}
+    exec(compile(source, f"<reader {node_type.__name__}>", "exec"), namespace)
+    return namespace[name]
+
+
+READERS = tuple(reader(node_type, tuple(kind for _, kind in fields)) for node_type, fields in NODE_TYPES)
+
+
+class AstEncoder:
+    # Writes a list of statements as: the header, a table of every distinct name, operator and literal,
+    # then one stream of varints holding the nodes in post-order. A node is its tag followed by its fields;
+    # a child is the distance back to it in the node list (0 for none) and a name or literal is its index in
+    # the table, so both are small numbers almost everywhere. Nodes shared by several parents are written once.
+    def __init__(self) -> None:
+        self.values = []
+        self.node_ids = {}
+        self.constants = []
+        self.constant_ids = {}
+
+    def encode(self, ast_list: list[AST.AST], interpreter=None, positions: list[tuple[int, int]] = None) -> bytes:
+        roots = [self.__node(ast) for ast in ast_list]
+        count = len(self.node_ids)
+        values = self.values
+        values.append(len(roots))
+        values.extend(count - root for root in roots)
+        flags = 0
+        if interpreter is not None:
+            flags |= HAS_RESOLUTION
+            self.__resolution(interpreter)
+        if positions is not None:
+            flags |= HAS_POSITIONS
+            values.append(len(positions))
+            for line, column in positions:
+                values.append(line)
+                values.append(column)
+        out = bytearray(MAGIC)
+        write_varint(out, FORMAT_VERSION)
+        write_varint(out, flags)
+        self.__table(out)
+        write_varint(out, count)
+        if max(values, default=0) < 0x80:
+            out += bytes(values)
+        else:
+            for value in values:
+                if value < 0x80:
+                    out.append(value)
+                else:
+                    write_varint(out, value)
+        return bytes(out)
+
+    def __node(self, node: AST.AST) -> int:
+        index = self.node_ids.get(id(node))
+        if index is not None:
+            return index
+        entry = TAGS.get(type(node))
+        if entry is None:
+            raise Exception(f"Can not encode {type(node).__name__} nodes")
+        tag, fields = entry
+        record = [tag]
+        children = []
+        for field, kind in NODE_TYPES[tag][1]:
+            val = getattr(node, field)
+            if kind == NODE:
+                # children are numbered first, the distance back is known once this node has its own index
+                children.append(len(record))
+                record.append(None if val is None else self.__node(val))
+            elif kind == CONST:
+                record.append(self.__constant(val))
+            elif kind == NODES:
+                record.append(len(val))
+                for child in val:
+                    children.append(len(record))
+                    record.append(self.__node(child))
+            else:
+                record.append(len(val))
+                record.extend(self.__constant(name) for name in val)
+        index = self.node_ids[id(node)] = len(self.node_ids)
+        for position in children:
+            child = record[position]
+            record[position] = 0 if child is None else index - child
+        self.values.extend(record)
+        return index
+
+    def __constant(self, val: object) -> int:
+        # 1 == 1.0 == True as dict keys, and 0.0 == -0.0, so the key carries the type and the exact bits
+        key = (type(val), val.hex()) if type(val) is float else (type(val), val)
+        index = self.constant_ids.get(key)
+        if index is None:
+            index = self.constant_ids[key] = len(self.constants)
+            self.constants.append(val)
+        return index
+
+    def __table(self, out: bytearray) -> None:
+        write_varint(out, len(self.constants))
+        for val in self.constants:
+            if val is None:
+                out.append(NIL)
+            elif val is True:
+                out.append(TRUE)
+            elif val is False:
+                out.append(FALSE)
+            elif type(val) is str:
+                data = val.encode("utf-8")
+                out.append(STR)
+                write_varint(out, len(data))
+                out += data
+            elif type(val) is int:
+                out.append(INT)
+                # zigzag, so small negative numbers stay small
+                write_varint(out, val << 1 if val >= 0 else ((-val) << 1) - 1)
+            elif type(val) is float:
+                out.append(FLOAT)
+                out += FLOAT_FORMAT.pack(val)
+            else:
+                raise Exception(f"Can not encode the constant {val!r}")
+
+    def __resolution(self, interpreter) -> None:
+        # the resolver output the interpreter reads while running: variable distances and the frame analysis.
+        # Entries for nodes outside this program (an earlier REPL line, say) are left out.
+        node_ids, values = self.node_ids, self.values
+        analysis = interpreter.analysis
+        distances = sorted((node_ids[id(node)], distance) for node, distance in interpreter.locals.items()
+                           if id(node) in node_ids)
+        self.__indices([index for index, _ in distances])
+        values.extend(distance for _, distance in distances)
+        self.__indices(sorted(node_ids[id(node)] for node in analysis.frameless if id(node) in node_ids))
+        self.__indices(sorted(node_ids[id(node)] for node in analysis.cells if id(node) in node_ids))
+        self.__indices(sorted(node_ids[id(node)] for node in analysis.confined if id(node) in node_ids))
+        cell_params = sorted((node_ids[id(node)], sorted(params)) for node, params in analysis.cell_params.items()
+                             if id(node) in node_ids)
+        self.__indices([index for index, _ in cell_params])
+        for _, params in cell_params:
+            values.append(len(params))
+            values.extend(self.__constant(name) for name in params)
+        captures = sorted((node_ids[id(node)], captured) for node, captured in analysis.captures.items()
+                          if id(node) in node_ids)
+        self.__indices([index for index, _ in captures])
+        for _, captured in captures:
+            values.append(len(captured))
+            for name, distance in captured:
+                values.append(self.__constant(name))
+                values.append(distance)
+
+    def __indices(self, indices: list[int]) -> None:
+        # sorted node indices, each stored as the gap to the previous one
+        values = self.values
+        values.append(len(indices))
+        previous = 0
+        for index in indices:
+            values.append(index - previous)
+            previous = index
+
+
+class AstDecoder:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.positions = None
+        self.resolved = False
+
+    def decode(self, interpreter=None) -> list[AST.AST]:
+        # with an interpreter, the stored resolution is installed into it and the program can run without
+        # going through the Resolver again
+        data = self.data
+        if data[:len(MAGIC)] != MAGIC:
+            raise Exception("Not a compiled Lox program")
+        version, position = read_varint(data, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise Exception(f"Compiled program has format version {version}, expected {FORMAT_VERSION}")
+        flags, position = read_varint(data, position)
+        table, position = self.__table(position)
+        count, position = read_varint(data, position)
+        values = read_varints(memoryview(data)[position:])
+        try:
+            nodes, cursor = self.__nodes(values, count, table)
+            root_count = values[cursor]
+            ast_list = [nodes[count - distance] for distance in values[cursor + 1:cursor + 1 + root_count]]
+            cursor += 1 + root_count
+            self.resolved = bool(flags & HAS_RESOLUTION)
+            if self.resolved:
+                cursor = self.__resolution(values, cursor, nodes, table, interpreter)
+            if flags & HAS_POSITIONS:
+                size = values[cursor]
+                self.positions = list(zip(values[cursor + 1:cursor + 1 + 2 * size:2],
+                                          values[cursor + 2:cursor + 2 + 2 * size:2]))
+                cursor += 1 + 2 * size
+        except IndexError:
+            raise Exception("Compiled program is truncated") from None
+        if cursor != len(values):
+            raise Exception("Compiled program has trailing data")
+        return ast_list
+
+    def __table(self, position: int) -> tuple[list[object], int]:
+        data = self.data
+        size, position = read_varint(data, position)
+        table = []
+        for _ in range(size):
+            kind = data[position]
+            position += 1
+            if kind == STR:
+                length, position = read_varint(data, position)
+                table.append(bytes(data[position:position + length]).decode("utf-8"))
+                position += length
+            elif kind == INT:
+                val, position = read_varint(data, position)
+                table.append(val >> 1 if not val & 1 else -((val + 1) >> 1))
+            elif kind == FLOAT:
+                table.append(FLOAT_FORMAT.unpack_from(data, position)[0])
+                position += FLOAT_FORMAT.size
+            elif kind == TRUE or kind == FALSE or kind == NIL:
+                table.append(True if kind == TRUE else False if kind == FALSE else None)
+            else:
+                raise Exception(f"Unknown constant kind {kind} in compiled program")
+        return table, position
+
+    @staticmethod
+    def __nodes(values: list[int], count: int, table: list[object]) -> tuple[list[AST.AST], int]:
+        nodes = []
+        append = nodes.append
+        cursor = 0
+        for index in range(count):
+            node, cursor = READERS[values[cursor]](values, cursor + 1, index, nodes, table)
+            append(node)
+        return nodes, cursor
+
+    @staticmethod
+    def __indices(values: list[int], cursor: int, nodes: list[AST.AST]) -> tuple[list[AST.AST], int]:
+        size = values[cursor]
+        cursor += 1
+        selected = []
+        index = 0
+        for gap in values[cursor:cursor + size]:
+            index += gap
+            selected.append(nodes[index])
+        return selected, cursor + size
+
+    def __resolution(self, values: list[int], cursor: int, nodes: list[AST.AST], table: list[object],
+                     interpreter) -> int:
+        resolved, cursor = self.__indices(values, cursor, nodes)
+        distances = values[cursor:cursor + len(resolved)]
+        cursor += len(resolved)
+        frameless, cursor = self.__indices(values, cursor, nodes)
+        cells, cursor = self.__indices(values, cursor, nodes)
+        confined, cursor = self.__indices(values, cursor, nodes)
+        cell_params, cursor = self.__indices(values, cursor, nodes)
+        params = []
+        for _ in cell_params:
+            size = values[cursor]
+            params.append(frozenset(table[name] for name in values[cursor + 1:cursor + 1 + size]))
+            cursor += 1 + size
+        captures, cursor = self.__indices(values, cursor, nodes)
+        captured = []
+        for _ in captures:
+            size = values[cursor]
+            pairs = values[cursor + 1:cursor + 1 + 2 * size]
+            captured.append([(table[name], distance) for name, distance in zip(pairs[::2], pairs[1::2])])
+            cursor += 1 + 2 * size
+        if interpreter is not None:
+            interpreter.locals.update(zip(resolved, distances))
+            analysis = interpreter.analysis
+            analysis.frameless.update(frameless)
+            analysis.cells.update(cells)
+            analysis.confined.update(confined)
+            analysis.cell_params.update(zip(cell_params, params))
+            analysis.captures.update(zip(captures, captured))
+        return cursor
+
+
+def encode(ast_list: list[AST.AST], interpreter=None, positions: list[tuple[int, int]] = None) -> bytes:
+    return AstEncoder().encode(ast_list, interpreter, positions)
+
+
+def decode(data: bytes, interpreter=None) -> list[AST.AST]:
+    return AstDecoder(data).decode(interpreter)
@@ -0,0 +1,280 @@
+import asyncio
+import inspect
+import AST
+from Environment import Environment, Cell
+from LoxFunction import LoxFunction, Return, TailCall
+from LoxClass import LoxClass, LoxInstance
+from LoxError import StackOverflow
+from Builtins import NativeFunction, MemoizedFunction
+from Interpreter import Interpreter, CALLABLE_TYPES, binary_operation, stringify
+from Scanner import Scanner
+from Parser import Parser
+from Resolver import Resolver
+from Diagnostic import LoxSyntaxError
+from Program import Program
+
+DEFAULT_YIELD_EVERY = 1000
+# every Lox call nests about a dozen coroutines, and resuming them recurses on the C stack
+DEFAULT_ASYNC_MAX_DEPTH = 1000
+
+
+class AsyncInterpreter(Interpreter):
+    # Statements that can run for an unbounded time (loops and calls) are executed by coroutines that
+    # hand control back to the event loop every `yield_every` statements or loop iterations.
+    # Everything else goes through the ordinary synchronous visitor.
+    def __init__(self, yield_every: int = DEFAULT_YIELD_EVERY, max_depth: int = DEFAULT_ASYNC_MAX_DEPTH,
+                 tail_calls: bool = True, budget: "ExecutionBudget" = None, release_frames: bool = True,
+                 program=None) -> None:
+        super().__init__(max_depth, tail_calls, budget, release_frames=release_frames, program=program)
+        assert yield_every > 0, "yield_every must be positive"
+        self.yield_every = yield_every
+        self.countdown = yield_every
+        self.yields = 0
+        self.suspends = {}
+        self.handlers = {
+            AST.Block: self.__block, AST.WhileStmt: self.__while, AST.ForStmt: self.__for,
+            AST.IfStmt: self.__if, AST.PrintStmt: self.__print, AST.VarDecl: self.__var_decl,
+            AST.ReturnStmt: self.__return, AST.Call: self.__call, AST.Assign: self.__assign,
+            AST.Binary: self.__binary, AST.Unary: self.__unary, AST.Get: self.__get, AST.Set: self.__set,
+        }
+
+    def compile(self, source_code: str) -> list[AST.AST]:
+        scanner = Scanner(source_code)
+        token_list = scanner.scan()
+        parser = Parser()
+        ast_list = parser.parse(token_list)
+        if scanner.errors or parser.errors:
+            raise LoxSyntaxError(scanner.errors + parser.errors)
+        Resolver(self).resolve(ast_list)
+        return ast_list
+
+    async def run(self, program: str | list[AST.AST] | Program) -> None:
+        if isinstance(program, str):
+            program = self.compile(program)
+        elif isinstance(program, Program):
+            program = program.load(self).ast
+        if self.budget is not None:
+            self.budget.start()
+        for stmt in program:
+            await self.__execute(stmt)
+
+    async def __tick(self) -> None:
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.countdown = self.yield_every
+            self.yields += 1
+            await asyncio.sleep(0)
+
+    def __can_suspend(self, node) -> bool:
+        suspends = self.suspends.get(node)
+        if suspends is None:
+            suspends = self.suspends[node] = self.__scan(node)
+        return suspends
+
+    def __scan(self, node) -> bool:
+        if type(node) is AST.Call or type(node) is AST.WhileStmt or type(node) is AST.ForStmt:
+            return True
+        # declaring a function or class runs none of its body
+        if type(node) is AST.FuncDecl or type(node) is AST.Class:
+            return False
+        for name in node.__slots__:
+            child = getattr(node, name)
+            if isinstance(child, AST.AST):
+                if self.__can_suspend(child):
+                    return True
+            elif type(child) is list:
+                for item in child:
+                    if isinstance(item, AST.AST) and self.__can_suspend(item):
+                        return True
+        return False
+
+    async def __execute(self, stmt: AST.AST) -> None:
+        await self.__tick()
+        if self.__can_suspend(stmt):
+            await self.handlers[type(stmt)](stmt)
+        else:
+            stmt.accept(self)
+
+    async def __evaluate(self, expr: AST.Expr) -> object:
+        if self.__can_suspend(expr):
+            return await self.handlers[type(expr)](expr)
+        return expr.accept(self)
+
+    async def __block(self, block: AST.Block) -> None:
+        if block in self.analysis.frameless:
+            for stmt in block.stmts:
+                await self.__execute(stmt)
+            return
+        if self.budget is not None:
+            self.budget.environments += 1
+        releaser = self.releaser
+        if releaser is not None and block in self.analysis.confined:
+            env = Environment(self.global_env)
+            try:
+                await self.__execute_block(block, env)
+            except Return as ret:
+                # a tail call may be about to run a function declared in this block, it still needs the cells
+                if type(ret.val) is not TailCall:
+                    releaser.release(env)
+                raise
+            releaser.release(env)
+            return
+        await self.__execute_block(block, Environment(self.global_env))
+
+    async def __execute_block(self, block: AST.Block, env: Environment) -> None:
+        global_env = self.global_env
+        try:
+            self.global_env = env
+            for stmt in block.stmts:
+                await self.__execute(stmt)
+        finally:
+            self.global_env = global_env
+
+    async def __while(self, while_stmt: AST.WhileStmt) -> None:
+        while await self.__evaluate(while_stmt.condition):
+            await self.__execute(while_stmt.body)
+            if self.budget is not None:
+                self.budget.step(self)
+            await self.__tick()
+
+    async def __for(self, for_stmt: AST.ForStmt) -> None:
+        await self.__execute(for_stmt.initialization)
+        while await self.__evaluate(for_stmt.condition):
+            await self.__execute(for_stmt.body)
+            await self.__evaluate(for_stmt.increment)
+            if self.budget is not None:
+                self.budget.step(self)
+            await self.__tick()
+
+    async def __if(self, if_stmt: AST.IfStmt) -> None:
+        if await self.__evaluate(if_stmt.condition):
+            await self.__execute(if_stmt.if_block)
+        elif if_stmt.else_block:
+            await self.__execute(if_stmt.else_block)
+
+    async def __print(self, print_stmt: AST.PrintStmt) -> None:
+        self.write(stringify(await self.__evaluate(print_stmt.val)))
+
+    async def __var_decl(self, var: AST.VarDecl) -> None:
+        val = await self.__evaluate(var.val)
+        if var in self.analysis.cells:
+            val = Cell(val)
+        self.global_env.declare_variable(var.name, val)
+
+    async def __return(self, return_stmt: AST.ReturnStmt) -> None:
+        expr = return_stmt.expr
+        if self.tail_calls and type(expr) is AST.Call:
+            callee, arg_list = await self.__evaluate_call(expr)
+            if type(callee) is LoxFunction:
+                raise Return(TailCall(callee, callee.environment(self, arg_list)))
+            raise Return(TailCall(callee, arg_list))
+        raise Return(await self.__evaluate(expr))
+
+    async def __assign(self, assign: AST.Assign) -> object:
+        val = await self.__evaluate(assign.val)
+        distance = self.locals.get(assign)
+        if distance is not None:
+            self.global_env.assignAt(distance, assign.name, val)
+        else:
+            self.globals.assign_variable(assign.name, val)
+        return val
+
+    async def __binary(self, binary: AST.Binary) -> object:
+        left = await self.__evaluate(binary.left)
+        return binary_operation(binary.operator, left, await self.__evaluate(binary.right))
+
+    async def __unary(self, unary: AST.Unary) -> object:
+        right = await self.__evaluate(unary.right)
+        if unary.operator == "!":
+            return not right
+        elif unary.operator == "-":
+            return -right
+        raise Exception("only support '-' and '!' in the unary operation")
+
+    async def __get(self, obj: AST.Get) -> object:
+        lox_obj = await self.__evaluate(obj.obj)
+        if isinstance(lox_obj, LoxInstance):
+            return lox_obj.get(obj.name, self.budget)
+        raise Exception("Only LoxInstance has properties")
+
+    async def __set(self, expr: AST.Set) -> object:
+        obj = await self.__evaluate(expr.expr)
+        if not isinstance(obj, LoxInstance):
+            raise Exception("Only instances have fields.")
+        val = await self.__evaluate(expr.val)
+        obj.set(expr.name, val)
+        return val
+
+    async def __call(self, call_expr: AST.Call) -> object:
+        callee, arg_list = await self.__evaluate_call(call_expr)
+        try:
+            return await self.call_value(callee, arg_list)
+        except RecursionError:
+            raise StackOverflow(self.max_depth, [str(frame) for frame in self.call_stack]) from None
+
+    async def __evaluate_call(self, call_expr: AST.Call) -> tuple[object, list[object]]:
+        callee = await self.__evaluate(call_expr.name)
+        assert len(call_expr.arg_list) <= 255, "The maximum arguments are 255"
+        arg_list = [await self.__evaluate(arg) for arg in call_expr.arg_list]
+        assert isinstance(callee, CALLABLE_TYPES), "Can only call functions and class"
+        assert len(arg_list) == callee.arity(), f"function has {callee.arity()} arguments, but give {len(arg_list)}"
+        return callee, arg_list
+
+    async def call_value(self, callee, arg_list: list[object]) -> object:
+        if isinstance(callee, LoxFunction):
+            return await self.__call_function(callee, arg_list)
+        if isinstance(callee, LoxClass):
+            instance = callee.new_instance(self)
+            if callee.initializer:
+                await self.__call_function(callee.initializer.bind(instance, self.budget), arg_list)
+            return instance
+        if isinstance(callee, MemoizedFunction):
+            key = callee.key(arg_list)
+            if key is None:
+                return await self.call_value(callee.function, arg_list)
+            if key in callee.cache:
+                return callee.hit(key)
+            return callee.store(key, await self.call_value(callee.function, arg_list))
+        if isinstance(callee, NativeFunction):
+            result = callee.async_function(self, *arg_list)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        raise Exception("Can only call functions and class")
+
+    async def __call_function(self, function: LoxFunction, arg_list: list[object]) -> object:
+        budget = self.budget
+        if budget is not None:
+            budget.call(self)
+        call_stack = self.call_stack
+        if len(call_stack) >= self.max_depth:
+            raise StackOverflow(self.max_depth, [str(frame) for frame in call_stack])
+        call_stack.append(function)
+        releaser = self.releaser
+        try:
+            func_env = function.environment(self, arg_list)
+            while True:
+                result = await self.__invoke(function, func_env)
+                if releaser is not None and type(result) is not TailCall and function.func in self.analysis.confined:
+                    releaser.release(func_env)
+                if type(result) is not TailCall:
+                    return result
+                function = result.callee
+                if type(function) is not LoxFunction:
+                    return await self.call_value(function, result.arguments)
+                func_env = result.arguments
+                if budget is not None:
+                    budget.step(self)
+                call_stack[-1] = function
+        finally:
+            call_stack.pop()
+
+    async def __invoke(self, function: LoxFunction, func_env: Environment) -> object:
+        try:
+            await self.__execute_block(function.func.body, func_env)
+        except Return as ret:
+            if function.is_initializer:
+                return function.closure.getAt(0, "this")
+            return ret.val
+        if function.is_initializer:
+            return function.closure.getAt(0, "this")
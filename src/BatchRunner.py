@@ -0,0 +1,204 @@
+import argparse
+import glob
+import io
+import json
+import os
+import signal
+import sys
+import time
+from contextlib import redirect_stdout
+from multiprocessing import Pool, TimeoutError
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+from Diagnostic import LoxSyntaxError
+from pLox import PLox
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_TIMEOUT = 124
+
+_worker_parser = None
+
+
+class ScriptTimeout(BaseException):
+    pass
+
+
+class ScriptResult:
+    def __init__(self, path: str, status: str, exit_code: int, output: str, error: str, elapsed: float) -> None:
+        self.path = path
+        self.status = status
+        self.exit_code = exit_code
+        self.output = output
+        self.error = error
+        self.elapsed = elapsed
+        self.diagnostics = []
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "status": self.status, "exit_code": self.exit_code,
+                "output": self.output, "error": self.error, "diagnostics": self.diagnostics,
+                "elapsed": round(self.elapsed, 6)}
+
+
+def _init_worker() -> None:
+    global _worker_parser
+    _worker_parser = Parser()
+
+
+def _on_alarm(signum, frame) -> None:
+    raise ScriptTimeout()
+
+
+def _start_alarm(timeout: float) -> bool:
+    # workers enforce the timeout themselves where SIGALRM exists
+    if not timeout or not hasattr(signal, "setitimer"):
+        return False
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    return True
+
+
+def _stop_alarm(use_alarm: bool) -> None:
+    if use_alarm:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _execute(parser: Parser, source_code: str) -> None:
+    scanner = Scanner(source_code)
+    token_list = scanner.scan()
+    ast = parser.parse(token_list)
+    if scanner.errors or parser.errors:
+        raise LoxSyntaxError(scanner.errors + parser.errors)
+    interpreter = Interpreter()
+    Resolver(interpreter).resolve(ast)
+    interpreter.interpreter(ast)
+
+
+def check_script(path: str, timeout: float = None) -> ScriptResult:
+    start = time.perf_counter()
+    use_alarm = _start_alarm(timeout)
+    try:
+        with open(path, "r") as f:
+            diagnostics = PLox.check(f.read())
+    except ScriptTimeout:
+        return ScriptResult(path, "timeout", EXIT_TIMEOUT, "", f"Script exceeded {timeout}s timeout",
+                            time.perf_counter() - start)
+    except Exception as err:
+        return ScriptResult(path, "error", EXIT_ERROR, "", f"{type(err).__name__}: {err}",
+                            time.perf_counter() - start)
+    finally:
+        _stop_alarm(use_alarm)
+    result = ScriptResult(path, "error" if diagnostics else "ok", EXIT_ERROR if diagnostics else EXIT_OK,
+                          "", "\n".join(str(diagnostic) for diagnostic in diagnostics), time.perf_counter() - start)
+    result.diagnostics = [diagnostic.to_dict() for diagnostic in diagnostics]
+    return result
+
+
+def run_script(path: str, timeout: float = None) -> ScriptResult:
+    parser = _worker_parser or Parser()
+    buf = io.StringIO()
+    status, exit_code, error = "ok", EXIT_OK, ""
+    start = time.perf_counter()
+    use_alarm = _start_alarm(timeout)
+    try:
+        with open(path, "r") as f:
+            source_code = f.read()
+        with redirect_stdout(buf):
+            _execute(parser, source_code)
+    except ScriptTimeout:
+        status, exit_code, error = "timeout", EXIT_TIMEOUT, f"Script exceeded {timeout}s timeout"
+    except Exception as err:
+        status, exit_code, error = "error", EXIT_ERROR, f"{type(err).__name__}: {err}"
+    finally:
+        _stop_alarm(use_alarm)
+    return ScriptResult(path, status, exit_code, buf.getvalue(), error, time.perf_counter() - start)
+
+
+def collect_scripts(sources: list[str], pattern: str = "*.lox", manifest: str = None) -> list[str]:
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(glob.glob(os.path.join(source, "**", pattern), recursive=True)))
+        elif os.path.isfile(source):
+            paths.append(source)
+        else:
+            paths.extend(sorted(glob.glob(source, recursive=True)))
+    if manifest:
+        base = os.path.dirname(manifest)
+        with open(manifest, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    paths.append(os.path.join(base, line))
+    return paths
+
+
+class BatchRunner:
+    def __init__(self, workers: int = None, timeout: float = None, grace: float = 1.0, check: bool = False) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.grace = grace
+        self.task = check_script if check else run_script
+
+    def run(self, paths: list[str]) -> list[ScriptResult]:
+        results = []
+        pool = Pool(self.workers, initializer=_init_worker)
+        try:
+            pending = [pool.apply_async(self.task, (path, self.timeout)) for path in paths]
+            # where workers cannot enforce the timeout themselves, the parent gives up waiting
+            wait = None
+            if self.timeout and not hasattr(signal, "setitimer"):
+                wait = self.timeout + self.grace
+            for path, async_result in zip(paths, pending):
+                try:
+                    results.append(async_result.get(wait))
+                except TimeoutError:
+                    results.append(ScriptResult(path, "timeout", EXIT_TIMEOUT, "",
+                                                f"Script exceeded {self.timeout}s timeout", wait))
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+        return results
+
+    @staticmethod
+    def summary(results: list[ScriptResult], elapsed: float) -> dict:
+        counts = {"ok": 0, "error": 0, "timeout": 0}
+        for result in results:
+            counts[result.status] += 1
+        return {"total": len(results), "passed": counts["ok"], "failed": counts["error"],
+                "timed_out": counts["timeout"], "elapsed": round(elapsed, 6),
+                "results": [result.to_dict() for result in results]}
+
+
+def main(argv: list[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Run many Lox scripts over a pool of worker processes.")
+    arg_parser.add_argument("sources", nargs="*", help="script files, directories or glob patterns")
+    arg_parser.add_argument("--manifest", help="file listing one script path per line")
+    arg_parser.add_argument("--pattern", default="*.lox", help="file pattern used when a source is a directory")
+    arg_parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    arg_parser.add_argument("--timeout", type=float, default=None, help="per-script timeout in seconds")
+    arg_parser.add_argument("--summary", help="write the JSON summary to this file instead of stdout")
+    arg_parser.add_argument("--check", action="store_true", help="scan, parse and resolve only, without executing")
+    args = arg_parser.parse_args(argv)
+
+    paths = collect_scripts(args.sources, args.pattern, args.manifest)
+    start = time.perf_counter()
+    results = BatchRunner(args.workers, args.timeout, check=args.check).run(paths)
+    summary = BatchRunner.summary(results, time.perf_counter() - start)
+
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"{summary['passed']}/{summary['total']} passed, {summary['failed']} failed, "
+              f"{summary['timed_out']} timed out in {summary['elapsed']}s")
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    return EXIT_OK if summary["passed"] == summary["total"] else EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import sys
+import time
+from collections import OrderedDict
+from LoxFunction import LoxFunction
+from LoxClass import LoxClass
+from LoxString import LoxString
+
+DEFAULT_MEMO_SIZE = 128
+HASHABLE_TYPES = (str, LoxString, int, float, bool, type(None))
+
+
+class NativeFunction:
+    def __init__(self, name: str, arity: int, function, async_function=None) -> None:
+        self.name = name
+        self.function = function
+        # the AsyncInterpreter prefers async_function and awaits whatever a native returns
+        self.async_function = async_function or function
+        self.__arity = arity
+
+    def call(self, interpreter, arg_list: list[object]) -> object:
+        result = self.function(interpreter, *arg_list)
+        # asyncio and inspect are imported only once something async turns up, they are slow to load
+        if hasattr(type(result), "__await__"):
+            import inspect
+            if inspect.iscoroutine(result):
+                result.close()
+            raise Exception(f"native function {self.name} is asynchronous, run the script with AsyncInterpreter")
+        return result
+
+    def arity(self) -> int:
+        return self.__arity
+
+    def __reduce__(self):
+        # builtins are rebuilt from the table on load; their lambdas cannot be pickled
+        if BUILTIN_TABLE.get(self.name) is self:
+            return builtin, (self.name,)
+        return NativeFunction, (self.name, self.__arity, self.function, self.async_function)
+
+    def __str__(self) -> str:
+        return f"<native fn {self.name}>"
+
+
+class MemoizedFunction:
+    def __init__(self, function, size: int = DEFAULT_MEMO_SIZE) -> None:
+        assert size > 0, "Memo size must be positive"
+        self.function = function
+        self.size = size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def call(self, interpreter, arg_list: list[object]) -> object:
+        key = self.key(arg_list)
+        if key is None:
+            return self.function.call(interpreter, arg_list)
+        if key in self.cache:
+            return self.hit(key)
+        return self.store(key, self.function.call(interpreter, arg_list))
+
+    def key(self, arg_list: list[object]) -> tuple | None:
+        key = []
+        for arg in arg_list:
+            # instances and functions compare by identity, which says nothing about the state a call sees
+            if not isinstance(arg, HASHABLE_TYPES):
+                self.uncached += 1
+                return None
+            # True == 1 and hashes alike in Python, Lox keeps booleans apart from numbers
+            key.append((bool, arg) if type(arg) is bool else arg)
+        return tuple(key)
+
+    def hit(self, key: tuple) -> object:
+        self.hits += 1
+        self.cache.move_to_end(key)
+        return self.cache[key]
+
+    def store(self, key: tuple, result: object) -> object:
+        self.misses += 1
+        cache = self.cache
+        cache[key] = result
+        if len(cache) > self.size:
+            cache.popitem(last=False)
+        return result
+
+    def arity(self) -> int:
+        return self.function.arity()
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.hits = self.misses = self.uncached = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "uncached": self.uncached,
+                "size": len(self.cache), "max_size": self.size}
+
+    def __str__(self) -> str:
+        return f"memo {self.function}"
+
+
+def impurities(interpreter, function: LoxFunction) -> list[str]:
+    layout = interpreter.analysis.layout_of(function.func)
+    if layout is None:
+        return []
+    reasons = sorted(layout.effects)
+    for name in sorted(layout.global_reads):
+        # calling other global functions is fine, reading global data is not
+        value = interpreter.globals.variables.get(name)
+        if not isinstance(value, (LoxFunction, LoxClass, NativeFunction, MemoizedFunction)):
+            reasons.append(f"reads global '{name}'")
+    return reasons
+
+
+def memoize(interpreter, function, size) -> MemoizedFunction:
+    assert isinstance(function, (LoxFunction, NativeFunction, MemoizedFunction)), "Can only memoize functions"
+    assert isinstance(size, (int, float)) and size >= 1 and size == int(size), "Memo size must be a positive integer"
+    if isinstance(function, MemoizedFunction):
+        function = function.function
+    if isinstance(function, LoxFunction):
+        reasons = impurities(interpreter, function)
+        if reasons:
+            print(f"Warning: memoized {function} may not be pure: {', '.join(reasons)}", file=sys.stderr)
+    return MemoizedFunction(function, int(size))
+
+
+def memo_stats(interpreter, function) -> str:
+    assert isinstance(function, MemoizedFunction), "memoStats expects a memoized function"
+    return "hits={hits} misses={misses} uncached={uncached} size={size}/{max_size}".format(**function.stats())
+
+
+def sleep(interpreter, seconds) -> None:
+    time.sleep(seconds)
+
+
+async def async_sleep(interpreter, seconds) -> None:
+    import asyncio
+    await asyncio.sleep(seconds)
+
+
+BUILTINS = (
+    NativeFunction("memo", 1, lambda interpreter, function: memoize(interpreter, function, DEFAULT_MEMO_SIZE)),
+    NativeFunction("memoize", 2, memoize),
+    NativeFunction("memoStats", 1, memo_stats),
+    NativeFunction("sleep", 1, sleep, async_sleep),
+)
+
+BUILTIN_TABLE = {native.name: native for native in BUILTINS}
+
+
+def builtin(name: str) -> NativeFunction:
+    return BUILTIN_TABLE[name]
+
+
+def define_builtins(env) -> None:
+    for native in BUILTINS:
+        env.declare_variable(native.name, native)
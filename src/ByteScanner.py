@@ -0,0 +1,159 @@
+import re
+import sys
+from Token import TokenType, TokenArray
+from Diagnostic import Diagnostic
+from Scanner import Scanner
+
+ASCII_LETTERS = re.compile(rb"[A-Za-z]+")
+ASCII_NUMBER = re.compile(rb"[0-9.]+")
+SINGLE = {ord(char): (type, char) for char, type in (
+    (".", TokenType.DOT), ("(", TokenType.LEFT_PAREN), (")", TokenType.RIGHT_PAREN), ("{", TokenType.LEFT_BRACKET),
+    ("}", TokenType.RIGHT_BRACKET), (",", TokenType.COMMA), (";", TokenType.SEMICOLON), ("+", TokenType.ADD),
+    ("-", TokenType.MINUS), ("*", TokenType.STAR), ("/", TokenType.DIVISION))}
+# these take a following '=' when there is one
+DOUBLE = {ord(char): (single, char, double, char + "=") for char, single, double in (
+    ("<", TokenType.LESS, TokenType.LESS_EQUAL), (">", TokenType.GREATER, TokenType.GREATER_EQUAL),
+    ("=", TokenType.EQUAL, TokenType.EQUAL_EQUAL), ("!", TokenType.NOT, TokenType.NOT_EQUAL))}
+WHITESPACE = frozenset(b" \t\r")
+NEWLINE = ord("\n")
+QUOTE = ord("'")
+EQUAL = ord("=")
+
+
+def utf8_length(lead: int) -> int:
+    if lead >= 0xF0:
+        return 4
+    if lead >= 0xE0:
+        return 3
+    return 2
+
+
+class ByteScanner:
+    # Scans UTF-8 source straight out of a bytes-like buffer, typically an mmap of the script, and makes
+    # the same tokens and diagnostics as Scanner. The source is never decoded as a whole: identifiers are
+    # looked up by a memoryview of their bytes and become one interned str per distinct name, numbers are
+    # parsed from their bytes, and only string literals are decoded. Columns still count characters.
+    def __init__(self, buffer, line: int = 1) -> None:
+        self.buffer = buffer
+        self.line = line
+        self.token_list = TokenArray()
+        self.errors = []
+        self.names = {word.encode(): (type, word) for word, type in Scanner("").keywords.items()}
+
+    def scan(self) -> TokenArray:
+        buffer, names = self.buffer, self.names
+        view = memoryview(buffer)
+        # a writable buffer gives unhashable views, so names are looked up by a copy of their bytes
+        readonly = view.readonly
+        add = self.token_list.add
+        end = len(view)
+        line = self.line
+        line_start = 0
+        # bytes beyond the first of each multi-byte character between line_start and the current position
+        wide = 0
+        current = 0
+        try:
+            while current < end:
+                start = current
+                byte = view[current]
+                current += 1
+                if byte in WHITESPACE:
+                    continue
+                if byte == NEWLINE:
+                    line += 1
+                    line_start = current
+                    wide = 0
+                    continue
+                single = SINGLE.get(byte)
+                if single is not None:
+                    add(single[0], single[1], line, start - line_start - wide + 1)
+                    continue
+                double = DOUBLE.get(byte)
+                if double is not None:
+                    if current < end and view[current] == EQUAL:
+                        current += 1
+                        add(double[2], double[3], line, start - line_start - wide + 1)
+                    else:
+                        add(double[0], double[1], line, start - line_start - wide + 1)
+                    continue
+                column = start - line_start - wide + 1
+                if byte == QUOTE:
+                    close = buffer.find(b"'", current)
+                    if close < 0:
+                        self.errors.append(Diagnostic("Scan", "Unterminated string.", line, column))
+                        # like Scanner, stop here and put EOF on the line the string started on
+                        wide = (end - line_start) - len(bytes(view[line_start:end]).decode("utf-8"))
+                        current = end
+                        break
+                    raw = bytes(view[current:close])
+                    text = raw.decode("utf-8")
+                    add(TokenType.STRING, sys.intern(text), line, column)
+                    current = close + 1
+                    newlines = raw.count(b"\n")
+                    if newlines:
+                        line += newlines
+                        tail_start = raw.rindex(b"\n") + 1
+                        line_start = start + 1 + tail_start
+                        wide = len(raw) - tail_start - len(text) + text.rindex("\n") + 1
+                    else:
+                        wide += len(raw) - len(text)
+                    continue
+                if byte < 0x80:
+                    char = chr(byte)
+                else:
+                    size = utf8_length(byte)
+                    char = bytes(view[start:start + size]).decode("utf-8")
+                if char.isdigit():
+                    current, extra = self.__run(view, start, ASCII_NUMBER, str.isdigit)
+                    if extra:
+                        text = bytes(view[start:current]).decode("utf-8")
+                        fractional = "." in text
+                    else:
+                        text = buffer[start:current]
+                        fractional = b"." in text
+                    # integral literals stay exact ints; only a fractional part makes a float
+                    try:
+                        val = float(text) if fractional else int(text)
+                    except ValueError:
+                        # reported exactly as Scanner reports the same text, and kept as a number token
+                        text = text if extra else bytes(text).decode("utf-8")
+                        self.errors.append(Diagnostic("Scan", f"Invalid number: {text}", line, column))
+                        val = 0
+                    add(TokenType.NUMBER, val, line, column)
+                    wide += extra
+                elif char.isalpha():
+                    current, extra = self.__run(view, start, ASCII_LETTERS, str.isalpha)
+                    key = view[start:current]
+                    entry = names.get(key if readonly else bytes(key))
+                    if entry is None:
+                        key = bytes(view[start:current])
+                        entry = names[key] = (TokenType.IDENTIFIER, sys.intern(key.decode("utf-8")))
+                    add(entry[0], entry[1], line, column)
+                    wide += extra
+                else:
+                    self.errors.append(Diagnostic("Scan", f"Invalid syntax: {char}", line, column))
+                    current = start + len(char.encode("utf-8"))
+                    wide += current - start - 1
+        finally:
+            view.release()
+        self.line = line
+        add(TokenType.EOF, " ", line, current - line_start - wide + 1)
+        return self.token_list
+
+    def __run(self, view: memoryview, start: int, ascii_run: re.Pattern, accept) -> tuple[int, int]:
+        # the end of a run of characters that pass `accept`, and how many extra bytes its multi-byte characters
+        # take; ASCII stretches are matched by the regex in one step
+        buffer, end = self.buffer, len(view)
+        position, extra = start, 0
+        while True:
+            match = ascii_run.match(buffer, position)
+            if match is not None:
+                position = match.end()
+            if position >= end or view[position] < 0x80:
+                return position, extra
+            size = utf8_length(view[position])
+            char = bytes(view[position:position + size]).decode("utf-8")
+            if not accept(char):
+                return position, extra
+            position += size
+            extra += size - 1
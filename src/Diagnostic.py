@@ -0,0 +1,20 @@
+class Diagnostic:
+    __slots__ = ("stage", "message", "line", "column")
+
+    def __init__(self, stage: str, message: str, line: int, column: int) -> None:
+        self.stage = stage
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def to_dict(self) -> dict:
+        return {"stage": self.stage, "message": self.message, "line": self.line, "column": self.column}
+
+    def __str__(self) -> str:
+        return f"[line {self.line}, column {self.column}] {self.stage} error: {self.message}"
+
+
+class LoxSyntaxError(Exception):
+    def __init__(self, diagnostics: list[Diagnostic]) -> None:
+        super().__init__("\n".join(str(diagnostic) for diagnostic in diagnostics))
+        self.diagnostics = diagnostics
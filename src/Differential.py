@@ -0,0 +1,446 @@
+import argparse
+import asyncio
+import io
+import os
+import sys
+import threading
+from contextlib import redirect_stdout, redirect_stderr
+import AST
+from Scanner import Scanner
+from ByteScanner import ByteScanner
+from ParallelParser import ParallelParser
+from AstCodec import encode, decode
+from Parser import Parser
+from Interpreter import Interpreter, stringify
+from AsyncInterpreter import AsyncInterpreter, DEFAULT_ASYNC_MAX_DEPTH
+from Resolver import Resolver
+from Optimizer import Optimizer
+from Program import Program
+from LoopJit import LoopJit
+from ExecutionBudget import ExecutionBudget
+from Environment import Cell
+from LoxClass import LoxInstance
+from LoxError import BudgetExceeded
+from Diagnostic import LoxSyntaxError
+from Builtins import BUILTIN_TABLE
+from BatchRunner import collect_scripts, EXIT_OK, EXIT_ERROR
+from LoxPrinter import to_source
+from ProgramGenerator import ProgramGenerator
+
+BASELINE = "interpreter"
+# every engine gets the same step budget, so a program that does not terminate cannot hang the harness
+DEFAULT_STEPS = 200000
+MAX_MINIMISE_TESTS = 2000
+
+
+class Outcome:
+    def __init__(self, output: str, error: str, globals: dict[str, str], exhausted: bool = False) -> None:
+        self.output = output
+        self.error = error
+        self.globals = globals
+        self.exhausted = exhausted
+
+    def differences(self, other: "Outcome") -> list[str]:
+        differences = []
+        if self.output != other.output:
+            expected, actual = self.output.splitlines(), other.output.splitlines()
+            line = next((index for index, (left, right) in enumerate(zip(expected, actual)) if left != right),
+                        min(len(expected), len(actual)))
+            differences.append(f"output differs at line {line + 1}: expected "
+                               f"{expected[line] if line < len(expected) else '<end>'!r}, got "
+                               f"{actual[line] if line < len(actual) else '<end>'!r}")
+        if self.error != other.error:
+            differences.append(f"error differs: expected {self.error or '<none>'!r}, got {other.error or '<none>'!r}")
+        for name in sorted(self.globals.keys() | other.globals.keys()):
+            expected, actual = self.globals.get(name, "<undefined>"), other.globals.get(name, "<undefined>")
+            if expected != actual:
+                differences.append(f"global {name} differs: expected {expected!r}, got {actual!r}")
+        return differences
+
+
+def describe(value: object, depth: int = 0) -> str:
+    if type(value) is Cell:
+        value = value.value
+    if isinstance(value, LoxInstance) and depth < 2:
+        fields = ", ".join(f"{name}={describe(field, depth + 1)}" for name, field in sorted(value.fields.items()))
+        return f"{value} {{{fields}}}"
+    return stringify(value)
+
+
+def global_values(interpreter: Interpreter) -> dict[str, str]:
+    return {name: describe(value) for name, value in interpreter.globals.variables.items()
+            if BUILTIN_TABLE.get(name) is not value}
+
+
+class Engine:
+    # One way of running a Lox program. Subclasses swap the front end or the runtime; the outcome of
+    # every engine must match the reference interpreter's.
+    def __init__(self, name: str, max_depth: int = DEFAULT_ASYNC_MAX_DEPTH, steps: int = DEFAULT_STEPS,
+                 tail_calls: bool = True, jit_threshold: int = None, release_frames: bool = True,
+                 fuse: bool = False) -> None:
+        self.name = name
+        self.max_depth = max_depth
+        self.steps = steps
+        self.tail_calls = tail_calls
+        self.jit_threshold = jit_threshold
+        self.release_frames = release_frames
+        self.fuse = fuse
+
+    def budget(self) -> ExecutionBudget | None:
+        return ExecutionBudget(steps=self.steps) if self.steps else None
+
+    def interpreter(self) -> Interpreter:
+        interpreter = Interpreter(self.max_depth, self.tail_calls, self.budget(), release_frames=self.release_frames)
+        if self.jit_threshold is not None:
+            interpreter.jit = LoopJit(self.jit_threshold)
+        return interpreter
+
+    def scanner(self, source_code: str):
+        return Scanner(source_code)
+
+    def parse(self, source_code: str) -> list[AST.AST]:
+        scanner = self.scanner(source_code)
+        token_list = scanner.scan()
+        parser = Parser()
+        ast_list = parser.parse(token_list)
+        if scanner.errors or parser.errors:
+            raise LoxSyntaxError(scanner.errors + parser.errors)
+        return ast_list
+
+    def compile(self, interpreter: Interpreter, source_code: str) -> list[AST.AST]:
+        ast_list = self.parse(source_code)
+        Resolver(interpreter).resolve(ast_list)
+        if self.fuse:
+            Optimizer(interpreter).optimize(ast_list)
+        return ast_list
+
+    def execute(self, interpreter: Interpreter, ast_list: list[AST.AST]) -> None:
+        interpreter.interpreter(ast_list)
+
+    def run(self, source_code: str) -> Outcome:
+        stdout = io.StringIO()
+        error, exhausted = "", False
+        interpreter = self.interpreter()
+        # warnings such as memo's purity check go to stderr and are not part of the outcome
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            try:
+                self.execute(interpreter, self.compile(interpreter, source_code))
+            except BudgetExceeded as err:
+                error, exhausted = f"{type(err).__name__}: {err}", True
+            except Exception as err:
+                error = f"{type(err).__name__}: {err}"
+        return Outcome(stdout.getvalue(), error, global_values(interpreter), exhausted)
+
+
+class AsyncEngine(Engine):
+    def __init__(self, name: str, yield_every: int = 7, **options) -> None:
+        super().__init__(name, **options)
+        self.yield_every = yield_every
+
+    def interpreter(self) -> Interpreter:
+        return AsyncInterpreter(self.yield_every, self.max_depth, self.tail_calls, self.budget(), self.release_frames)
+
+    def execute(self, interpreter: Interpreter, ast_list: list[AST.AST]) -> None:
+        asyncio.run(interpreter.run(ast_list))
+
+
+class ByteScannerEngine(Engine):
+    def scanner(self, source_code: str) -> ByteScanner:
+        return ByteScanner(source_code.encode("utf-8"))
+
+
+class ParallelParserEngine(Engine):
+    def parse(self, source_code: str) -> list[AST.AST]:
+        # split even small programs, so every run goes through the chunking and the merge
+        parser = ParallelParser(workers=2, min_size=0)
+        ast_list = parser.parse(source_code)
+        if parser.errors:
+            raise LoxSyntaxError(parser.errors)
+        return ast_list
+
+
+class CodecEngine(Engine):
+    def compile(self, interpreter: Interpreter, source_code: str) -> list[AST.AST]:
+        # resolve on a scratch interpreter and run what comes back out of the binary format, resolution included
+        ast_list = self.parse(source_code)
+        scratch = Interpreter()
+        Resolver(scratch).resolve(ast_list)
+        return decode(encode(ast_list, scratch), interpreter)
+
+
+class SharedProgramEngine(Engine):
+    # compiles once and runs that one Program in several threads at the same time; a run that leaves
+    # anything behind in the program, or picks up another thread's state, stops matching a lone interpreter
+    def __init__(self, name: str, threads: int = 4, **options) -> None:
+        super().__init__(name, **options)
+        self.threads = threads
+
+    def run(self, source_code: str) -> Outcome:
+        try:
+            program = Program.compile(source_code, self.fuse)
+        except Exception as err:
+            return Outcome("", f"{type(err).__name__}: {err}", {})
+        outcomes = [None] * self.threads
+        runs = [threading.Thread(target=self.__run_thread, args=(program, outcomes, index))
+                for index in range(self.threads)]
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            for thread in runs:
+                thread.start()
+            for thread in runs:
+                thread.join()
+        for index, outcome in enumerate(outcomes[1:], 1):
+            differences = outcomes[0].differences(outcome)
+            if differences:
+                return Outcome(outcomes[0].output, f"thread {index} disagrees: {differences[0]}", {})
+        return outcomes[0]
+
+    def __run_thread(self, program: Program, outcomes: list[Outcome], index: int) -> None:
+        interpreter = program.load(self.interpreter())
+        interpreter.output = io.StringIO()
+        error, exhausted = "", False
+        try:
+            self.execute(interpreter, program.ast)
+        except BudgetExceeded as err:
+            error, exhausted = f"{type(err).__name__}: {err}", True
+        except Exception as err:
+            error = f"{type(err).__name__}: {err}"
+        outcomes[index] = Outcome(interpreter.output.getvalue(), error, global_values(interpreter), exhausted)
+
+
+ENGINES = {
+    "interpreter": (Engine, {}),
+    "jit": (Engine, {"jit_threshold": 0}),
+    "async": (AsyncEngine, {}),
+    "no-tail-calls": (Engine, {"tail_calls": False}),
+    "no-release": (Engine, {"release_frames": False}),
+    "fused": (Engine, {"fuse": True}),
+    "fused-jit": (Engine, {"fuse": True, "jit_threshold": 0}),
+    "fused-async": (AsyncEngine, {"fuse": True}),
+    "byte-scanner": (ByteScannerEngine, {}),
+    "parallel-parser": (ParallelParserEngine, {}),
+    "codec": (CodecEngine, {}),
+    "threads": (SharedProgramEngine, {}),
+    "threads-jit": (SharedProgramEngine, {"jit_threshold": 0}),
+}
+
+
+def make_engine(name: str, **options) -> Engine:
+    assert name in ENGINES, f"unknown engine {name}, choose from {', '.join(ENGINES)}"
+    engine_type, defaults = ENGINES[name]
+    return engine_type(name, **{**defaults, **options})
+
+
+class Comparison:
+    def __init__(self, source_code: str, expected: Outcome, mismatches: dict[str, list[str]]) -> None:
+        self.source_code = source_code
+        self.expected = expected
+        self.mismatches = mismatches
+
+    @property
+    def inconclusive(self) -> bool:
+        # a program the reference interpreter could not finish says nothing about the other engines
+        return self.expected.exhausted
+
+    @property
+    def agrees(self) -> bool:
+        return not self.mismatches
+
+
+class Differential:
+    def __init__(self, engines: list[Engine], baseline: Engine = None) -> None:
+        self.baseline = baseline or make_engine(BASELINE)
+        self.engines = engines
+
+    def compare(self, source_code: str) -> Comparison:
+        expected = self.baseline.run(source_code)
+        mismatches = {}
+        if not expected.exhausted:
+            for engine in self.engines:
+                differences = expected.differences(engine.run(source_code))
+                if differences:
+                    mismatches[engine.name] = differences
+        return Comparison(source_code, expected, mismatches)
+
+    def fails(self, ast_list: list[AST.AST]) -> bool:
+        comparison = self.compare(to_source(ast_list))
+        return not comparison.inconclusive and not comparison.agrees
+
+    def minimise(self, ast_list: list[AST.AST], max_tests: int = MAX_MINIMISE_TESTS) -> list[AST.AST]:
+        return Minimiser(self.fails, max_tests).minimise(ast_list)
+
+
+class Minimiser:
+    # Delta debugging over the AST: drop chunks of every statement list, unwrap control flow and replace
+    # expressions with their operands or a literal, keeping each change only while `fails` still holds.
+    # The tree is edited in place and the whole program re-tested after every edit.
+    def __init__(self, fails, max_tests: int = MAX_MINIMISE_TESTS) -> None:
+        self.fails = fails
+        self.max_tests = max_tests
+        self.tests = 0
+        self.program = []
+
+    def minimise(self, ast_list: list[AST.AST]) -> list[AST.AST]:
+        self.program = list(ast_list)
+        self.tests = 0
+        progress = True
+        while progress and self.tests < self.max_tests:
+            progress = self.__reduce(self.program)
+        return self.program
+
+    def __check(self) -> bool:
+        if self.tests >= self.max_tests:
+            return False
+        self.tests += 1
+        return self.fails(self.program)
+
+    def __reduce(self, stmts: list[AST.AST]) -> bool:
+        progress = self.__drop(stmts)
+        for index in range(len(stmts)):
+            progress = self.__unwrap(stmts, index) or progress
+            progress = self.__children(stmts[index]) or progress
+        return progress
+
+    def __drop(self, stmts: list[AST.AST]) -> bool:
+        progress = False
+        chunk = len(stmts) // 2 or len(stmts)
+        while chunk >= 1:
+            removed = False
+            start = 0
+            while start < len(stmts):
+                saved = stmts[start:start + chunk]
+                del stmts[start:start + chunk]
+                if self.__check():
+                    removed = progress = True
+                else:
+                    stmts[start:start] = saved
+                    start += chunk
+            if not removed:
+                chunk //= 2
+        return progress
+
+    def __unwrap(self, stmts: list[AST.AST], index: int) -> bool:
+        stmt = stmts[index]
+        candidates = []
+        if type(stmt) is AST.IfStmt:
+            candidates = [block for block in (stmt.if_block, stmt.else_block) if block is not None]
+        elif type(stmt) is AST.WhileStmt:
+            candidates = [stmt.body]
+        elif type(stmt) is AST.Block and len(stmt.stmts) == 1 and type(stmt.stmts[0]) is AST.ForStmt:
+            loop = stmt.stmts[0]
+            candidates = [AST.Block([loop.initialization, loop.body])]
+        elif isinstance(stmt, AST.Expr):
+            candidates = self.__operands(stmt)
+        for candidate in candidates:
+            stmts[index] = candidate
+            if self.__check():
+                return True
+        stmts[index] = stmt
+        return False
+
+    def __children(self, node: AST.AST) -> bool:
+        progress = False
+        for name in node.__slots__:
+            child = getattr(node, name)
+            if type(node) is AST.Class and name == "superclass":
+                continue
+            if type(child) is list:
+                if type(node) is AST.Call:
+                    for index in range(len(child)):
+                        progress = self.__replace(child, index) or progress
+                        progress = self.__children(child[index]) or progress
+                elif child and isinstance(child[0], AST.AST):
+                    progress = self.__reduce(child) or progress
+            elif isinstance(child, AST.Expr):
+                progress = self.__replace(node, name) or progress
+                progress = self.__children(getattr(node, name)) or progress
+            elif isinstance(child, AST.AST):
+                progress = self.__children(child) or progress
+        return progress
+
+    def __replace(self, holder, key) -> bool:
+        # holder is a node and key a slot name, or holder is an argument list and key an index
+        if type(holder) is list:
+            get, put = holder.__getitem__, holder.__setitem__
+        else:
+            get, put = (lambda name: getattr(holder, name)), (lambda name, value: setattr(holder, name, value))
+        original = get(key)
+        for candidate in self.__operands(original):
+            put(key, candidate)
+            if self.__check():
+                return True
+        put(key, original)
+        return False
+
+    @staticmethod
+    def __operands(expr: AST.Expr) -> list[AST.Expr]:
+        if type(expr) is AST.Primary:
+            return []
+        operands = [getattr(expr, name) for name in expr.__slots__ if isinstance(getattr(expr, name), AST.Expr)]
+        if type(expr) is AST.Call:
+            operands.extend(expr.arg_list)
+        return operands + [AST.Primary(0)]
+
+
+def main(argv: list[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Run Lox programs through several engines and compare them "
+                                                     "with the reference interpreter.")
+    arg_parser.add_argument("sources", nargs="*", help="script files, directories or glob patterns")
+    arg_parser.add_argument("--pattern", default="*.lox", help="file pattern used when a source is a directory")
+    arg_parser.add_argument("--engines", default=",".join(name for name in ENGINES if name != BASELINE),
+                            help="comma separated engines to compare with the reference interpreter")
+    arg_parser.add_argument("--random", type=int, default=0, help="number of random programs to generate")
+    arg_parser.add_argument("--seed", type=int, default=0, help="seed of the first random program")
+    arg_parser.add_argument("--statements", type=int, default=12, help="top level statements per random program")
+    arg_parser.add_argument("--depth", type=int, default=3, help="nesting depth of random programs")
+    arg_parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="step budget of every run")
+    arg_parser.add_argument("--no-minimise", action="store_true", help="report failing programs as generated")
+    arg_parser.add_argument("--save", help="directory to write failing programs to")
+    args = arg_parser.parse_args(argv)
+
+    engines = [make_engine(name.strip(), steps=args.steps) for name in args.engines.split(",") if name.strip()]
+    differential = Differential(engines, make_engine(BASELINE, steps=args.steps))
+    total = failed = inconclusive = 0
+
+    def report(label: str, comparison: Comparison, ast_list: list[AST.AST] = None) -> None:
+        print(f"FAIL {label}")
+        for engine, differences in comparison.mismatches.items():
+            for difference in differences:
+                print(f"  {engine}: {difference}")
+        source_code = comparison.source_code
+        if ast_list is not None and not args.no_minimise:
+            failing = [engine for engine in engines if engine.name in comparison.mismatches]
+            source_code = to_source(Differential(failing, differential.baseline).minimise(ast_list))
+            print("  minimised program:")
+            print("".join(f"    {line}\n" for line in source_code.splitlines()), end="")
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            with open(os.path.join(args.save, os.path.basename(label) + ".lox"), "w") as f:
+                f.write(source_code)
+
+    for path in collect_scripts(args.sources, args.pattern):
+        with open(path, "r") as f:
+            comparison = differential.compare(f.read())
+        total += 1
+        if comparison.inconclusive:
+            inconclusive += 1
+        elif not comparison.agrees:
+            failed += 1
+            report(path, comparison)
+
+    for seed in range(args.seed, args.seed + args.random):
+        ast_list = ProgramGenerator(seed, args.statements, args.depth).program()
+        comparison = differential.compare(to_source(ast_list))
+        total += 1
+        if comparison.inconclusive:
+            inconclusive += 1
+        elif not comparison.agrees:
+            failed += 1
+            report(f"random-{seed}", comparison, ast_list)
+
+    print(f"{total - failed - inconclusive}/{total} agree, {failed} differ, {inconclusive} inconclusive "
+          f"({', '.join(engine.name for engine in engines)} against {BASELINE})")
+    return EXIT_OK if failed == 0 else EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import time
+from LoxError import BudgetExceeded
+
+# the full set of limits is compared every CHECK_INTERVAL steps; reading the clock or comparing
+# every counter on each step would cost more than the step itself
+CHECK_INTERVAL = 64
+
+
+class ExecutionBudget:
+    # Limits are checked at loop back-edges and calls only; a step is one loop iteration or one call.
+    # Allocations are counted where they happen and compared at the next checkpoint.
+    def __init__(self, steps: int = None, seconds: float = None, depth: int = None, instances: int = None,
+                 environments: int = None, output_bytes: int = None) -> None:
+        self.max_steps = steps
+        self.max_seconds = seconds
+        self.max_depth = depth if depth is not None else float("inf")
+        self.max_instances = instances
+        self.max_environments = environments
+        self.max_output_bytes = output_bytes
+        self.start()
+
+    def start(self) -> None:
+        self.steps = 0
+        self.instances = 0
+        self.environments = 0
+        self.output_bytes = 0
+        self.started = time.monotonic()
+        self.deadline = self.started + self.max_seconds if self.max_seconds is not None else None
+        self.checkpoint = self.__next_checkpoint()
+
+    def __next_checkpoint(self) -> int:
+        checkpoint = self.steps + CHECK_INTERVAL
+        if self.max_steps is not None:
+            checkpoint = min(checkpoint, self.max_steps + 1)
+        return checkpoint
+
+    def step(self, interpreter) -> None:
+        self.steps += 1
+        if self.steps >= self.checkpoint:
+            self.check(interpreter)
+
+    def call(self, interpreter) -> None:
+        self.steps += 1
+        if self.steps >= self.checkpoint:
+            self.check(interpreter)
+        if len(interpreter.call_stack) >= self.max_depth:
+            self.__exceeded(interpreter, "depth", self.max_depth, len(interpreter.call_stack) + 1)
+
+    def check(self, interpreter) -> None:
+        if self.max_steps is not None and self.steps > self.max_steps:
+            self.__exceeded(interpreter, "steps", self.max_steps, self.steps)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.__exceeded(interpreter, "seconds", self.max_seconds, round(time.monotonic() - self.started, 3))
+        if self.max_instances is not None and self.instances > self.max_instances:
+            self.__exceeded(interpreter, "instances", self.max_instances, self.instances)
+        if self.max_environments is not None and self.environments > self.max_environments:
+            self.__exceeded(interpreter, "environments", self.max_environments, self.environments)
+        self.checkpoint = self.__next_checkpoint()
+
+    def output(self, interpreter, size: int) -> None:
+        self.output_bytes += size
+        if self.max_output_bytes is not None and self.output_bytes > self.max_output_bytes:
+            self.__exceeded(interpreter, "output_bytes", self.max_output_bytes, self.output_bytes)
+
+    def usage(self) -> dict:
+        return {"steps": self.steps, "seconds": round(time.monotonic() - self.started, 6),
+                "instances": self.instances, "environments": self.environments, "output_bytes": self.output_bytes}
+
+    @staticmethod
+    def __exceeded(interpreter, resource: str, limit: object, used: object) -> None:
+        raise BudgetExceeded(resource, limit, used, [str(frame) for frame in interpreter.call_stack])
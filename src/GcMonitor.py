@@ -0,0 +1,53 @@
+import gc
+import time
+
+
+class GcMonitor:
+    # Times every run of CPython's cycle collector while installed, through gc.callbacks. The collector
+    # stops the interpreter for the whole collection, so these pauses are the latency spikes a script sees.
+    def __init__(self) -> None:
+        self.collections = [0, 0, 0]
+        self.pauses = [0.0, 0.0, 0.0]
+        self.max_pause = 0.0
+        self.collected = 0
+        self.uncollectable = 0
+        self.started = None
+
+    def __callback(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self.started = time.perf_counter()
+            return
+        if self.started is None:
+            return
+        pause = time.perf_counter() - self.started
+        self.started = None
+        generation = info["generation"]
+        self.collections[generation] += 1
+        self.pauses[generation] += pause
+        self.max_pause = max(self.max_pause, pause)
+        self.collected += info["collected"]
+        self.uncollectable += info["uncollectable"]
+
+    def start(self) -> "GcMonitor":
+        gc.callbacks.append(self.__callback)
+        return self
+
+    def stop(self) -> None:
+        if self.__callback in gc.callbacks:
+            gc.callbacks.remove(self.__callback)
+
+    def __enter__(self) -> "GcMonitor":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> dict:
+        return {"collections": list(self.collections), "pause": round(sum(self.pauses), 6),
+                "max_pause": round(self.max_pause, 6), "collected": self.collected,
+                "uncollectable": self.uncollectable}
+
+    def __str__(self) -> str:
+        return (f"gc: {sum(self.collections)} collections ({'/'.join(map(str, self.collections))} by generation), "
+                f"pause {sum(self.pauses) * 1000:.1f} ms total, {self.max_pause * 1000:.2f} ms max, "
+                f"{self.collected} objects collected")
@@ -1,16 +1,103 @@
+import operator
+import sys
 import AST
-from Token import TokenType
-from Environment import Environment
-from LoxFunction import LoxFunction
+from Environment import Environment, FrameReleaser, Cell
+from LoxFunction import LoxFunction, Return, TailCall
 from LoxClass import LoxClass, LoxInstance
+from LoxError import StackOverflow
+from Analysis import Analysis
+from LoxString import LoxString, flat
+from Builtins import NativeFunction, MemoizedFunction, define_builtins
+
+DEFAULT_MAX_DEPTH = 10000
+# rough upper bound of Python frames one Lox call nests (call, execute_block, accept, visit_* ...)
+PYTHON_FRAMES_PER_CALL = 25
+# how often a running loop asks the loop JIT whether it is hot enough to compile
+JIT_CHECK_INTERVAL = 50
+CALLABLE_TYPES = (LoxFunction, LoxClass, NativeFunction, MemoizedFunction)
+# what binary_operation does for a number on the left
+ARITHMETIC = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv}
+ORDERINGS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def stringify(val: object) -> str:
+    if val is None:
+        return "nil"
+    if val is True:
+        return "true"
+    if val is False:
+        return "false"
+    if type(val) is float and val.is_integer():
+        return str(int(val))
+    return str(val)
+
+
+def binary_operation(operator: str, left: object, right: object) -> object:
+    match operator:
+        case "+":
+            if type(left) is LoxString or type(left) is str:
+                return LoxString.concat(left, right)
+            return left + right
+        case "-": return left - right
+        case "*": return left * right
+        case '/': return left / right
+        case ">": return left > right
+        case ">=": return left >= right
+        case "<": return left < right
+        case "<=": return left <= right
+        case "==": return is_equal(left, right)
+        case "!=": return not is_equal(left, right)
+        case "or": return left or right
+        case "and": return left and right
+        case _:
+            raise Exception(f"not support binary operator {operator}")
+
+
+def is_equal(left: object, right: object) -> bool:
+    left, right = flat(left), flat(right)
+    # Python would call True == 1, Lox keeps booleans apart from numbers
+    if (type(left) is bool) != (type(right) is bool):
+        return False
+    return left == right
 
 
 class Interpreter(AST.VisitorExpr):
-    def __init__(self):
+    def __init__(self, max_depth: int = DEFAULT_MAX_DEPTH, tail_calls: bool = True, budget: "ExecutionBudget" = None,
+                 jit: bool = False, release_frames: bool = True, program=None):
         self.global_env = Environment()
+        self.globals = self.global_env
+        define_builtins(self.globals)
         self.locals = {}
+        self.analysis = Analysis()
+        # set when the resolution is a shared Program's, which is never resolved into
+        self.program = None
+        self.call_stack = []
+        self.call_sites = {}
+        # where print writes, None for sys.stdout; interpreters sharing a process can each have their own
+        self.output = None
+        self.max_depth = max_depth
+        self.tail_calls = tail_calls
+        self.budget = budget
+        self.jit = None
+        if jit:
+            # the loop compiler is imported only by the runs that use it, it is slow to load
+            from LoopJit import LoopJit
+            self.jit = LoopJit()
+        self.releaser = FrameReleaser() if release_frames else None
+        python_limit = max_depth * PYTHON_FRAMES_PER_CALL + 1000
+        if sys.getrecursionlimit() < python_limit:
+            sys.setrecursionlimit(python_limit)
+        if program is not None:
+            program.load(self)
+
+    def define_native(self, name: str, arity: int, function, async_function=None) -> NativeFunction:
+        native = NativeFunction(name, arity, function, async_function)
+        self.globals.declare_variable(name, native)
+        return native
 
     def interpreter(self, ast_list: list[AST]):
+        if self.budget is not None:
+            self.budget.start()
         for ast in ast_list:
             self.__evaluate(ast)
 
@@ -22,10 +109,13 @@ class Interpreter(AST.VisitorExpr):
         if class_dec.superclass:
             superclass = self.__evaluate(class_dec.superclass)
             assert isinstance(superclass, LoxClass), "Superclass must be a class."
-        self.global_env.declare_variable(class_dec.name, None)
+        cell = Cell(None) if class_dec in self.analysis.cells else None
+        self.global_env.declare_variable(class_dec.name, cell)
 
         if class_dec.superclass:
             self.global_env = Environment(self.global_env)
+            if self.budget is not None:
+                self.budget.environments += 1
             self.global_env.declare_variable('super', superclass)
 
         methods = {}
@@ -35,9 +125,30 @@ class Interpreter(AST.VisitorExpr):
         new_class = LoxClass(class_dec.name, superclass, methods)
         if superclass:
             self.global_env = self.global_env.parent
-        self.global_env.assign_variable(class_dec.name, new_class)
+        if cell:
+            cell.value = new_class
+        else:
+            self.global_env.declare_variable(class_dec.name, new_class)
 
     def visit_block(self, block: AST.Block) -> None:
+        if block in self.analysis.frameless:
+            for stmt in block.stmts:
+                self.__evaluate(stmt)
+            return
+        if self.budget is not None:
+            self.budget.environments += 1
+        releaser = self.releaser
+        if releaser is not None and block in self.analysis.confined:
+            env = Environment(self.global_env)
+            try:
+                self.execute_block(block, env)
+            except Return as ret:
+                # a tail call may be about to run a function declared in this block, it still needs the cells
+                if type(ret.val) is not TailCall:
+                    releaser.release(env)
+                raise
+            releaser.release(env)
+            return
         self.execute_block(block, Environment(self.global_env))
 
     def execute_block(self, block: AST.Block, env: Environment):
@@ -50,14 +161,40 @@ class Interpreter(AST.VisitorExpr):
             self.global_env = global_env
 
     def visit_for(self, for_stmt: AST.ForStmt):
+        budget = self.budget
+        jit = self.jit
         self.__evaluate(for_stmt.initialization)
+        if jit is not None and jit.enter(self, for_stmt, 0):
+            return
+        iterations = 0
         while self.__evaluate(for_stmt.condition):
             self.__evaluate(for_stmt.body)
             self.__evaluate(for_stmt.increment)
+            if budget is not None:
+                budget.step(self)
+            if jit is not None:
+                iterations += 1
+                if iterations == JIT_CHECK_INTERVAL:
+                    if jit.enter(self, for_stmt, iterations):
+                        return
+                    iterations = 0
 
     def visit_while(self, while_stmt: AST.WhileStmt) -> None:
+        budget = self.budget
+        jit = self.jit
+        if jit is not None and jit.enter(self, while_stmt, 0):
+            return
+        iterations = 0
         while self.__evaluate(while_stmt.condition):
             self.__evaluate(while_stmt.body)
+            if budget is not None:
+                budget.step(self)
+            if jit is not None:
+                iterations += 1
+                if iterations == JIT_CHECK_INTERVAL:
+                    if jit.enter(self, while_stmt, iterations):
+                        return
+                    iterations = 0
 
     def visit_if(self, ifStmt: AST.IfStmt) -> None:
         if self.__evaluate(ifStmt.condition):
@@ -67,70 +204,136 @@ class Interpreter(AST.VisitorExpr):
                 self.__evaluate(ifStmt.else_block)
 
     def visit_print(self, print_stmt: AST.PrintStmt) -> None:
-        val = self.__evaluate(print_stmt.val)
-        print(val)
+        self.write(stringify(self.__evaluate(print_stmt.val)))
+
+    def write(self, text: str) -> None:
+        if self.budget is not None:
+            self.budget.output(self, len(text.encode()) + 1)
+        print(text, file=self.output)
 
     def visit_func(self, func_decl: AST.FuncDecl) -> None:
-        func = LoxFunction(func_decl, self.global_env, False)
-        self.global_env.declare_variable(func_decl.name, func)
+        cell = None
+        if func_decl in self.analysis.cells:
+            cell = Cell(None)
+            self.global_env.declare_variable(func_decl.name, cell)
+        func = LoxFunction(func_decl, self.__closure(func_decl), False)
+        if cell:
+            cell.value = func
+        else:
+            self.global_env.declare_variable(func_decl.name, func)
+
+    def __closure(self, func_decl: AST.FuncDecl) -> Environment:
+        # a function closes over the cells it uses, not over the whole chain of enclosing environments
+        captures = self.analysis.captures.get(func_decl)
+        if not captures:
+            return self.globals
+        closure = Environment(self.globals)
+        if self.budget is not None:
+            self.budget.environments += 1
+        env = self.global_env
+        for name, distance in captures:
+            closure.variables[name] = env.ancestor(distance).variables[name]
+        return closure
 
     def visit_var_decl(self, var: AST.VarDecl) -> None:
         val = None
         if var.val:
             val = self.__evaluate(var.val)
+        if var in self.analysis.cells:
+            val = Cell(val)
         self.global_env.declare_variable(var.name, val)
 
     def visit_assign(self, assign: AST.Assign) -> object:
         val = self.__evaluate(assign.val)
         distance = self.locals.get(assign)
-        if distance:
+        if distance is not None:
             self.global_env.assignAt(distance, assign.name, val)
         else:
-            self.global_env.assign_variable(assign.name, val)
+            self.globals.assign_variable(assign.name, val)
         return val
 
     def visit_binary(self, binary: AST.Binary):
-        left = self.__evaluate(binary.left)
-        right = self.__evaluate(binary.right)
-        match binary.operator:
-            case "+": return left + right
-            case "-": return left - right
-            case "*": return left * right
-            case '/': return left / right
-            case ">": return left > right
-            case ">=": return left >= right
-            case "<": return left < right
-            case "<=": return left <= right
-            case "or": return left or right
-            case "and": return left and right
-            case _:
-                raise f"not support binary operator {binary.operator}"
+        return binary_operation(binary.operator, self.__evaluate(binary.left), self.__evaluate(binary.right))
 
     def visit_unary(self, unary: AST.Unary) -> object:
         if unary.operator == "!":
             return not self.__evaluate(unary.right)
         elif unary.operator == "-":
-            return -1 * self.__evaluate(unary.right)
+            return -self.__evaluate(unary.right)
         else:
             print("Here")
             raise Exception("only support '-' and '!' in the unary operation")
 
     def visit_call(self, call_expr: AST.Call) -> object:
         callee = self.__evaluate(call_expr.name)
+        try:
+            if type(callee) is LoxFunction:
+                return callee.run(self, self.__frame(call_expr, callee))
+            if type(callee) is LoxClass and callee.initializer:
+                instance = callee.new_instance(self)
+                initializer = callee.initializer.bind(instance, self.budget)
+                initializer.run(self, self.__frame(call_expr, initializer))
+                return instance
+            # checked before the attribute lookup, so calling a non-callable fails with the Lox message
+            arg_list = self.__arguments(call_expr, callee)
+            return callee.call(self, arg_list)
+        except RecursionError:
+            raise StackOverflow(self.max_depth, [str(frame) for frame in self.call_stack]) from None
+
+    def __frame(self, call_expr: AST.Call, function: LoxFunction) -> Environment:
+        # arguments are evaluated straight into the callee's environment, no intermediate list
+        site = self.call_sites.get(call_expr)
+        if site is None or site[0] is not function.func:
+            site = self.__link(call_expr, function)
+        func, frameless, cell_params = site
+        if frameless:
+            return function.closure
+        func_env = Environment(function.closure)
+        if self.budget is not None:
+            self.budget.environments += 1
+        variables = func_env.variables
+        arg_list = call_expr.arg_list
+        if len(arg_list) == 1:
+            variables[func.arg_list[0]] = self.__evaluate(arg_list[0])
+        elif arg_list:
+            for name, arg in zip(func.arg_list, arg_list):
+                variables[name] = self.__evaluate(arg)
+        if cell_params:
+            for name in cell_params:
+                variables[name] = Cell(variables[name])
+        return func_env
+
+    def __link(self, call_expr: AST.Call, function: LoxFunction) -> tuple:
+        # arity only has to be checked again when a call site starts calling a different declaration
+        func = function.func
+        assert len(call_expr.arg_list) <= 255, "The maximum arguments are 255"
+        assert len(call_expr.arg_list) == len(func.arg_list), \
+            f"function has {len(func.arg_list)} arguments, but give {len(call_expr.arg_list)}"
+        site = (func, func in self.analysis.frameless, self.analysis.cell_params.get(func))
+        self.call_sites[call_expr] = site
+        return site
+
+    def __arguments(self, call_expr: AST.Call, callee: object) -> list[object]:
         assert len(call_expr.arg_list) <= 255, "The maximum arguments are 255"
         arg_list = self.__evaluate_arguments(call_expr.arg_list)
-        assert isinstance(callee, (LoxFunction, LoxClass)), "Can only call functions and class"
+        assert isinstance(callee, CALLABLE_TYPES), "Can only call functions and class"
         assert len(arg_list) == callee.arity(), f"function has {callee.arity()} arguments, but give {len(arg_list)}"
-        return callee.call(self, arg_list)
+        return arg_list
 
     def visit_return(self, return_stmt: AST.ReturnStmt) -> None:
-        val = self.__evaluate(return_stmt.expr)
-        raise Exception(val)
+        expr = return_stmt.expr
+        if self.tail_calls and type(expr) is AST.Call:
+            callee = self.__evaluate(expr.name)
+            if type(callee) is LoxFunction:
+                raise Return(TailCall(callee, self.__frame(expr, callee)))
+            raise Return(TailCall(callee, self.__arguments(expr, callee)))
+        val = self.__evaluate(expr) if expr else None
+        raise Return(val)
 
     def visit_get(self, obj: AST.Get) -> object:
         lox_obj = self.__evaluate(obj.obj)
         if isinstance(lox_obj, LoxInstance):
-            return lox_obj.get(obj.name)
+            return lox_obj.get(obj.name, self.budget)
         raise Exception("Only LoxInstance has properties")
 
     def visit_set(self, expr: AST.Set) -> object:
@@ -145,15 +348,15 @@ class Interpreter(AST.VisitorExpr):
         return self.__look_up_variable(this.keyword, this)
 
     def visit_super(self, lox_super: AST.Super) -> object:
-        distance = self.locals[lox_super.keyword]
-        superclass = self.global_env.getAt(distance-1, 'super')
+        distance = self.locals[lox_super]
+        superclass = self.global_env.getAt(distance, 'super')
         assert isinstance(superclass, LoxClass), "Super can only be used in a class"
-        obj = self.global_env.getAt(distance-2, 'this')
-        method = superclass.find_method(lox_super.method)
+        obj = self.global_env.getAt(distance - 1, 'this')
+        method = superclass.method_table.get(lox_super.method)
 
         if not method:
             raise Exception(f"Undefined property: {lox_super.method}.")
-        return method.bind(obj)
+        return method.bind(obj, self.budget)
 
     def __evaluate_arguments(self, arg_list: list[AST.Expr]) -> list[object]:
         evaluated_arg_list = []
@@ -163,29 +366,72 @@ class Interpreter(AST.VisitorExpr):
         return evaluated_arg_list
 
     def visit_primary(self, primary: AST.Primary) -> object:
-        match primary.literal.type:
-            case TokenType.STRING:
-                return primary.literal.val
-            case TokenType.NUMBER:
-                return primary.literal.val
-            case TokenType.FALSE:
-                return False
-            case TokenType.TRUE:
-                return True
-            case TokenType.IDENTIFIER:
-                return self.global_env.get_variable(str(primary.literal.val))
-            case _:
-                raise Exception(f"Do not support the primary datastructure {primary.literal.val}")
+        return primary.value
 
     def visit_variable(self, var: AST.Variable):
-        return self.__look_up_variable(str(var.name.val), var)
+        return self.__look_up_variable(var.name, var)
 
     def __look_up_variable(self, name: str, expr: AST.Expr) -> object:
         distance = self.locals.get(expr)
-        if distance:
+        if distance is not None:
             return self.global_env.getAt(distance, name)
         else:
-            return self.global_env.get_variable(name)
+            return self.globals.get_variable(name)
+
+    # superinstructions from the Optimizer; each does what the subtree it replaced does, in the same order
+
+    def visit_update_variable(self, update: AST.UpdateVariable) -> object:
+        name, distance = update.name, update.distance
+        if distance is None:
+            variables = self.globals.variables
+            if name not in variables:
+                raise Exception(f"Variable {name} not in the environment")
+        else:
+            variables = (self.global_env if distance == 0 else self.global_env.ancestor(distance)).variables
+        val = variables[name]
+        cell = val if type(val) is Cell else None
+        if cell is not None:
+            val = cell.value
+        if type(val) is int or type(val) is float:
+            val = ARITHMETIC[update.operator](val, update.operand)
+        else:
+            val = binary_operation(update.operator, val, update.operand)
+        if cell is not None:
+            cell.value = val
+        else:
+            variables[name] = val
+        return val
+
+    def visit_update_field(self, update: AST.UpdateField) -> object:
+        obj = self.__read(update.obj, update.distance)
+        if not isinstance(obj, LoxInstance):
+            raise Exception("Only instances have fields.")
+        val = obj.get(update.name, self.budget)
+        operand = self.__evaluate(update.operand)
+        if type(val) is int or type(val) is float:
+            val = ARITHMETIC[update.operator](val, operand)
+        else:
+            val = binary_operation(update.operator, val, operand)
+        obj.fields[update.name] = val
+        return val
+
+    def visit_compare_constant(self, compare: AST.CompareConstant) -> bool:
+        val = self.__read(compare.name, compare.distance)
+        ordering = ORDERINGS.get(compare.operator)
+        if ordering is not None:
+            return ordering(val, compare.constant)
+        # the constant is a number; a number on the left compares directly, anything else goes through is_equal
+        equal = val == compare.constant if type(val) is int or type(val) is float else is_equal(val, compare.constant)
+        return equal if compare.operator == "==" else not equal
+
+    def visit_print_variable(self, print_var: AST.PrintVariable) -> None:
+        self.write(stringify(self.__read(print_var.name, print_var.distance)))
+
+    def __read(self, name: str, distance: int | None) -> object:
+        if distance is None:
+            return self.globals.get_variable(name)
+        val = (self.global_env if distance == 0 else self.global_env.ancestor(distance)).variables[name]
+        return val.value if type(val) is Cell else val
 
     def resolve(self, expr: AST.Expr, distance: int):
         self.locals[expr] = distance
@@ -0,0 +1,436 @@
+"""A loop compiler for the tree-walking interpreter (enabled with --jit).
+
+This is not a tracing JIT: it records no traces and never deoptimises mid-loop. Once a for or while loop
+has run JIT_THRESHOLD iterations in the interpreter, LoopCompiler turns the whole loop (condition, body,
+increment and nested loops) into one specialised Python function. Types are inferred flow-insensitively:
+each variable gets a single type that covers its value on entry and everything the loop assigns to it.
+Because supported loops cannot call out, nothing but the loop itself can change those variables, so the
+guards on the values the loop reads from outside run only once, when the loop is entered. If they pass,
+the compiled function runs the loop to completion. If they fail, the loop is recompiled for the wider
+types, at most MAX_RECOMPILES times, and is then left to the interpreter.
+
+stats() counts loops compiled, compiled runs that finished their loop ("entered"), entry guards that
+failed ("guard_failures") and loops the compiler does not support ("rejected").
+"""
+import AST
+from Environment import Cell
+
+# iterations the tree-walker runs before a loop is compiled
+JIT_THRESHOLD = 200
+# a loop whose guards keep failing is respecialised this many times before it is left to the interpreter
+MAX_RECOMPILES = 2
+
+# loops that only shuffle values between variables; calls, fields and closures could run code the
+# compiled loop knows nothing about
+SUPPORTED_NODES = frozenset((AST.Block, AST.VarDecl, AST.IfStmt, AST.WhileStmt, AST.ForStmt, AST.PrintStmt,
+                             AST.Assign, AST.Binary, AST.Unary, AST.Primary, AST.Variable))
+NUMERIC = frozenset(("int", "float", "num"))
+INLINE_OPERATORS = frozenset(("-", "*", "/", "<", "<=", ">", ">="))
+
+
+def type_of(value: object) -> str:
+    if type(value) is int:
+        return "int"
+    if type(value) is float:
+        return "float"
+    if type(value) is bool:
+        return "bool"
+    if value is None:
+        return "nil"
+    return "any"
+
+
+def join(left: str | None, right: str | None) -> str | None:
+    if left is None or left == right:
+        return right
+    if right is None:
+        return left
+    if left in NUMERIC and right in NUMERIC:
+        return "num"
+    return "any"
+
+
+def guard_fails(code: str, type_name: str) -> str:
+    match type_name:
+        case "int": return f"type({code}) is not int"
+        case "float": return f"type({code}) is not float"
+        case "num": return f"(type({code}) is not int and type({code}) is not float)"
+        case "bool": return f"type({code}) is not bool"
+        case "nil": return f"{code} is not None"
+        case _: return f"type({code}) is Cell"
+
+
+def store(variables: dict, name: str, value: object) -> object:
+    variables[name] = value
+    return value
+
+
+# Lox evaluates both operands of 'and'/'or', so they cannot become Python's short-circuiting operators
+def lox_and(left: object, right: object) -> object:
+    return left and right
+
+
+def lox_or(left: object, right: object) -> object:
+    return left or right
+
+
+class CompiledLoop:
+    def __init__(self, loop: AST.Stmt, function, profile: dict, generation: int, source: str) -> None:
+        self.loop = loop
+        self.function = function
+        self.profile = profile
+        self.generation = generation
+        self.source = source
+
+    def run(self, interpreter) -> bool:
+        return self.function(interpreter, interpreter.budget)
+
+
+class LoopJit:
+    def __init__(self, threshold: int = JIT_THRESHOLD) -> None:
+        self.threshold = threshold
+        self.loops = {}
+        self.heat = {}
+        self.compiled = 0
+        self.entered = 0
+        self.guard_failures = 0
+        self.rejected = 0
+
+    def enter(self, interpreter, loop: AST.Stmt, iterations: int) -> bool:
+        # runs the rest of the loop as compiled code; False leaves it to the interpreter
+        if loop in self.loops:
+            compiled = self.loops[loop]
+        else:
+            heat = self.heat.get(loop, 0) + iterations
+            if heat < self.threshold:
+                self.heat[loop] = heat
+                return False
+            self.heat.pop(loop, None)
+            compiled = self.loops[loop] = self.__compile(interpreter, loop, {}, 0)
+        while compiled is not None:
+            if compiled.run(interpreter):
+                self.entered += 1
+                return True
+            # an entry guard failed: respecialise for the values seen now, unless the loop keeps changing its mind
+            self.guard_failures += 1
+            if compiled.generation >= MAX_RECOMPILES:
+                return False
+            compiled = self.loops[loop] = self.__compile(interpreter, loop, compiled.profile, compiled.generation + 1)
+        return False
+
+    def stats(self) -> dict:
+        return {"compiled": self.compiled, "entered": self.entered, "guard_failures": self.guard_failures,
+                "rejected": self.rejected}
+
+    def __compile(self, interpreter, loop: AST.Stmt, profile: dict, generation: int) -> CompiledLoop | None:
+        compiler = LoopCompiler(interpreter, loop, profile)
+        if not compiler.compilable():
+            self.rejected += 1
+            return None
+        source = compiler.generate()
+        namespace = compiler.namespace()
+        exec(compile(source, "<lox loop>", "exec"), namespace)
+        self.compiled += 1
+        return CompiledLoop(loop, namespace["compiled_loop"], compiler.profile, generation, source)
+
+
+class LoopCompiler:
+    def __init__(self, interpreter, loop: AST.Stmt, profile: dict) -> None:
+        self.interpreter = interpreter
+        self.analysis = interpreter.analysis
+        self.loop = loop
+        self.profile = dict(profile)
+        self.region_frames = set()
+        self.homes = {}
+        self.local_names = {}
+        self.outside = set()
+        self.var_types = {}
+        self.constants = []
+        self.lines = []
+
+    def compilable(self) -> bool:
+        loop = self.loop
+        # the outermost loop's initializer already ran in the interpreter, outside the compiled region
+        parts = [loop.condition, loop.body] + ([loop.increment] if type(loop) is AST.ForStmt else [])
+        if not all(self.__scan(part, None, 0) for part in parts):
+            return False
+        # specialise on the values the loop sees right now, widened by whatever earlier compilations assumed
+        env = self.interpreter.global_env
+        for key in self.outside:
+            if key[0] == "g":
+                variables = self.interpreter.globals.variables
+            else:
+                variables = env.ancestor(key[1]).variables
+            if key[2] not in variables or type(variables[key[2]]) is Cell:
+                return False
+            self.profile[key] = join(self.profile.get(key), type_of(variables[key[2]]))
+        self.__infer()
+        return True
+
+    def __scan(self, node, frame, depth: int) -> bool:
+        # frame is the innermost block of the region, depth the environments the interpreter would have
+        # pushed for it since the loop statement started; fused nodes compile as the code they replaced
+        node = AST.unfused(node)
+        node_type = type(node)
+        if node_type not in SUPPORTED_NODES:
+            return False
+        if node_type is AST.Block:
+            frame = self.analysis.layout_of(node)
+            if frame is None:
+                return False
+            self.region_frames.add(frame)
+            inner = depth + 1 if frame.needs_environment else depth
+            return all(self.__scan(stmt, frame, inner) for stmt in node.stmts)
+        if node_type is AST.VarDecl:
+            self.homes[node] = self.__local(frame, node.name)
+            return node.val is None or self.__scan(node.val, frame, depth)
+        if node_type is AST.Variable or node_type is AST.Assign:
+            home = self.__home(node, depth)
+            if home is None:
+                return False
+            self.homes[node] = home
+            return node_type is AST.Variable or self.__scan(node.val, frame, depth)
+        if node_type is AST.IfStmt:
+            return (self.__scan(node.condition, frame, depth) and self.__scan(node.if_block, frame, depth)
+                    and (node.else_block is None or self.__scan(node.else_block, frame, depth)))
+        if node_type is AST.WhileStmt:
+            return self.__scan(node.condition, frame, depth) and self.__scan(node.body, frame, depth)
+        if node_type is AST.ForStmt:
+            # the loop variable lives in the Block the parser wraps every for statement in
+            return all(self.__scan(part, frame, depth) for part in
+                       (node.initialization, node.condition, node.increment, node.body))
+        if node_type is AST.PrintStmt:
+            return self.__scan(node.val, frame, depth)
+        if node_type is AST.Binary:
+            return self.__scan(node.left, frame, depth) and self.__scan(node.right, frame, depth)
+        if node_type is AST.Unary:
+            return self.__scan(node.right, frame, depth)
+        return True
+
+    def __local(self, frame, name: str) -> tuple:
+        key = ("l", id(frame), name)
+        if key not in self.local_names:
+            self.local_names[key] = f"v{len(self.local_names)}"
+        return key
+
+    def __home(self, node: AST.Expr, depth: int) -> tuple | None:
+        distance = self.interpreter.locals.get(node)
+        if distance is None:
+            key = ("g", 0, node.name)
+            self.outside.add(key)
+            return key
+        binding = self.analysis.binding_of(node)
+        if binding is None:
+            return None
+        if binding[0] in self.region_frames:
+            return self.__local(binding[0], node.name)
+        # an environment outside the loop, counted from the one the loop statement runs in
+        key = ("e", distance - depth, node.name)
+        self.outside.add(key)
+        return key
+
+    def __infer(self) -> None:
+        # flow-insensitive: every variable gets one type covering its entry value and all assignments
+        self.var_types = dict(self.profile)
+        loop = self.loop
+        while True:
+            before = dict(self.var_types)
+            self.__infer_expr(loop.condition)
+            self.__infer_stmt(loop.body)
+            if type(loop) is AST.ForStmt:
+                self.__infer_expr(loop.increment)
+            if before == self.var_types:
+                return
+
+    def __assign_type(self, key: tuple, type_name: str) -> None:
+        self.var_types[key] = join(self.var_types.get(key), type_name)
+
+    def __infer_stmt(self, node) -> None:
+        node = AST.unfused(node)
+        node_type = type(node)
+        if node_type is AST.Block:
+            for stmt in node.stmts:
+                self.__infer_stmt(stmt)
+        elif node_type is AST.VarDecl:
+            self.__assign_type(self.homes[node], self.__infer_expr(node.val) if node.val else "nil")
+        elif node_type is AST.IfStmt:
+            self.__infer_expr(node.condition)
+            self.__infer_stmt(node.if_block)
+            if node.else_block:
+                self.__infer_stmt(node.else_block)
+        elif node_type is AST.WhileStmt:
+            self.__infer_expr(node.condition)
+            self.__infer_stmt(node.body)
+        elif node_type is AST.ForStmt:
+            self.__infer_stmt(node.initialization)
+            self.__infer_expr(node.condition)
+            self.__infer_expr(node.increment)
+            self.__infer_stmt(node.body)
+        elif node_type is AST.PrintStmt:
+            self.__infer_expr(node.val)
+        else:
+            self.__infer_expr(node)
+
+    def __infer_expr(self, expr) -> str:
+        expr = AST.unfused(expr)
+        expr_type = type(expr)
+        if expr_type is AST.Primary:
+            return type_of(expr.value)
+        if expr_type is AST.Variable:
+            return self.var_types.get(self.homes[expr]) or "any"
+        if expr_type is AST.Assign:
+            value_type = self.__infer_expr(expr.val)
+            self.__assign_type(self.homes[expr], value_type)
+            return value_type
+        if expr_type is AST.Unary:
+            right = self.__infer_expr(expr.right)
+            if expr.operator == "!":
+                return "bool"
+            return right if right in NUMERIC else "any"
+        left = self.__infer_expr(expr.left)
+        right = self.__infer_expr(expr.right)
+        return self.__binary_type(expr.operator, left, right)
+
+    @staticmethod
+    def __binary_type(operator: str, left: str, right: str) -> str:
+        numeric = left in NUMERIC and right in NUMERIC
+        match operator:
+            case "+" | "-" | "*":
+                if not numeric:
+                    return "any"
+                if left == "int" and right == "int":
+                    return "int"
+                return "float" if left == "float" or right == "float" else "num"
+            case "/":
+                return "float" if numeric else "any"
+            case "<" | "<=" | ">" | ">=":
+                return "bool" if numeric else "any"
+            case "==" | "!=":
+                return "bool"
+            case _:
+                return join(left, right)
+
+    def namespace(self) -> dict:
+        from Interpreter import binary_operation, is_equal, stringify
+        namespace = {"Cell": Cell, "store": store, "lox_and": lox_and, "lox_or": lox_or,
+                     "binary_operation": binary_operation, "is_equal": is_equal, "stringify": stringify}
+        for index, value in enumerate(self.constants):
+            namespace[f"k{index}"] = value
+        return namespace
+
+    def generate(self) -> str:
+        emit = self.lines.append
+        emit("def compiled_loop(interp, budget):")
+        emit("    env = interp.global_env")
+        emit("    g = interp.globals.variables")
+        for distance in sorted({key[1] for key in self.outside if key[0] == "e"}):
+            emit(f"    e{distance} = env.ancestor({distance}).variables")
+        checks = []
+        for key in sorted(self.outside):
+            if key[0] == "g":
+                checks.append(f"{key[2]!r} not in g")
+            checks.append(guard_fails(self.__read(key), self.var_types[key]))
+        if checks:
+            emit(f"    if {' or '.join(checks)}:")
+            emit("        return False")
+        self.__loop(self.loop, 1, True)
+        emit("    return True")
+        return "\n".join(self.lines) + "\n"
+
+    def __emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def __loop(self, loop, indent: int, entry: bool) -> None:
+        # the outermost loop is entered after its initializer already ran, or mid-way at a back-edge
+        if type(loop) is AST.ForStmt and not entry:
+            self.__stmt(loop.initialization, indent)
+        self.__emit(indent, f"while {self.__expr(loop.condition)[0]}:")
+        self.__block(loop.body, indent + 1)
+        if type(loop) is AST.ForStmt:
+            self.__stmt(loop.increment, indent + 1)
+        self.__emit(indent + 1, "if budget is not None:")
+        self.__emit(indent + 2, "budget.step(interp)")
+
+    def __block(self, block: AST.Block, indent: int) -> None:
+        if not block.stmts:
+            self.__emit(indent, "pass")
+        for stmt in block.stmts:
+            self.__stmt(stmt, indent)
+
+    def __stmt(self, node, indent: int) -> None:
+        node = AST.unfused(node)
+        node_type = type(node)
+        if node_type is AST.Block:
+            self.__block(node, indent)
+        elif node_type is AST.VarDecl:
+            value = self.__expr(node.val)[0] if node.val else "None"
+            self.__emit(indent, f"{self.local_names[self.homes[node]]} = {value}")
+        elif node_type is AST.Assign:
+            self.__emit(indent, f"{self.__read(self.homes[node])} = {self.__expr(node.val)[0]}")
+        elif node_type is AST.IfStmt:
+            self.__emit(indent, f"if {self.__expr(node.condition)[0]}:")
+            self.__block(node.if_block, indent + 1)
+            if node.else_block:
+                self.__emit(indent, "else:")
+                self.__block(node.else_block, indent + 1)
+        elif node_type is AST.WhileStmt or node_type is AST.ForStmt:
+            self.__loop(node, indent, False)
+        elif node_type is AST.PrintStmt:
+            self.__emit(indent, f"interp.write(stringify({self.__expr(node.val)[0]}))")
+        else:
+            self.__emit(indent, self.__expr(node)[0])
+
+    def __read(self, key: tuple) -> str:
+        if key[0] == "l":
+            return self.local_names[key]
+        if key[0] == "g":
+            return f"g[{key[2]!r}]"
+        return f"e{key[1]}[{key[2]!r}]"
+
+    def __expr(self, expr) -> tuple[str, str]:
+        expr = AST.unfused(expr)
+        expr_type = type(expr)
+        if expr_type is AST.Primary:
+            value = expr.value
+            if value is None or type(value) is bool or type(value) is int:
+                return repr(value), type_of(value)
+            self.constants.append(value)
+            return f"k{len(self.constants) - 1}", type_of(value)
+        if expr_type is AST.Variable:
+            key = self.homes[expr]
+            return self.__read(key), self.var_types.get(key) or "any"
+        if expr_type is AST.Assign:
+            key = self.homes[expr]
+            value, value_type = self.__expr(expr.val)
+            if key[0] == "l":
+                return f"({self.local_names[key]} := {value})", value_type
+            variables = "g" if key[0] == "g" else f"e{key[1]}"
+            return f"store({variables}, {key[2]!r}, {value})", value_type
+        if expr_type is AST.Unary:
+            right, right_type = self.__expr(expr.right)
+            if expr.operator == "!":
+                return f"(not {right})", "bool"
+            return f"(-{right})", right_type if right_type in NUMERIC else "any"
+        left, left_type = self.__expr(expr.left)
+        right, right_type = self.__expr(expr.right)
+        operator = expr.operator
+        result_type = self.__binary_type(operator, left_type, right_type)
+        if operator in INLINE_OPERATORS:
+            return f"({left} {operator} {right})", result_type
+        if operator == "+":
+            if left_type in NUMERIC and right_type in NUMERIC:
+                return f"({left} + {right})", result_type
+            return f"binary_operation('+', {left}, {right})", result_type
+        if operator == "==" or operator == "!=":
+            # Lox keeps booleans apart from numbers, Python's == does not
+            mixes = ((left_type in ("bool", "any") and (right_type in NUMERIC or right_type == "any"))
+                     or (right_type in ("bool", "any") and (left_type in NUMERIC or left_type == "any")))
+            if not mixes:
+                return f"({left} {operator} {right})", result_type
+            negate = "not " if operator == "!=" else ""
+            return f"({negate}is_equal({left}, {right}))", result_type
+        if operator == "and":
+            return f"lox_and({left}, {right})", result_type
+        if operator == "or":
+            return f"lox_or({left}, {right})", result_type
+        return f"binary_operation({operator!r}, {left}, {right})", result_type
@@ -6,27 +6,30 @@ class LoxClass:
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        # classes are closed once declared, so inherited methods are copied in and lookups never walk the chain
+        self.method_table = dict(superclass.method_table) if superclass else {}
+        self.method_table.update(methods)
+        self.initializer = self.method_table.get("init")
+        self.init_arity = self.initializer.arity() if self.initializer else 0
 
     def call(self, interpreter, arguments: list[object]) -> object:
-        instance = LoxInstance(self)
+        instance = self.new_instance(interpreter)
 
-        initializer = self.find_method("init")
-        if initializer:
-            initializer.bind(instance).call(interpreter, arguments)
+        if self.initializer:
+            self.initializer.bind(instance, interpreter.budget).call(interpreter, arguments)
 
         return instance
 
+    def new_instance(self, interpreter) -> "LoxInstance":
+        if interpreter.budget is not None:
+            interpreter.budget.instances += 1
+        return LoxInstance(self)
+
     def find_method(self, name: str) -> LoxFunction:
-        if name in self.methods:
-            return self.methods[name]
-        if self.superclass:
-            return self.superclass.find_method(name)
+        return self.method_table.get(name)
 
     def arity(self) -> int:
-        initializer = self.find_method("init")
-        if initializer:
-            return initializer.arity()
-        return 0
+        return self.init_arity
 
     def __str__(self) -> str:
         return self.name
@@ -37,13 +40,13 @@ class LoxInstance:
         self.lox_class = lox_class
         self.fields = {}
 
-    def get(self, name: str) -> object:
+    def get(self, name: str, budget=None) -> object:
         if name in self.fields:
             return self.fields[name]
 
-        method = self.lox_class.find_method(name)
+        method = self.lox_class.method_table.get(name)
         if method:
-            return method.bind(self)
+            return method.bind(self, budget)
 
         raise Exception(f"undefined property {name}.")
 
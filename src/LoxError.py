@@ -0,0 +1,29 @@
+class LoxRuntimeError(Exception):
+    def __init__(self, message: str, trace: list[str] = None) -> None:
+        super().__init__(message)
+        self.message = message
+        self.trace = trace or []
+
+    def __str__(self) -> str:
+        if not self.trace:
+            return self.message
+        return self.message + "".join(f"\n  in {frame}" for frame in reversed(self.trace))
+
+
+class StackOverflow(LoxRuntimeError):
+    def __init__(self, max_depth: int, trace: list[str]) -> None:
+        # the innermost frames are the interesting ones; a full trace of a runaway recursion is noise
+        super().__init__(f"Stack overflow: call depth exceeded {max_depth}.", trace[-10:])
+        self.max_depth = max_depth
+
+
+class BudgetExceeded(LoxRuntimeError):
+    def __init__(self, resource: str, limit: object, used: object, trace: list[str]) -> None:
+        super().__init__(f"Execution budget exceeded: {resource} limit is {limit}, used {used}.", trace[-10:])
+        self.resource = resource
+        self.limit = limit
+        self.used = used
+
+    def to_dict(self) -> dict:
+        return {"resource": self.resource, "limit": self.limit, "used": self.used, "message": self.message,
+                "trace": self.trace}
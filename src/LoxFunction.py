@@ -1,5 +1,21 @@
 import AST
-from Environment import Environment
+from Environment import Environment, Cell
+from LoxError import StackOverflow
+
+
+class Return(Exception):
+    def __init__(self, val: object) -> None:
+        super().__init__(val)
+        self.val = val
+
+
+class TailCall:
+    # for a LoxFunction callee `arguments` is its prepared environment, for any other callable the argument list
+    __slots__ = ("callee", "arguments")
+
+    def __init__(self, callee, arguments: Environment | list[object]) -> None:
+        self.callee = callee
+        self.arguments = arguments
 
 
 class LoxFunction:
@@ -8,27 +24,73 @@ class LoxFunction:
         self.closure = closure
         self.is_initializer = is_initializer
 
-    def bind(self, lox_instance):
+    def bind(self, lox_instance, budget=None):
+        # the environment holding `this` is charged like any other, a method call allocates it on every access
         env = Environment(self.closure)
+        if budget is not None:
+            budget.environments += 1
         env.declare_variable("this", lox_instance)
         return LoxFunction(self.func, env, self.is_initializer)
 
     def call(self, interpreter, arg_list: list[object]) -> object:
-        prev_env = self.closure
-        func_env = Environment(self.closure)
-        for idx in range(len(arg_list)):
-            func_env.declare_variable(self.func.arg_list[idx], arg_list[idx])
+        return self.run(interpreter, self.environment(interpreter, arg_list))
+
+    def run(self, interpreter, func_env: Environment) -> object:
+        budget = interpreter.budget
+        if budget is not None:
+            budget.call(interpreter)
+        call_stack = interpreter.call_stack
+        if len(call_stack) >= interpreter.max_depth:
+            raise StackOverflow(interpreter.max_depth, [str(frame) for frame in call_stack])
+        call_stack.append(self)
+        releaser = interpreter.releaser
+        confined = interpreter.analysis.confined
+        try:
+            function = self
+            while True:
+                result = function.__invoke(interpreter, func_env)
+                # a tail call may be about to run a function declared in this frame, it still needs the cells
+                if releaser is not None and type(result) is not TailCall and function.func in confined:
+                    releaser.release(func_env)
+                if type(result) is not TailCall:
+                    return result
+                # a call in tail position reuses this frame instead of nesting another one
+                function = result.callee
+                if type(function) is not LoxFunction:
+                    return function.call(interpreter, result.arguments)
+                func_env = result.arguments
+                if budget is not None:
+                    budget.step(interpreter)
+                call_stack[-1] = function
+        finally:
+            call_stack.pop()
+
+    def __invoke(self, interpreter, func_env: Environment) -> object:
         try:
             interpreter.execute_block(self.func.body, func_env)
-        except Exception as err:
+        except Return as ret:
             if self.is_initializer:
                 return self.closure.getAt(0, "this")
-            self.closure = prev_env
-            return err.args[0]
+            return ret.val
 
         if self.is_initializer:
             return self.closure.getAt(0, 'this')
 
+    def environment(self, interpreter, arg_list: list[object]) -> Environment:
+        if self.func in interpreter.analysis.frameless:
+            func_env = self.closure
+        else:
+            func_env = Environment(self.closure)
+            if interpreter.budget is not None:
+                interpreter.budget.environments += 1
+        for idx in range(len(arg_list)):
+            func_env.declare_variable(self.func.arg_list[idx], arg_list[idx])
+        cell_params = interpreter.analysis.cell_params.get(self.func)
+        if cell_params:
+            for name in cell_params:
+                func_env.variables[name] = Cell(func_env.variables[name])
+        return func_env
+
     def arity(self) -> int:
         return len(self.func.arg_list)
 
@@ -0,0 +1,168 @@
+import AST
+
+INDENT = "    "
+# expressions that can be followed by '.name' or '(args)' without parentheses
+POSTFIX_SAFE = (AST.Variable, AST.Call, AST.Get, AST.This, AST.Super)
+# expressions that need parentheses as the operand of an operator
+COMPOUND = (AST.Binary, AST.Assign, AST.Set, AST.UpdateVariable, AST.UpdateField, AST.CompareConstant)
+ASSIGNMENTS = (AST.Assign, AST.Set, AST.UpdateVariable, AST.UpdateField)
+
+
+class LoxPrinter(AST.VisitorExpr):
+    # turns an AST back into Lox source that parses to the same tree; operands that are themselves
+    # operations are always parenthesised, so the output never depends on operator precedence
+    def __init__(self) -> None:
+        self.depth = 0
+
+    def print(self, ast_list: list[AST.AST]) -> str:
+        self.depth = 0
+        return "".join(self.__statement(stmt) for stmt in ast_list)
+
+    def __statement(self, stmt: AST.AST) -> str:
+        if isinstance(stmt, AST.Expr):
+            return self.__line(stmt.accept(self) + ";")
+        return stmt.accept(self)
+
+    def __condition(self, expr: AST.Expr) -> str:
+        # conditions are parsed without assignment
+        if isinstance(expr, ASSIGNMENTS):
+            return "(" + expr.accept(self) + ")"
+        return expr.accept(self)
+
+    def __operand(self, expr: AST.Expr) -> str:
+        if isinstance(expr, COMPOUND):
+            return "(" + expr.accept(self) + ")"
+        return expr.accept(self)
+
+    def __postfix(self, expr: AST.Expr) -> str:
+        if isinstance(expr, POSTFIX_SAFE):
+            return expr.accept(self)
+        return "(" + expr.accept(self) + ")"
+
+    def __line(self, text: str) -> str:
+        return INDENT * self.depth + text + "\n"
+
+    def __body(self, block: AST.Block) -> str:
+        self.depth += 1
+        try:
+            inner = "".join(self.__statement(stmt) for stmt in block.stmts)
+        finally:
+            self.depth -= 1
+        return "{\n" + inner + INDENT * self.depth + "}"
+
+    def __function(self, func_decl: AST.FuncDecl) -> str:
+        return f"{func_decl.name}({', '.join(func_decl.arg_list)}) {self.__body(func_decl.body)}"
+
+    def visit_block(self, block: AST.Block) -> str:
+        # the parser wraps every for loop in a block of its own
+        if len(block.stmts) == 1 and type(block.stmts[0]) is AST.ForStmt:
+            return block.stmts[0].accept(self)
+        return self.__line(self.__body(block))
+
+    def visit_var_decl(self, var: AST.VarDecl) -> str:
+        if var.val is None:
+            return self.__line(f"var {var.name};")
+        return self.__line(f"var {var.name} = {var.val.accept(self)};")
+
+    def visit_print(self, print_stmt: AST.PrintStmt) -> str:
+        return self.__line(f"print {print_stmt.val.accept(self)};")
+
+    def visit_if(self, if_stmt: AST.IfStmt) -> str:
+        text = f"if ({self.__condition(if_stmt.condition)}) {self.__body(if_stmt.if_block)}"
+        if if_stmt.else_block is not None:
+            text += f" else {self.__body(if_stmt.else_block)}"
+        return self.__line(text)
+
+    def visit_while(self, while_stmt: AST.WhileStmt) -> str:
+        return self.__line(f"while ({self.__condition(while_stmt.condition)}) {self.__body(while_stmt.body)}")
+
+    def visit_for(self, for_stmt: AST.ForStmt) -> str:
+        initialization = self.visit_var_decl(for_stmt.initialization).strip()
+        return self.__line(f"for ({initialization} {for_stmt.condition.accept(self)}; "
+                           f"{for_stmt.increment.accept(self)}) {self.__body(for_stmt.body)}")
+
+    def visit_func(self, func_decl: AST.FuncDecl) -> str:
+        return self.__line("fun " + self.__function(func_decl))
+
+    def visit_return(self, return_stmt: AST.ReturnStmt) -> str:
+        return self.__line(f"return {return_stmt.expr.accept(self)};")
+
+    def visit_class(self, class_dec: AST.Class) -> str:
+        header = f"class {class_dec.name}"
+        if class_dec.superclass is not None:
+            header += f" < {class_dec.superclass.name}"
+        self.depth += 1
+        try:
+            methods = "".join(self.__line(self.__function(method)) for method in class_dec.methods)
+        finally:
+            self.depth -= 1
+        return self.__line(header + " {") + methods + self.__line("}")
+
+    def visit_assign(self, assign: AST.Assign) -> str:
+        return f"{assign.name} = {assign.val.accept(self)}"
+
+    def visit_set(self, expr: AST.Set) -> str:
+        return f"{self.__postfix(expr.expr)}.{expr.name} = {expr.val.accept(self)}"
+
+    def visit_binary(self, binary: AST.Binary) -> str:
+        return f"{self.__operand(binary.left)} {binary.operator} {self.__operand(binary.right)}"
+
+    def visit_unary(self, unary: AST.Unary) -> str:
+        return f"{unary.operator}{self.__operand(unary.right)}"
+
+    def visit_call(self, call_expr: AST.Call) -> str:
+        arguments = ", ".join(arg.accept(self) for arg in call_expr.arg_list)
+        return f"{self.__postfix(call_expr.name)}({arguments})"
+
+    def visit_get(self, obj: AST.Get) -> str:
+        return f"{self.__postfix(obj.obj)}.{obj.name}"
+
+    def visit_this(self, this: AST.This) -> str:
+        return "this"
+
+    def visit_super(self, lox_super: AST.Super) -> str:
+        return f"super.{lox_super.method}"
+
+    def visit_variable(self, var: AST.Variable) -> str:
+        return var.name
+
+    def visit_primary(self, primary: AST.Primary) -> str:
+        return literal(primary.value)
+
+    # fused nodes print as the code they replaced
+
+    def visit_update_variable(self, update: AST.UpdateVariable) -> str:
+        return update.original.accept(self)
+
+    def visit_update_field(self, update: AST.UpdateField) -> str:
+        return update.original.accept(self)
+
+    def visit_compare_constant(self, compare: AST.CompareConstant) -> str:
+        return compare.original.accept(self)
+
+    def visit_print_variable(self, print_var: AST.PrintVariable) -> str:
+        return print_var.original.accept(self)
+
+
+def literal(value: object) -> str:
+    if value is None:
+        return "nil"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if type(value) is int:
+        return str(value)
+    if type(value) is float:
+        # the scanner reads neither exponents nor signs
+        text = repr(value)
+        if "e" in text or "inf" in text or "nan" in text:
+            text = f"{value:f}"
+        return text
+    text = str(value)
+    assert "'" not in text, "Lox strings cannot contain a quote"
+    return f"'{text}'"
+
+
+def to_source(ast_list: list[AST.AST]) -> str:
+    return LoxPrinter().print(ast_list)
@@ -0,0 +1,63 @@
+class LoxString:
+    # a string built by repeated '+'. The pieces live in a list shared by every string built from the
+    # same prefix: the newest one appends in place, older ones keep their shorter view of the list
+    __slots__ = ("parts", "count", "length", "flat")
+
+    def __init__(self, parts: list[str], count: int, length: int) -> None:
+        self.parts = parts
+        self.count = count
+        self.length = length
+        self.flat = None
+
+    @staticmethod
+    def concat(left, right) -> "LoxString":
+        if type(right) is LoxString:
+            right = right.flatten()
+        elif type(right) is not str:
+            raise Exception("Operands must be two numbers or two strings.")
+        if type(left) is str:
+            return LoxString([left, right], 2, len(left) + len(right))
+        parts = left.parts
+        if len(parts) != left.count:
+            # someone already extended this prefix, so branch off a copy
+            parts = parts[:left.count]
+        parts.append(right)
+        return LoxString(parts, left.count + 1, left.length + len(right))
+
+    def flatten(self) -> str:
+        if self.flat is None:
+            self.flat = "".join(self.parts[:self.count])
+        return self.flat
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __repr__(self) -> str:
+        return repr(self.flatten())
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __hash__(self) -> int:
+        return hash(self.flatten())
+
+    def __eq__(self, other) -> bool:
+        if type(other) is LoxString:
+            return self.length == other.length and self.flatten() == other.flatten()
+        return self.flatten() == other
+
+    def __lt__(self, other) -> bool:
+        return self.flatten() < flat(other)
+
+    def __le__(self, other) -> bool:
+        return self.flatten() <= flat(other)
+
+    def __gt__(self, other) -> bool:
+        return self.flatten() > flat(other)
+
+    def __ge__(self, other) -> bool:
+        return self.flatten() >= flat(other)
+
+
+def flat(val: object) -> object:
+    return val.flatten() if type(val) is LoxString else val
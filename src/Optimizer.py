@@ -0,0 +1,91 @@
+import AST
+
+ARITHMETIC = frozenset(("+", "-", "*", "/"))
+COMPARISONS = frozenset(("<", "<=", ">", ">=", "==", "!="))
+
+
+class Optimizer:
+    # A pass over a resolved program that rewrites the shapes profiles keep showing into the fused nodes
+    # of AST.py. It reads the resolver's distances, so it runs after Resolver and before the program does;
+    # the Resolver does not know the fused nodes. Nodes are replaced in their parents in place.
+    def __init__(self, interpreter) -> None:
+        self.locals = interpreter.locals
+        self.fused = {}
+
+    def optimize(self, ast_list: list[AST.AST]) -> list[AST.AST]:
+        ast_list[:] = [self.__visit(ast) for ast in ast_list]
+        return ast_list
+
+    def __visit(self, node: AST.AST) -> AST.AST:
+        if type(node) in AST.FUSED_NODES:
+            return node
+        fused = self.__fuse(node)
+        if fused is not None:
+            self.fused[type(fused).__name__] = self.fused.get(type(fused).__name__, 0) + 1
+            return fused
+        for name in node.__slots__:
+            child = getattr(node, name)
+            if isinstance(child, AST.AST):
+                setattr(node, name, self.__visit(child))
+            elif type(child) is list:
+                child[:] = [self.__visit(item) if isinstance(item, AST.AST) else item for item in child]
+        return node
+
+    def __fuse(self, node: AST.AST) -> AST.AST | None:
+        node_type = type(node)
+        if node_type is AST.Assign:
+            return self.__update_variable(node)
+        if node_type is AST.Set:
+            return self.__update_field(node)
+        if node_type is AST.Binary:
+            return self.__compare_constant(node)
+        if node_type is AST.PrintStmt and type(node.val) is AST.Variable:
+            return AST.PrintVariable(node.val.name, self.locals.get(node.val), node)
+        return None
+
+    def __update_variable(self, assign: AST.Assign) -> AST.UpdateVariable | None:
+        binary = assign.val
+        if type(binary) is not AST.Binary or binary.operator not in ARITHMETIC:
+            return None
+        left, right = binary.left, binary.right
+        if type(left) is not AST.Variable or left.name != assign.name or type(right) is not AST.Primary:
+            return None
+        distance = self.locals.get(assign)
+        if self.locals.get(left) != distance:
+            return None
+        return AST.UpdateVariable(assign.name, distance, binary.operator, right.value, assign)
+
+    def __update_field(self, set_expr: AST.Set) -> AST.UpdateField | None:
+        binary, obj = set_expr.val, set_expr.expr
+        if type(binary) is not AST.Binary or binary.operator not in ARITHMETIC:
+            return None
+        get, operand = binary.left, binary.right
+        if type(get) is not AST.Get or get.name != set_expr.name:
+            return None
+        if type(operand) is not AST.Variable and type(operand) is not AST.Primary:
+            return None
+        name = self.__object_name(obj)
+        if name is None or name != self.__object_name(get.obj):
+            return None
+        distance = self.locals.get(obj)
+        if self.locals.get(get.obj) != distance:
+            return None
+        return AST.UpdateField(name, distance, set_expr.name, binary.operator, operand, set_expr)
+
+    @staticmethod
+    def __object_name(expr: AST.Expr) -> str | None:
+        if type(expr) is AST.Variable:
+            return expr.name
+        if type(expr) is AST.This:
+            return expr.keyword
+        return None
+
+    def __compare_constant(self, binary: AST.Binary) -> AST.CompareConstant | None:
+        left, right = binary.left, binary.right
+        if binary.operator not in COMPARISONS or type(left) is not AST.Variable or type(right) is not AST.Primary:
+            return None
+        constant = right.value
+        # booleans are ints to Python; only numbers take the fast comparison
+        if type(constant) is not int and type(constant) is not float:
+            return None
+        return AST.CompareConstant(left.name, self.locals.get(left), binary.operator, constant, binary)
@@ -0,0 +1,128 @@
+import os
+import re
+from multiprocessing import Pool
+import AST
+from AstCodec import AstDecoder, encode
+from Scanner import Scanner
+from Parser import Parser
+
+# a process pool costs more to start than a small script takes to parse
+MIN_PARALLEL_SIZE = 1 << 20
+CHUNKS_PER_WORKER = 4
+DELIMITERS = re.compile(r"[{}()';]")
+ELSE = re.compile(r"\s*else(?!\w)")
+
+_worker_source = None
+
+
+def _init_worker(source_code: str) -> None:
+    global _worker_source
+    _worker_source = source_code
+
+
+def encode_chunk(ast_list: list[AST.AST], positions: list[tuple[int, int]]) -> bytes:
+    return encode(ast_list, positions=positions)
+
+
+def decode_chunk(data: bytes) -> tuple[list[AST.AST], list[tuple[int, int]]]:
+    decoder = AstDecoder(data)
+    ast_list = decoder.decode()
+    return ast_list, decoder.positions
+
+
+def parse_chunk(start: int, end: int, line: int, source_code: str = None) -> bytes | None:
+    # None when the chunk has syntax errors: the parent then parses serially and reports them itself
+    source_code = source_code if source_code is not None else _worker_source
+    scanner = Scanner(source_code[start:end], line)
+    token_list = scanner.scan()
+    parser = Parser()
+    ast_list = parser.parse(token_list)
+    if scanner.errors or parser.errors:
+        return None
+    return encode_chunk(ast_list, parser.positions)
+
+
+def _parse_task(task: tuple[int, int, int]) -> bytes | None:
+    return parse_chunk(*task)
+
+
+def split(source_code: str, chunk_size: int) -> list[tuple[int, int, int]]:
+    # Cuts the source into (start, end, first line) chunks of about chunk_size characters. A cut goes at the end
+    # of a line whose last token is a ';' or '}' outside every bracket and string, unless an 'else' follows, so
+    # each chunk is a run of whole top-level statements and starts at column 1 of its first line.
+    chunks = []
+    start = position = depth = 0
+    line = 1
+    target = chunk_size
+    while True:
+        match = DELIMITERS.search(source_code, position)
+        if match is None:
+            break
+        char = match.group()
+        position = match.end()
+        if char == "'":
+            close = source_code.find("'", position)
+            if close < 0:
+                break
+            position = close + 1
+        elif char == "{" or char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        else:
+            if char == "}":
+                depth -= 1
+            if depth != 0 or position < target:
+                continue
+            newline = source_code.find("\n", position)
+            if newline < 0:
+                break
+            if source_code[position:newline].strip() or ELSE.match(source_code, newline):
+                continue
+            cut = newline + 1
+            chunks.append((start, cut, line))
+            line += source_code.count("\n", start, cut)
+            start = cut
+            target = cut + chunk_size
+    chunks.append((start, len(source_code), line))
+    return chunks
+
+
+class ParallelParser:
+    # Scans and parses the chunks of a large script in a process pool and merges the results in order.
+    # The result matches Parser on the whole source; when any chunk has a syntax error the source is parsed
+    # again serially, so error recovery and its diagnostics are exactly the serial ones.
+    def __init__(self, workers: int = None, min_size: int = MIN_PARALLEL_SIZE) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.min_size = min_size
+        self.errors = []
+        self.positions = []
+        self.chunks = 0
+
+    def parse(self, source_code: str) -> list[AST.AST]:
+        if self.workers < 2 or len(source_code) < self.min_size:
+            return self.__serial(source_code)
+        tasks = split(source_code, max(len(source_code) // (self.workers * CHUNKS_PER_WORKER), 1))
+        if len(tasks) < 2:
+            return self.__serial(source_code)
+        with Pool(min(self.workers, len(tasks)), initializer=_init_worker, initargs=(source_code,)) as pool:
+            results = pool.map(_parse_task, tasks)
+        ast_list, self.errors, self.positions = [], [], []
+        if None in results:
+            return self.__serial(source_code)
+        for data in results:
+            chunk_ast, positions = decode_chunk(data)
+            ast_list.extend(chunk_ast)
+            self.positions.extend(positions)
+        self.chunks = len(tasks)
+        return ast_list
+
+    def __serial(self, source_code: str) -> list[AST.AST]:
+        scanner = Scanner(source_code)
+        token_list = scanner.scan()
+        parser = Parser()
+        ast_list = parser.parse(token_list)
+        self.errors = scanner.errors + parser.errors
+        self.positions = parser.positions
+        self.chunks = 1
+        return ast_list
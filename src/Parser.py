@@ -1,341 +1,367 @@
 import AST
 import Token
+from Token import TokenType
+from Diagnostic import Diagnostic
+
+# binding power of each binary operator; higher binds tighter, all are left associative
+BINARY_PRECEDENCE = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.EQUAL_EQUAL: 3, TokenType.NOT_EQUAL: 3,
+    TokenType.GREATER: 4, TokenType.GREATER_EQUAL: 4, TokenType.LESS: 4, TokenType.LESS_EQUAL: 4,
+    TokenType.ADD: 5, TokenType.MINUS: 5,
+    TokenType.STAR: 6, TokenType.DIVISION: 6,
+}
+UNARY_OPERATORS = frozenset((TokenType.MINUS, TokenType.NOT))
+LITERALS = frozenset((TokenType.STRING, TokenType.NUMBER))
+CONSTANTS = {TokenType.TRUE: True, TokenType.FALSE: False, TokenType.NIL: None}
+STATEMENT_STARTS = frozenset((TokenType.CLASS, TokenType.FUN, TokenType.VAR, TokenType.FOR, TokenType.IF,
+                              TokenType.WHILE, TokenType.PRINT, TokenType.RETURN))
+
+
+class ParseError(Exception):
+    def __init__(self, token: Token.Token, message: str) -> None:
+        super().__init__(message)
+        self.token = token
+        self.message = message
 
 
 class Parser:
     def __init__(self) -> None:
         self.tokens = None
+        self.types = None
         self.current = None
+        self.end = None
+        self.errors = []
+        self.positions = []
 
     def parse(self, tokens: list[Token.Token]) -> list[AST.AST]:
         self.current = 0
         self.tokens = tokens
+        # a TokenArray already keeps its types apart
+        self.types = tokens.types if hasattr(tokens, "types") else [token.type for token in tokens]
+        self.end = len(tokens) - 1
+        self.errors = []
+        self.positions = []
         ast_list = []
-        while not self.__at_end():
+        while self.current != self.end:
+            start = self.current
             try:
                 expr = self.__declaration()
                 ast_list.append(expr)
-            except Exception as err:
-                print(err)
+                self.positions.append((tokens[start].line, tokens[start].column))
+            except ParseError as err:
+                self.__report(err)
+                self.__synchronize()
+                if self.current == start:
+                    self.current += 1
         return ast_list
 
+    def __report(self, err: ParseError) -> None:
+        token = err.token
+        where = "end" if token.type == TokenType.EOF else f"'{token.val}'"
+        self.errors.append(Diagnostic("Parse", f"at {where}: {err.message}", token.line, token.column))
+
+    def __synchronize(self) -> None:
+        # panic mode: skip to the next statement boundary, stepping over whole nested blocks
+        types = self.types
+        if types[self.current] == TokenType.LEFT_BRACKET:
+            # the block the failed declaration would have owned, e.g. the body of 'class { }'
+            self.__skip_block()
+            return
+        if self.current != self.end and types[self.current] != TokenType.RIGHT_BRACKET:
+            self.current += 1
+        while self.current != self.end:
+            previous = types[self.current - 1]
+            if previous == TokenType.SEMICOLON or previous == TokenType.RIGHT_BRACKET:
+                return
+            type = types[self.current]
+            if type in STATEMENT_STARTS or type == TokenType.RIGHT_BRACKET:
+                return
+            if type == TokenType.LEFT_BRACKET:
+                self.__skip_block()
+                return
+            self.current += 1
+
+    def __skip_block(self) -> None:
+        types = self.types
+        depth = 0
+        while self.current != self.end:
+            type = types[self.current]
+            self.current += 1
+            if type == TokenType.LEFT_BRACKET:
+                depth += 1
+            elif type == TokenType.RIGHT_BRACKET:
+                depth -= 1
+                if depth == 0:
+                    return
+
     def __declaration(self) -> AST.AST:
-        if self.__match(Token.TokenType.VAR):
+        type = self.types[self.current]
+        if type == TokenType.VAR:
             return self.__var_decl()
-        elif self.__match(Token.TokenType.CLASS):
+        elif type == TokenType.CLASS:
             return self.__class_decl()
-        elif self.__match(Token.TokenType.FUN):
-            self.__advance()
+        elif type == TokenType.FUN:
+            self.current += 1
             return self.__func_decl()
         else:
             return self.__stmt()
 
     def __class_decl(self) -> AST.Class:
         self.__advance()
-        name = str(self.__advance().val)
+        name = str(self.__consume(TokenType.IDENTIFIER, "Expect class name.").val)
         superclass = None
-        if self.__match(Token.TokenType.LESS):
+        if self.types[self.current] == TokenType.LESS:
             self.__advance()
-            assert self.__match(Token.TokenType.IDENTIFIER)
-            superclass = AST.Variable(self.__advance())
+            superclass = AST.Variable(str(self.__consume(TokenType.IDENTIFIER, "Expect superclass name.").val))
 
-        assert self.__advance().type == Token.TokenType.LEFT_BRACKET, "Expect '{' after name in class " \
-                                                                      "declaration. "
+        self.__consume(TokenType.LEFT_BRACKET, "Expect '{' after name in class declaration. ")
         methods = []
-        while self.__peek().type != Token.TokenType.RIGHT_BRACKET and not self.__at_end():
-            methods.append(self.__func_decl("method"))
-        assert self.__advance().type == Token.TokenType.RIGHT_BRACKET, "Expect '}' after name in class " \
-                                                                       "declaration. "
+        while self.types[self.current] != TokenType.RIGHT_BRACKET and self.current != self.end:
+            try:
+                methods.append(self.__func_decl("method"))
+            except ParseError as err:
+                self.__report(err)
+                self.__synchronize()
+        self.__consume(TokenType.RIGHT_BRACKET, "Expect '}' after name in class declaration. ")
         return AST.Class(name, superclass, methods)
 
-    def __func_decl(self, kind="") -> AST.FuncDecl:
-        # self.__advance()
-        name = str(self.__advance().val)
-        assert self.__advance().type == Token.TokenType.LEFT_PAREN, "Expect '(' after name in function " \
-                                                                    "declaration. "
+    def __func_decl(self, kind="function") -> AST.FuncDecl:
+        name = str(self.__consume(TokenType.IDENTIFIER, f"Expect {kind} name.").val)
+        self.__consume(TokenType.LEFT_PAREN, "Expect '(' after name in function declaration. ")
         arg_list = self.__func_arg_list()
-        if not self.__match(Token.TokenType.LEFT_BRACKET):
-            raise Exception("Expect '{' after arguments in function declaration. ")
+        if self.types[self.current] != TokenType.LEFT_BRACKET:
+            raise self.__error("Expect '{' after arguments in function declaration. ")
         body = self.__block()
         return AST.FuncDecl(name, arg_list, body)
 
     def __func_arg_list(self) -> list[str]:
-        arg_list = []
-        if self.__match(Token.TokenType.RIGHT_PAREN):
+        types = self.types
+        if types[self.current] == TokenType.RIGHT_PAREN:
             self.__advance()
             return []
+        arg_list = []
         while True:
-            arg = self.__advance().val
-            assert isinstance(arg, str), "All arguments in function declaration should be string !!!"
-            arg_list.append(arg)
-            if self.__match(Token.TokenType.RIGHT_PAREN):
+            arg_list.append(str(self.__consume(TokenType.IDENTIFIER, "Expect parameter name.").val))
+            if types[self.current] == TokenType.RIGHT_PAREN:
                 break
-            assert self.__advance().type == Token.TokenType.COMMA, "Expect ',' after argument in function " \
-                                                                   "declaration."
+            self.__consume(TokenType.COMMA, "Expect ',' after argument in function declaration.")
         self.__advance()
-        assert len(arg_list) <= 255, "The maximum arguments are 255"
+        if len(arg_list) > 255:
+            raise self.__error("The maximum arguments are 255")
         return arg_list
 
-    def __var_decl(self):
+    def __var_decl(self) -> AST.VarDecl:
         self.__advance()
-        name = str(self.__advance().val)
+        name = str(self.__consume(TokenType.IDENTIFIER, "Expect variable name.").val)
         val = None
-        if self.__match(Token.TokenType.EQUAL):
+        if self.types[self.current] == TokenType.EQUAL:
             self.__advance()
             val = self.__expression()
-        assert self.__advance().type == Token.TokenType.SEMICOLON, "Expect ';' after var statement"
+        self.__consume(TokenType.SEMICOLON, "Expect ';' after var statement")
         return AST.VarDecl(name, val)
 
     def __stmt(self) -> AST.AST:
-        if self.__match(Token.TokenType.PRINT):
+        type = self.types[self.current]
+        if type == TokenType.PRINT:
             return self.__print_stmt()
-        elif self.__match(Token.TokenType.LEFT_BRACKET):
+        elif type == TokenType.LEFT_BRACKET:
             return self.__block()
-        elif self.__match(Token.TokenType.IF):
+        elif type == TokenType.IF:
             return self.__if_stmt()
-        elif self.__match(Token.TokenType.WHILE):
+        elif type == TokenType.WHILE:
             return self.__while_stmt()
-        elif self.__match(Token.TokenType.FOR):
+        elif type == TokenType.FOR:
             return self.__for_stmt()
-        elif self.__match(Token.TokenType.RETURN):
+        elif type == TokenType.RETURN:
             return self.__return()
         else:
             return self.__exprStmt()
 
     def __block(self) -> AST.Block:
         self.__advance()
+        types = self.types
         stmts = []
-        while not self.__match(Token.TokenType.RIGHT_BRACKET):
-            stmt = self.__declaration()
-            stmts.append(stmt)
-            if self.__at_end():
-                raise Exception("Program ends inside a block!!!")
+        while types[self.current] != TokenType.RIGHT_BRACKET:
+            if self.current == self.end:
+                raise self.__error("Program ends inside a block!!!")
+            try:
+                stmts.append(self.__declaration())
+            except ParseError as err:
+                self.__report(err)
+                self.__synchronize()
         self.__advance()
         return AST.Block(stmts)
 
     def __return(self) -> AST.ReturnStmt:
         self.__advance()
         expr = self.__expression()
-        assert self.__advance().type == Token.TokenType.SEMICOLON, "Expect ';' after return statement"
+        self.__consume(TokenType.SEMICOLON, "Expect ';' after return statement")
         return AST.ReturnStmt(expr)
 
     def __exprStmt(self) -> AST.Expr:
         expr = self.__expression()
-        assert self.__advance().type == Token.TokenType.SEMICOLON, "Expect ';' after expression"
+        self.__consume(TokenType.SEMICOLON, "Expect ';' after expression")
         return expr
 
     def __for_stmt(self) -> AST.Block:
         self.__advance()
-        assert self.__advance().type == Token.TokenType.LEFT_PAREN, "Expect '(' after for word"
+        self.__consume(TokenType.LEFT_PAREN, "Expect '(' after for word")
         initialization = self.__var_decl()
         condition = self.__expression()
-        assert self.__advance().type == Token.TokenType.SEMICOLON, "Expect ';' after condition in for statement"
+        self.__consume(TokenType.SEMICOLON, "Expect ';' after condition in for statement")
         increment = self.__expression()
-        assert self.__advance().type == Token.TokenType.RIGHT_PAREN, "Expect ')' after increment in for statement"
-        if not self.__match(Token.TokenType.LEFT_BRACKET):
-            raise Exception("Expect '{' after for condition statement")
+        self.__consume(TokenType.RIGHT_PAREN, "Expect ')' after increment in for statement")
+        if self.types[self.current] != TokenType.LEFT_BRACKET:
+            raise self.__error("Expect '{' after for condition statement")
         body = self.__block()
-        # return AST.ForStmt(initialization, condition, increment, body)
         return AST.Block([AST.ForStmt(initialization, condition, increment, body)])
 
     def __while_stmt(self) -> AST.WhileStmt:
-        condition = self.__while_condition()
-        body = self.__while_body()
+        condition = self.__condition("while")
+        if self.types[self.current] != TokenType.LEFT_BRACKET:
+            raise self.__error("Expect '{' after while condition statement")
+        body = self.__block()
         return AST.WhileStmt(condition, body)
 
-    def __while_condition(self) -> AST.Expr:
-        self.__advance()
-        assert self.__advance().type == Token.TokenType.LEFT_PAREN, "Expect '(' after while word"
-        assert self.__peek().type != Token.TokenType.RIGHT_PAREN, "The condition in while statement is empty!!!"
-        condition = self.__logic_or()
-        assert self.__advance().type == Token.TokenType.RIGHT_PAREN, "Expect ')' after while condition"
-        return condition
-
-    def __while_body(self) -> AST.Block:
-        if not self.__match(Token.TokenType.LEFT_BRACKET):
-            raise Exception("Expect '{' after while condition statement")
-        while_block = self.__block()
-        return while_block
-
     def __if_stmt(self) -> AST.IfStmt:
-        condition = self.__if_condition()
-        if_block = self.__if_block()
-        else_block = self.__else_block()
-        return AST.IfStmt(condition, if_block, else_block)
-
-    def __if_condition(self) -> AST.Expr:
-        self.__advance()
-        assert self.__advance().type == Token.TokenType.LEFT_PAREN, "Expect '(' after if word"
-        assert self.__peek().type != Token.TokenType.RIGHT_PAREN, "The condition in if statement is empty!!!"
-        condition = self.__logic_or()
-        assert self.__advance().type == Token.TokenType.RIGHT_PAREN, "Expect ')' after if condition"
-        return condition
-
-    def __if_block(self) -> AST.Block:
-        if not self.__match(Token.TokenType.LEFT_BRACKET):
-            raise Exception("Expect '{' after if condition statement")
+        condition = self.__condition("if")
+        if self.types[self.current] != TokenType.LEFT_BRACKET:
+            raise self.__error("Expect '{' after if condition statement")
         if_block = self.__block()
-        return if_block
-
-    def __else_block(self) -> AST.Block:
         else_block = None
-        if self.__match(Token.TokenType.ELSE):
+        if self.types[self.current] == TokenType.ELSE:
             self.__advance()
-            if not self.__match(Token.TokenType.LEFT_BRACKET):
-                raise Exception("Expect '{' after else statement")
+            if self.types[self.current] != TokenType.LEFT_BRACKET:
+                raise self.__error("Expect '{' after else statement")
             else_block = self.__block()
-        return else_block
+        return AST.IfStmt(condition, if_block, else_block)
+
+    def __condition(self, keyword: str) -> AST.Expr:
+        self.__advance()
+        self.__consume(TokenType.LEFT_PAREN, f"Expect '(' after {keyword} word")
+        if self.types[self.current] == TokenType.RIGHT_PAREN:
+            raise self.__error(f"The condition in {keyword} statement is empty!!!")
+        condition = self.__binary(1)
+        self.__consume(TokenType.RIGHT_PAREN, f"Expect ')' after {keyword} condition")
+        return condition
 
     def __print_stmt(self) -> AST.PrintStmt:
         self.__advance()
         expr = self.__expression()
-        assert self.__advance().type == Token.TokenType.SEMICOLON, "Expect ';' after print statement"
+        self.__consume(TokenType.SEMICOLON, "Expect ';' after print statement")
         return AST.PrintStmt(expr)
 
     def __expression(self) -> AST.Expr:
-        return self.__assign()
-
-    def __assign(self) -> AST.Expr:
-        expr = self.__logic_or()
-        if self.__match(Token.TokenType.EQUAL):
-            name = str(self.__previous().val)
-            self.__advance()
-            val = self.__assign()
+        expr = self.__binary(1)
+        if self.types[self.current] == TokenType.EQUAL:
+            self.current += 1
+            val = self.__expression()
             if isinstance(expr, AST.Variable):
-                return AST.Assign(name, val)
+                return AST.Assign(expr.name, val)
             elif isinstance(expr, AST.Get):
                 return AST.Set(expr.obj, expr.name, val)
-            raise Exception("invalid assignment target!")
+            raise self.__error("invalid assignment target!")
         return expr
 
-    def __logic_or(self) -> AST.Expr:
-        left = self.__logic_and()
-        while self.__match(Token.TokenType.OR):
-            self.__advance()
-            right = self.__logic_and()
-            left = AST.Binary(left, right, 'or')
-        return left
-
-    def __logic_and(self) -> AST.Expr:
-        left = self.__equality()
-        while self.__match(Token.TokenType.AND):
-            self.__advance()
-            right = self.__equality()
-            left = AST.Binary(left, right, 'and')
-        return left
-
-    def __equality(self) -> AST.Expr:
-        expr = self.__comparison()
-        while self.__match(Token.TokenType.EQUAL_EQUAL, Token.TokenType.NOT_EQUAL):
-            operator = self.__advance()
-            right = self.__comparison()
-            expr = AST.Binary(expr, right, operator.val)
-        return expr
-
-    def __comparison(self) -> AST.Expr:
-        expr = self.__term()
-        while self.__match(Token.TokenType.GREATER, Token.TokenType.GREATER_EQUAL,
-                           Token.TokenType.LESS, Token.TokenType.LESS_EQUAL):
-            operator = self.__advance()
-            right = self.__term()
-            expr = AST.Binary(expr, right, operator.val)
-        return expr
-
-    def __term(self) -> AST.Expr:
-        expr = self.__factor()
-        while self.__match(Token.TokenType.ADD, Token.TokenType.MINUS):
-            operator = self.__advance()
-            right = self.__factor()
-            expr = AST.Binary(expr, right, operator.val)
-        return expr
-
-    def __factor(self) -> AST.Expr:
-        expr = self.__unary()
-        while self.__match(Token.TokenType.STAR, Token.TokenType.DIVISION):
-            operator = self.__advance()
-            right = self.__unary()
-            expr = AST.Binary(expr, right, operator.val)
-        return expr
+    def __binary(self, min_precedence: int) -> AST.Expr:
+        # precedence climbing: a bare operand costs one table lookup instead of a call per precedence level
+        left = self.__unary()
+        types = self.types
+        precedence_of = BINARY_PRECEDENCE.get
+        while True:
+            precedence = precedence_of(types[self.current])
+            if precedence is None or precedence < min_precedence:
+                return left
+            operator = self.tokens[self.current].val
+            self.current += 1
+            right = self.__binary(precedence + 1)
+            left = AST.Binary(left, right, operator)
 
     def __unary(self) -> AST.Expr:
-        if self.__match(Token.TokenType.MINUS, Token.TokenType.NOT):
+        type = self.types[self.current]
+        if type in UNARY_OPERATORS:
             operator = self.__advance()
             right = self.__unary()
             return AST.Unary(operator.val, right)
-        else:
-            return self.__call()
+        expr = self.__primary()
+        type = self.types[self.current]
+        if type == TokenType.LEFT_PAREN or type == TokenType.DOT:
+            return self.__call(expr)
+        return expr
 
-    def __call(self) -> AST.Expr:
-        primary = self.__primary()
+    def __call(self, primary: AST.Expr) -> AST.Expr:
+        types = self.types
         while True:
-            if self.__match(Token.TokenType.LEFT_PAREN):
+            type = types[self.current]
+            if type == TokenType.LEFT_PAREN:
                 arg_list = self.__call_arg()
                 primary = AST.Call(primary, arg_list)
-            elif self.__match(Token.TokenType.DOT):
-                self.__advance()
+            elif type == TokenType.DOT:
+                self.current += 1
                 name = str(self.__advance().val)
                 primary = AST.Get(primary, name)
             else:
-                break
-        return primary
+                return primary
 
     def __call_arg(self) -> list[AST.Expr]:
         self.__advance()
-        arg_list = []
-        if self.__match(Token.TokenType.RIGHT_PAREN):
+        types = self.types
+        if types[self.current] == TokenType.RIGHT_PAREN:
             self.__advance()
             return []
+        arg_list = []
         while True:
             arg_list.append(self.__expression())
-            if self.__match(Token.TokenType.RIGHT_PAREN):
+            if types[self.current] == TokenType.RIGHT_PAREN:
                 break
-            assert self.__advance().type == Token.TokenType.COMMA, "Expect ',' after argument in call expression."
+            self.__consume(TokenType.COMMA, "Expect ',' after argument in call expression.")
         self.__advance()
         return arg_list
 
     def __primary(self) -> AST.Expr:
-        cur_token = self.__advance()
-        match cur_token.type:
-            case Token.TokenType.IDENTIFIER:
-                return AST.Variable(cur_token)
-            case Token.TokenType.LEFT_PAREN:
+        current = self.current
+        cur_token = self.tokens[current]
+        type = cur_token.type
+        if type == TokenType.EOF:
+            raise self.__error("Expect expression, but reach the end of the program.")
+        self.current = current + 1
+        if type == TokenType.IDENTIFIER:
+            return AST.Variable(cur_token.val)
+        if type in LITERALS:
+            return AST.Primary(cur_token.val)
+        if type in CONSTANTS:
+            return AST.Primary(CONSTANTS[type])
+        match type:
+            case TokenType.LEFT_PAREN:
                 expr = self.__expression()
-                assert self.__advance().type == Token.TokenType.RIGHT_PAREN, "Expect ')' after expression"
+                self.__consume(TokenType.RIGHT_PAREN, "Expect ')' after expression")
                 return expr
-            case Token.TokenType.THIS:
-                keyword = str(self.__previous().val)
-                return AST.This(keyword)
-            case Token.TokenType.SUPER:
+            case TokenType.THIS:
+                return AST.This(str(cur_token.val))
+            case TokenType.SUPER:
                 keyword = str(cur_token.val)
-                assert self.__advance().type == Token.TokenType.DOT, "Expect '.' after 'super'."
-                assert self.__match(Token.TokenType.IDENTIFIER), "Expect superclass method name."
+                self.__consume(TokenType.DOT, "Expect '.' after 'super'.")
+                if self.types[self.current] != TokenType.IDENTIFIER:
+                    raise self.__error("Expect superclass method name.")
                 method = str(self.__advance().val)
                 return AST.Super(keyword, method)
             case _:
-                return AST.Primary(cur_token)
-
-    def __peek(self) -> Token.Token:
-        return self.tokens[self.current]
-
-    def __previous(self) -> Token.Token:
-        return self.tokens[self.current - 1]
-
-    def __next(self) -> Token.Token:
-        if self.__at_end():
-            return self.tokens[-1]
-        return self.tokens[self.current + 1]
+                self.current = current
+                raise self.__error(f"Do not support the primary datastructure {cur_token.val}")
 
     def __advance(self) -> Token.Token:
-        if self.__at_end():
-            return self.tokens[-1]
-        self.current += 1
-        return self.tokens[self.current - 1]
-
-    def __at_end(self) -> bool:
-        return self.current == len(self.tokens) - 1
-
-    def __match(self, *args) -> bool:
-        for arg in args:
-            if arg == self.__peek().type:
-                return True
-        return False
+        current = self.current
+        if current == self.end:
+            return self.tokens[current]
+        self.current = current + 1
+        return self.tokens[current]
+
+    def __consume(self, type: int, message: str) -> Token.Token:
+        if self.types[self.current] != type:
+            raise self.__error(message)
+        return self.__advance()
+
+    def __error(self, message: str, token: Token.Token = None) -> ParseError:
+        return ParseError(token or self.tokens[self.current], message)
@@ -0,0 +1,48 @@
+import AST
+from Scanner import Scanner
+from Parser import Parser
+from Resolver import Resolver
+from Optimizer import Optimizer
+from Interpreter import Interpreter
+from Analysis import Analysis
+from Diagnostic import LoxSyntaxError
+
+
+class Program:
+    # A compiled script: the AST with the resolver's distances and frame analysis. Running it never writes
+    # to any of the three; everything a run changes (globals, the current scope, call sites, compiled loops)
+    # lives in the Interpreter. So one Program can be loaded into any number of interpreters and run by
+    # all of them at once, one per thread, with no locking. Unlike Snapshot.restore nothing is copied.
+    __slots__ = ("ast", "locals", "analysis")
+
+    def __init__(self, ast: list[AST.AST], locals: dict, analysis: Analysis) -> None:
+        self.ast = ast
+        self.locals = locals
+        self.analysis = analysis
+
+    @staticmethod
+    def compile(source_code: str, optimize: bool = False) -> "Program":
+        scanner = Scanner(source_code)
+        token_list = scanner.scan()
+        parser = Parser()
+        ast = parser.parse(token_list)
+        if scanner.errors or parser.errors:
+            raise LoxSyntaxError(scanner.errors + parser.errors)
+        # the interpreter only collects the resolution, it is dropped once the program is built
+        interpreter = Interpreter()
+        Resolver(interpreter).resolve(ast)
+        if optimize:
+            Optimizer(interpreter).optimize(ast)
+        return Program(ast, interpreter.locals, interpreter.analysis)
+
+    def load(self, interpreter: Interpreter = None) -> Interpreter:
+        interpreter = interpreter or Interpreter()
+        interpreter.locals = self.locals
+        interpreter.analysis = self.analysis
+        interpreter.program = self
+        return interpreter
+
+    def run(self, interpreter: Interpreter = None) -> Interpreter:
+        interpreter = self.load(interpreter)
+        interpreter.interpreter(self.ast)
+        return interpreter
@@ -0,0 +1,386 @@
+import random
+import AST
+from Scanner import Scanner
+
+RESERVED = frozenset(Scanner("").keywords)
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+WORDS = ("", "a", "ab", "lox", "hello", "x y")
+FRACTIONS = (0.5, 1.25, 2.5, 3.75)
+ARITHMETIC = ("+", "-", "*")
+COMPARISONS = ("<", "<=", ">", ">=")
+SCALAR_KINDS = ("num", "num", "str", "bool")
+
+
+class Binding:
+    __slots__ = ("name", "kind", "writable", "arity", "info")
+
+    def __init__(self, name: str, kind: str, writable: bool = True, arity: int = 0, info=None) -> None:
+        self.name = name
+        self.kind = kind
+        self.writable = writable
+        self.arity = arity
+        self.info = info
+
+
+class ClassInfo:
+    def __init__(self, name: str, arity: int, fields: list[str], methods: list[str]) -> None:
+        self.name = name
+        self.arity = arity
+        self.fields = fields
+        self.methods = methods
+
+
+class ProgramGenerator:
+    # Builds random, mostly well-typed Lox programs straight from the AST node set. Every loop counts up to
+    # a small literal and functions only call functions declared before them, so programs terminate; the
+    # recursive functions it writes are bounded by a literal argument. `errors` is the chance that a
+    # program contains one deliberately ill-typed expression, which exercises the error paths.
+    def __init__(self, seed: int = None, statements: int = 12, max_depth: int = 3, max_iterations: int = 6,
+                 errors: float = 0.1) -> None:
+        self.random = random.Random(seed)
+        self.statements = statements
+        self.max_depth = max_depth
+        self.max_iterations = max_iterations
+        self.errors = errors
+        self.scopes = [{}]
+        self.count = 0
+        self.functions = 0
+        self.hidden = None
+        self.ill_typed = 0
+
+    def program(self) -> list[AST.AST]:
+        self.scopes = [{}]
+        self.count = 0
+        self.functions = 0
+        self.ill_typed = 1 if self.random.random() < self.errors else 0
+        ast_list = []
+        for _ in range(self.statements):
+            ast_list.extend(self.__statement(0))
+        return ast_list
+
+    def __name(self, prefix: str) -> str:
+        while True:
+            count, letters = self.count, ""
+            self.count += 1
+            while True:
+                letters = LETTERS[count % 26] + letters
+                count //= 26
+                if count == 0:
+                    break
+            name = prefix + letters
+            if name not in RESERVED:
+                return name
+
+    def __declare(self, binding: Binding) -> Binding:
+        self.scopes[-1][binding.name] = binding
+        return binding
+
+    def __visible(self) -> list[Binding]:
+        seen, bindings = set(), []
+        for scope in reversed(self.scopes):
+            for name, binding in scope.items():
+                if name not in seen and name != self.hidden:
+                    seen.add(name)
+                    bindings.append(binding)
+        return bindings
+
+    def __pick(self, kind: str, writable: bool = False) -> Binding | None:
+        bindings = [binding for binding in self.__visible()
+                    if binding.kind == kind and (binding.writable or not writable)]
+        return self.random.choice(bindings) if bindings else None
+
+    def __new_local(self) -> str:
+        # sometimes shadow a name from an enclosing scope, which is what resolver distances are about
+        if len(self.scopes) > 1 and self.random.random() < 0.15:
+            outer = [name for scope in self.scopes[:-1] for name, binding in scope.items() if binding.writable]
+            outer = [name for name in outer if name not in self.scopes[-1]]
+            if outer:
+                return self.random.choice(outer)
+        return self.__name("v")
+
+    def __statement(self, depth: int) -> list[AST.AST]:
+        nested = depth < self.max_depth
+        options = {
+            "var": 4, "print": 3, "assign": 3, "if": 2 * nested, "while": nested, "for": nested,
+            "block": nested, "fun": nested, "closure": nested, "recursive": depth == 0, "class": depth == 0,
+            "instance": 1, "set": 1, "call": 1, "memo": 0.3, "return": 0.5 * (self.functions > 0 and depth > 0),
+        }
+        kinds, weights = zip(*((kind, weight) for kind, weight in options.items() if weight))
+        match self.random.choices(kinds, weights)[0]:
+            case "var": return self.__var()
+            case "print": return self.__print()
+            case "assign": return self.__assign()
+            case "if": return self.__if(depth)
+            case "while": return self.__while(depth)
+            case "for": return self.__for(depth)
+            case "block": return [self.__block(depth + 1)]
+            case "fun": return self.__fun(depth)
+            case "closure": return self.__closure()
+            case "recursive": return self.__recursive()
+            case "class": return self.__class()
+            case "instance": return self.__instance()
+            case "set": return self.__set()
+            case "call": return self.__call()
+            case "memo": return self.__memo()
+            case "return": return [AST.ReturnStmt(self.__num(0))]
+
+    def __statements(self, depth: int, low: int = 1, high: int = 3) -> list[AST.AST]:
+        stmts = []
+        for _ in range(self.random.randint(low, high)):
+            stmts.extend(self.__statement(depth))
+        return stmts
+
+    def __block(self, depth: int) -> AST.Block:
+        self.scopes.append({})
+        try:
+            return AST.Block(self.__statements(depth))
+        finally:
+            self.scopes.pop()
+
+    def __var(self) -> list[AST.AST]:
+        name = self.__new_local()
+        kind = self.random.choice(SCALAR_KINDS)
+        # the initializer cannot read the variable it declares
+        self.hidden = name
+        try:
+            val = self.__expr(kind, 0)
+        finally:
+            self.hidden = None
+        self.__declare(Binding(name, kind))
+        return [AST.VarDecl(name, val)]
+
+    def __print(self) -> list[AST.AST]:
+        bindings = self.__visible()
+        if bindings and self.random.random() < 0.2:
+            return [AST.PrintStmt(AST.Variable(self.random.choice(bindings).name))]
+        return [AST.PrintStmt(self.__expr(self.random.choice(SCALAR_KINDS), 0))]
+
+    def __assign(self) -> list[AST.AST]:
+        kind = self.random.choice(SCALAR_KINDS)
+        binding = self.__pick(kind, writable=True)
+        if binding is None:
+            return self.__var()
+        return [AST.Assign(binding.name, self.__expr(kind, 0))]
+
+    def __if(self, depth: int) -> list[AST.AST]:
+        condition = self.__bool(0)
+        if_block = self.__block(depth + 1)
+        else_block = self.__block(depth + 1) if self.random.random() < 0.5 else None
+        return [AST.IfStmt(condition, if_block, else_block)]
+
+    def __counter(self, name: str) -> tuple[AST.Expr, AST.Expr]:
+        limit = AST.Primary(self.random.randint(0, self.max_iterations))
+        condition = AST.Binary(AST.Variable(name), limit, self.random.choice(("<", "<=")))
+        increment = AST.Assign(name, AST.Binary(AST.Variable(name), AST.Primary(1), "+"))
+        return condition, increment
+
+    def __while(self, depth: int) -> list[AST.AST]:
+        name = self.__name("w")
+        self.__declare(Binding(name, "num", writable=False))
+        condition, increment = self.__counter(name)
+        body = self.__block(depth + 1)
+        body.stmts.append(increment)
+        return [AST.VarDecl(name, AST.Primary(0)), AST.WhileStmt(condition, body)]
+
+    def __for(self, depth: int) -> list[AST.AST]:
+        name = self.__name("i")
+        self.scopes.append({})
+        try:
+            self.__declare(Binding(name, "num", writable=False))
+            condition, increment = self.__counter(name)
+            body = self.__block(depth + 1)
+        finally:
+            self.scopes.pop()
+        return [AST.Block([AST.ForStmt(AST.VarDecl(name, AST.Primary(0)), condition, increment, body)])]
+
+    def __fun(self, depth: int) -> list[AST.AST]:
+        name = self.__name("f")
+        params = [self.__name("p") for _ in range(self.random.randint(0, 3))]
+        self.scopes.append({param: Binding(param, "num") for param in params})
+        self.functions += 1
+        try:
+            body = self.__statements(depth + 1, 0, 3)
+            body.append(AST.ReturnStmt(self.__num(0)))
+        finally:
+            self.functions -= 1
+            self.scopes.pop()
+        # declared after the body so it never calls itself
+        self.__declare(Binding(name, "fun", writable=False, arity=len(params)))
+        return [AST.FuncDecl(name, params, AST.Block(body))]
+
+    def __closure(self) -> list[AST.AST]:
+        # a counter that keeps its state in a captured variable
+        maker, start, count, step, delta, name = (self.__name(prefix) for prefix in "mscsdg")
+        update = AST.Assign(count, AST.Binary(AST.Variable(count), AST.Variable(delta), self.random.choice("+-")))
+        inner = AST.FuncDecl(step, [delta], AST.Block([update, AST.ReturnStmt(AST.Variable(count))]))
+        body = AST.Block([AST.VarDecl(count, AST.Variable(start)), inner, AST.ReturnStmt(AST.Variable(step))])
+        initial = self.__num(1)
+        self.__declare(Binding(name, "fun", writable=False, arity=1))
+        return [AST.FuncDecl(maker, [start], body), AST.VarDecl(name, AST.Call(AST.Variable(maker), [initial]))]
+
+    def __recursive(self) -> list[AST.AST]:
+        name, n, acc = self.__name("r"), self.__name("n"), self.__name("a")
+        smaller = AST.Binary(AST.Variable(n), AST.Primary(1), "-")
+        if self.random.random() < 0.5:
+            tail = AST.Call(AST.Variable(name), [smaller, AST.Binary(AST.Variable(acc), AST.Variable(n), "+")])
+        else:
+            tail = AST.Binary(AST.Variable(n), AST.Call(AST.Variable(name), [smaller, AST.Variable(acc)]), "+")
+        base = AST.IfStmt(AST.Binary(AST.Variable(n), AST.Primary(1), "<"),
+                          AST.Block([AST.ReturnStmt(AST.Variable(acc))]), None)
+        self.__declare(Binding(name, "rec", writable=False, arity=2))
+        return [AST.FuncDecl(name, [n, acc], AST.Block([base, AST.ReturnStmt(tail)]))]
+
+    def __class(self) -> list[AST.AST]:
+        name = self.__name("C")
+        parent = self.__pick("class") if self.random.random() < 0.4 else None
+        methods, decls = [], []
+        if parent is None:
+            params = [self.__name("p") for _ in range(self.random.randint(0, 2))]
+            fields = [self.__name("f") for _ in range(self.random.randint(1, 2))]
+            values = [AST.Variable(param) for param in params] + [AST.Primary(self.random.randint(0, 9))] * 2
+            decls.append(AST.FuncDecl("init", params, AST.Block(
+                [AST.Set(AST.This("this"), field, values[index]) for index, field in enumerate(fields)])))
+            info = ClassInfo(name, len(params), fields, methods)
+        else:
+            info = ClassInfo(name, parent.info.arity, list(parent.info.fields), list(parent.info.methods))
+            methods = info.methods
+        for _ in range(self.random.randint(1, 2)):
+            method, param = self.__name("m"), self.__name("x")
+            field = AST.Get(AST.This("this"), self.random.choice(info.fields))
+            match self.random.randint(0, 2 if parent is None and not methods else 3):
+                case 0:
+                    body = [AST.ReturnStmt(AST.Binary(field, AST.Variable(param), self.random.choice(ARITHMETIC)))]
+                case 1:
+                    body = [AST.Set(AST.This("this"), field.name, AST.Binary(field, AST.Variable(param), "+")),
+                            AST.ReturnStmt(field)]
+                case 2:
+                    body = [AST.ReturnStmt(AST.Binary(AST.Variable(param), AST.Primary(2), "*"))]
+                case _:
+                    callee = AST.Super("super", self.random.choice(parent.info.methods)) if parent is not None \
+                        else AST.Get(AST.This("this"), self.random.choice(methods))
+                    body = [AST.ReturnStmt(AST.Binary(AST.Call(callee, [AST.Variable(param)]), field, "+"))]
+            decls.append(AST.FuncDecl(method, [param], AST.Block(body)))
+            methods.append(method)
+        self.__declare(Binding(name, "class", writable=False, arity=info.arity, info=info))
+        superclass = AST.Variable(parent.name) if parent is not None else None
+        return [AST.Class(name, superclass, decls)]
+
+    def __instance(self) -> list[AST.AST]:
+        lox_class = self.__pick("class")
+        if lox_class is None:
+            return self.__var()
+        name = self.__name("o")
+        arguments = [self.__num(1) for _ in range(lox_class.arity)]
+        self.__declare(Binding(name, "instance", writable=False, info=lox_class.info))
+        return [AST.VarDecl(name, AST.Call(AST.Variable(lox_class.name), arguments))]
+
+    def __set(self) -> list[AST.AST]:
+        instance = self.__pick("instance")
+        if instance is None:
+            return self.__print()
+        field = self.random.choice(instance.info.fields)
+        return [AST.Set(AST.Variable(instance.name), field, self.__num(0))]
+
+    def __call(self) -> list[AST.AST]:
+        call = self.__invoke(1)
+        return [call] if call is not None else self.__print()
+
+    def __memo(self) -> list[AST.AST]:
+        function = self.__pick("fun")
+        if function is None or function.arity == 0:
+            return self.__var()
+        name = self.__name("u")
+        self.__declare(Binding(name, "fun", writable=False, arity=function.arity))
+        return [AST.VarDecl(name, AST.Call(AST.Variable("memo"), [AST.Variable(function.name)]))]
+
+    def __invoke(self, depth: int) -> AST.Expr | None:
+        kind = self.random.choice(("fun", "rec", "instance"))
+        binding = self.__pick(kind)
+        if binding is None:
+            return None
+        if kind == "rec":
+            return AST.Call(AST.Variable(binding.name), [AST.Primary(self.random.randint(0, 12)), self.__num(depth)])
+        if kind == "instance":
+            if not binding.info.methods:
+                return None
+            method = AST.Get(AST.Variable(binding.name), self.random.choice(binding.info.methods))
+            return AST.Call(method, [self.__num(depth)])
+        return AST.Call(AST.Variable(binding.name), [self.__num(depth) for _ in range(binding.arity)])
+
+    def __expr(self, kind: str, depth: int) -> AST.Expr:
+        match kind:
+            case "num": return self.__num(depth)
+            case "str": return self.__str(depth)
+            case _: return self.__bool(depth)
+
+    def __leaf(self, depth: int) -> bool:
+        return depth >= self.max_depth or self.random.random() < 0.3
+
+    def __variable(self, kind: str, fallback: AST.Expr) -> AST.Expr:
+        binding = self.__pick(kind)
+        return AST.Variable(binding.name) if binding is not None else fallback
+
+    def __number(self) -> AST.Primary:
+        if self.random.random() < 0.2:
+            return AST.Primary(self.random.choice(FRACTIONS))
+        return AST.Primary(self.random.randint(0, 20))
+
+    def __num(self, depth: int) -> AST.Expr:
+        if self.ill_typed and self.random.random() < 0.05:
+            self.ill_typed -= 1
+            return self.__ill_typed(depth)
+        if self.__leaf(depth):
+            return self.__variable("num", self.__number()) if self.random.random() < 0.6 else self.__number()
+        match self.random.randint(0, 7):
+            case 0 | 1 | 2:
+                operator = self.random.choice(ARITHMETIC)
+                # a literal factor keeps loops from squaring a value into a huge integer
+                right = self.__number() if operator == "*" else self.__num(depth + 1)
+                return AST.Binary(self.__num(depth + 1), right, operator)
+            case 3:
+                return AST.Binary(self.__num(depth + 1), AST.Primary(self.random.choice((2, 4, 0.5))), "/")
+            case 4:
+                return AST.Unary("-", self.__num(depth + 1))
+            case 5:
+                instance = self.__pick("instance")
+                if instance is not None:
+                    return AST.Get(AST.Variable(instance.name), self.random.choice(instance.info.fields))
+            case 6:
+                call = self.__invoke(depth + 1)
+                if call is not None:
+                    return call
+            case 7:
+                binding = self.__pick("num", writable=True)
+                if binding is not None:
+                    return AST.Assign(binding.name, self.__num(depth + 1))
+        return self.__variable("num", self.__number())
+
+    def __bool(self, depth: int) -> AST.Expr:
+        if self.__leaf(depth):
+            return self.__variable("bool", AST.Primary(self.random.random() < 0.5))
+        match self.random.randint(0, 4):
+            case 0 | 1:
+                return AST.Binary(self.__num(depth + 1), self.__num(depth + 1), self.random.choice(COMPARISONS))
+            case 2:
+                kind = self.random.choice(SCALAR_KINDS + ("nil",))
+                left = self.__expr(kind, depth + 1) if kind != "nil" else AST.Primary(None)
+                # mixing kinds on purpose: 1 == true must stay false
+                right = self.__expr(self.random.choice(SCALAR_KINDS), depth + 1)
+                return AST.Binary(left, right, self.random.choice(("==", "!=")))
+            case 3:
+                return AST.Unary("!", self.__bool(depth + 1))
+            case _:
+                return AST.Binary(self.__bool(depth + 1), self.__bool(depth + 1), self.random.choice(("and", "or")))
+
+    def __str(self, depth: int) -> AST.Expr:
+        if self.__leaf(depth):
+            return self.__variable("str", AST.Primary(self.random.choice(WORDS)))
+        # likewise, strings only grow by a literal at a time
+        return AST.Binary(self.__str(depth + 1), AST.Primary(self.random.choice(WORDS)), "+")
+
+    def __ill_typed(self, depth: int) -> AST.Expr:
+        match self.random.randint(0, 3):
+            case 0: return AST.Binary(self.__str(depth + 1), self.__number(), "+")
+            case 1: return AST.Unary("-", self.__str(depth + 1))
+            case 2: return AST.Call(self.__number(), [])
+            case _: return AST.Get(self.__number(), "field")
@@ -0,0 +1,85 @@
+from Scanner import Scanner
+from Parser import Parser
+from Interpreter import Interpreter
+from Resolver import Resolver
+from Diagnostic import LoxSyntaxError
+
+
+class ReplSession:
+    def __init__(self, interpreter: Interpreter = None) -> None:
+        self.interpreter = interpreter or Interpreter()
+        self.parser = Parser()
+        self.resolver = Resolver(self.interpreter)
+        self.buffer = []
+        self.entry = PendingEntry()
+
+    def feed(self, line: str) -> bool:
+        self.buffer.append(line)
+        self.entry.feed(line)
+        if line.strip() and not self.entry.complete:
+            return False
+        source_code = "\n".join(self.buffer)
+        self.discard()
+        if source_code.strip():
+            self.execute(source_code)
+        return True
+
+    def execute(self, source_code: str) -> None:
+        scanner = Scanner(source_code)
+        token_list = scanner.scan()
+        ast = self.parser.parse(token_list)
+        if scanner.errors or self.parser.errors:
+            raise LoxSyntaxError(scanner.errors + self.parser.errors)
+        try:
+            self.resolver.resolve(ast)
+        except Exception:
+            self.resolver.reset()
+            raise
+        self.interpreter.interpreter(ast)
+
+    def discard(self) -> None:
+        self.buffer = []
+        self.entry = PendingEntry()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.buffer)
+
+    @staticmethod
+    def is_complete(source_code: str) -> bool:
+        entry = PendingEntry()
+        for line in source_code.split("\n"):
+            entry.feed(line)
+        return entry.complete
+
+
+class PendingEntry:
+    # What the REPL needs to know about the lines typed so far, kept up to date one line at a time so a long
+    # entry is never rescanned: whether a string is open, how deep the brackets go, and the last character
+    # outside a string. The entry is complete once it ends in ';' or '}' with everything closed.
+    def __init__(self) -> None:
+        self.in_string = False
+        self.depth = 0
+        self.last = None
+
+    def feed(self, line: str) -> None:
+        in_string, depth, last = self.in_string, self.depth, self.last
+        for char in line:
+            if char == "'":
+                in_string = not in_string
+                last = char
+            elif in_string:
+                continue
+            elif char == "(" or char == "{":
+                depth += 1
+                last = char
+            elif char == ")" or char == "}":
+                depth -= 1
+                last = char
+            elif not char.isspace():
+                last = char
+        self.in_string, self.depth, self.last = in_string, depth, last
+
+    @property
+    def complete(self) -> bool:
+        return not self.in_string and self.depth <= 0 and (self.last == ";" or self.last == "}")
@@ -1,30 +1,53 @@
 import AST
-from enum import Enum
+from Analysis import FrameLayout
 
 
-class FunctionType(Enum):
+class FunctionType:
     NONE = 1
     FUNCTION = 2
     METHOD = 3
     INITIALIZER = 4
 
 
-class ClassType(Enum):
+class ClassType:
     NONE = 1
     CLASS = 2
     SUBCLASS = 3
 
 
+FUNCTION_KIND_NAMES = {FunctionType.FUNCTION: "function", FunctionType.METHOD: "method",
+                       FunctionType.INITIALIZER: "initializer"}
+
+
 class Resolver(AST.VisitorExpr):
     def __init__(self, interpreter) -> None:
+        assert interpreter.program is None, "Can not resolve into a shared program"
         self.interpreter = interpreter
+        self.analysis = interpreter.analysis
+        self.scopes = []
+        self.frames = []
+        self.pending = []
+        self.pending_declarations = []
+        self.pending_captures = []
+        self.global_functions = {}
+        self.global_value_reads = set()
+        self.local_functions = {}
+        self.cur_func_type = FunctionType.NONE
+        self.cur_class_type = ClassType.NONE
+
+    def reset(self) -> None:
         self.scopes = []
+        self.frames = []
+        self.pending = []
+        self.pending_declarations = []
+        self.pending_captures = []
         self.cur_func_type = FunctionType.NONE
         self.cur_class_type = ClassType.NONE
 
     def resolve(self, ast_list: list[AST.AST]):
         for ast in ast_list:
             self.__resolve(ast)
+            self.__flush()
 
     def __resolve(self, ast) -> None:
         ast.accept(self)
@@ -33,11 +56,59 @@ class Resolver(AST.VisitorExpr):
         for stmt in stmts:
             self.__resolve(stmt)
 
-    def __resolve_local(self, name: str) -> None:
+    def __resolve_local(self, expr: AST.Expr, name: str) -> FrameLayout | None:
         for i in range(len(self.scopes) - 1, -1, -1):
             if name in self.scopes[i]:
-                self.interpreter.resolve(name, len(self.scopes)-1-i)
-                return
+                frame = self.frames[i]
+                self.analysis.bindings[expr] = (frame, frame.slots[name])
+                self.pending.append((expr, self.frames[-1], frame))
+                self.__capture(frame, name)
+                return frame
+        return None
+
+    def __capture(self, frame: FrameLayout, name: str) -> None:
+        function = self.frames[-1].function
+        if function is frame.function:
+            return
+        frame.captured.add(name)
+        while function is not None and function is not frame.function:
+            function.free_variables.add(name)
+            function = function.parent.function if function.parent else None
+
+    def __flush(self) -> None:
+        analysis = self.analysis
+        for expr, frame, target in self.pending:
+            self.interpreter.resolve(expr, self.__distance(frame, target))
+        for func_decl, name, frame, target in self.pending_captures:
+            analysis.captures.setdefault(func_decl, []).append((name, self.__distance(frame, target)))
+        for node, frame, name in self.pending_declarations:
+            if name is None:
+                params = frozenset(para for para in node.arg_list if frame.is_cell(para))
+                if params:
+                    analysis.cell_params[node] = params
+            elif frame.is_cell(name):
+                analysis.cells.add(node)
+        self.pending = []
+        self.pending_captures = []
+        self.pending_declarations = []
+
+    @staticmethod
+    def __distance(frame: FrameLayout, target: FrameLayout) -> int:
+        # only frames that really allocate an Environment count; leaving a plain function lands in its
+        # closure environment, which holds just the variables that function captured
+        distance = 0
+        while frame is not target:
+            if frame.needs_environment:
+                distance += 1
+            if frame.kind == "function":
+                return distance
+            frame = frame.parent
+        return distance
+
+    def __find_scope(self, name: str) -> FrameLayout:
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if name in self.scopes[i]:
+                return self.frames[i]
 
     def visit_class(self, class_dec: AST.Class) -> None:
         enclosing_class = self.cur_class_type
@@ -45,18 +116,22 @@ class Resolver(AST.VisitorExpr):
 
         self.__declare(class_dec.name)
         self.__define(class_dec.name)
+        self.__mark_closure()
+        # methods close over the environments the class is declared in, and instances keep them alive
+        self.__retain(self.frames[-1] if self.frames else None)
+        if self.frames:
+            self.pending_declarations.append((class_dec, self.frames[-1], class_dec.name))
 
         if class_dec.superclass:
             if class_dec.superclass.name == class_dec.name:
                 raise Exception("A class can not inherit from itself!")
             self.cur_class_type = ClassType.SUBCLASS
-            # self.__resolve(class_dec.superclass)
-            self.__begin_scope()
-            self.scopes[-1]['super'] = True
+            self.__resolve(class_dec.superclass)
+            self.__begin_scope(class_dec.superclass, "super")
+            self.__define("super")
 
-        self.__begin_scope()
-
-        self.scopes[-1]['this'] = True
+        self.__begin_scope(class_dec, "this")
+        self.__define("this")
         for method in class_dec.methods:
             cur_func_tye = FunctionType.METHOD
             if method.name == 'init':
@@ -70,7 +145,7 @@ class Resolver(AST.VisitorExpr):
         self.cur_class_type = enclosing_class
 
     def visit_block(self, block: AST.Block) -> None:
-        self.__begin_scope()
+        self.__begin_scope(block, "block")
         self.__resolve_block(block.stmts)
         self.__end_scope()
 
@@ -79,30 +154,67 @@ class Resolver(AST.VisitorExpr):
         if var.val:
             self.__resolve(var.val)
         self.__define(var.name)
+        if self.frames:
+            self.pending_declarations.append((var, self.frames[-1], var.name))
 
     def visit_variable(self, var: AST.Variable) -> None:
+        self.__resolve_variable(var, False)
+
+    def __resolve_variable(self, var: AST.Variable, is_callee: bool) -> None:
         if self.scopes and self.scopes[-1].get(var.name, None) is False:
             raise Exception(f"Can not read local variable {var.name} in its own initializer.")
+        frame = self.__resolve_local(var, var.name)
+        if frame is None:
+            self.__note_global_read(var.name)
+        if is_callee:
+            return
+        if frame is None:
+            self.global_value_reads.add(var.name)
+            function = self.global_functions.get(var.name)
+        else:
+            function = self.local_functions.get((frame, var.name))
+        if function:
+            function.escapes = True
+            self.__retain(function.parent)
 
     def visit_assign(self, assign: AST.Assign) -> None:
         self.__resolve(assign.val)
-        self.__resolve_local(assign.name)
+        frame = self.__resolve_local(assign, assign.name)
+        if frame is None:
+            self.__note_effect(f"assigns global '{assign.name}'")
+        elif self.frames[-1].function is not frame.function:
+            self.__note_effect(f"assigns captured variable '{assign.name}'", frame.function)
 
     def visit_func(self, func_decl: AST.FuncDecl) -> None:
         self.__declare(func_decl.name)
         self.__define(func_decl.name)
-        self.__resolve_func(func_decl, FunctionType.FUNCTION)
-
-    def __resolve_func(self, func_decl: AST.FuncDecl, func_type: FunctionType) -> None:
+        self.__mark_closure()
+        enclosing = self.frames[-1] if self.frames else None
+        layout = self.__resolve_func(func_decl, FunctionType.FUNCTION, enclosing)
+        for name in layout.free_variables:
+            self.pending_captures.append((func_decl, name, enclosing, self.__find_scope(name)))
+        if enclosing:
+            self.pending_declarations.append((func_decl, enclosing, func_decl.name))
+        else:
+            layout.escapes = func_decl.name in self.global_value_reads
+            self.global_functions[func_decl.name] = layout
+
+    def __resolve_func(self, func_decl: AST.FuncDecl, func_type: int, enclosing: FrameLayout = None) -> FrameLayout:
         enclosing_function = self.cur_func_type
         self.cur_func_type = func_type
-        self.__begin_scope()
+        layout = self.__begin_scope(func_decl, FUNCTION_KIND_NAMES[func_type])
+        if enclosing:
+            # known before the body is resolved, so a function reading itself as a value escapes
+            self.local_functions[(enclosing, func_decl.name)] = layout
         for para in func_decl.arg_list:
             self.__declare(para)
             self.__define(para)
-        self.__resolve(func_decl.body)
+        # the body runs directly in the call's environment, so it shares the parameters' scope
+        self.__resolve_block(func_decl.body.stmts)
         self.__end_scope()
+        self.pending_declarations.append((func_decl, layout, None))
         self.cur_func_type = enclosing_function
+        return layout
 
     def visit_if(self, ifStmt: AST.IfStmt) -> None:
         self.__resolve(ifStmt.condition)
@@ -111,6 +223,7 @@ class Resolver(AST.VisitorExpr):
             self.__resolve(ifStmt.else_block)
 
     def visit_print(self, print_val: AST.PrintStmt) -> None:
+        self.__note_effect("prints")
         self.__resolve(print_val.val)
 
     def visit_return(self, return_stmt: AST.ReturnStmt) -> None:
@@ -126,15 +239,19 @@ class Resolver(AST.VisitorExpr):
         self.__resolve(while_stmt.body)
 
     def visit_for(self, for_stmt: AST.ForStmt) -> None:
-        self.__begin_scope()
+        # the loop variable lives in the Block the parser wraps every for statement in
         self.__resolve(for_stmt.initialization)
         self.__resolve(for_stmt.condition)
         self.__resolve(for_stmt.body)
         self.__resolve(for_stmt.increment)
-        self.__end_scope()
 
     def visit_call(self, call_expr: AST.Call) -> None:
-        self.__resolve(call_expr.name)
+        if self.frames and self.frames[-1].function:
+            self.frames[-1].function.calls = True
+        if isinstance(call_expr.name, AST.Variable):
+            self.__resolve_variable(call_expr.name, True)
+        else:
+            self.__resolve(call_expr.name)
         for arg in call_expr.arg_list:
             self.__resolve(arg)
 
@@ -149,29 +266,61 @@ class Resolver(AST.VisitorExpr):
         return
 
     def visit_get(self, obj: AST.Get) -> None:
+        self.__note_effect(f"reads field '{obj.name}'")
         self.__resolve(obj.obj)
 
     def visit_set(self, expr: AST.Set) -> None:
-        if self.cur_class_type == ClassType.NONE:
-            raise Exception("Can not use 'super' outside a class")
-        if self.cur_class_type == ClassType.SUBCLASS:
-            raise Exception("Can not use 'super' in a class with no superclass.")
+        self.__note_effect(f"writes field '{expr.name}'")
         self.__resolve(expr.val)
         self.__resolve(expr.expr)
 
     def visit_this(self, this: AST.This) -> None:
         if self.cur_class_type == ClassType.NONE:
             raise Exception("Can not use 'this' outside of a class")
-        self.__resolve_local(this.keyword)
+        self.__resolve_local(this, this.keyword)
 
     def visit_super(self, lox_super: AST.Super) -> None:
-        self.__resolve_local(lox_super.keyword)
-
-    def __begin_scope(self) -> None:
+        if self.cur_class_type == ClassType.NONE:
+            raise Exception("Can not use 'super' outside a class")
+        if self.cur_class_type != ClassType.SUBCLASS:
+            raise Exception("Can not use 'super' in a class with no superclass.")
+        self.__resolve_local(lox_super, lox_super.keyword)
+
+    def __note_effect(self, effect: str, owner: FrameLayout | None = None) -> None:
+        # an effect inside a nested function is charged to every enclosing function as well, up to the one
+        # owning the variable: changing its own local is no side effect of that function
+        function = self.frames[-1].function if self.frames else None
+        while function is not None and function is not owner:
+            function.effects.add(effect)
+            function = function.parent.function if function.parent else None
+
+    def __note_global_read(self, name: str) -> None:
+        function = self.frames[-1].function if self.frames else None
+        while function is not None:
+            function.global_reads.add(name)
+            function = function.parent.function if function.parent else None
+
+    @staticmethod
+    def __retain(frame: FrameLayout | None) -> None:
+        # a function value or class may outlive every frame around its declaration, with the cells it captured
+        while frame is not None:
+            frame.retained = True
+            frame = frame.parent
+
+    def __mark_closure(self) -> None:
+        for frame in self.frames:
+            frame.contains_closures = True
+
+    def __begin_scope(self, node: AST.AST, kind: str) -> FrameLayout:
+        layout = FrameLayout(node, kind, self.frames[-1] if self.frames else None)
+        self.analysis.add(layout)
         self.scopes.append({})
+        self.frames.append(layout)
+        return layout
 
     def __end_scope(self) -> None:
         self.scopes.pop()
+        self.analysis.close(self.frames.pop())
 
     def __declare(self, name: str) -> None:
         if not self.scopes:
@@ -179,8 +328,10 @@ class Resolver(AST.VisitorExpr):
         cur_scope = self.scopes[-1]
         assert name not in cur_scope, f"{name} is already in this scope!"
         cur_scope[name] = False
+        self.frames[-1].declare(name)
 
     def __define(self, name: str) -> None:
         if not self.scopes:
             return
         self.scopes[-1][name] = True
+        self.frames[-1].declare(name)
@@ -1,16 +1,21 @@
+import sys
 from Token import Token, TokenType
+from Diagnostic import Diagnostic
 
 
 class Scanner:
-    def __init__(self, source_code: str) -> None:
+    def __init__(self, source_code: str, line: int = 1) -> None:
         self.start = 0
         self.current = 0
+        self.line = line
+        self.line_start = 0
         self.source_code = source_code
         self.token_list = []
+        self.errors = []
         self.keywords = self.__keywords()
 
     @staticmethod
-    def __keywords() -> dict[str, TokenType]:
+    def __keywords() -> dict[str, int]:
         keyword = {"fun": TokenType.FUN, "for": TokenType.FOR, "while": TokenType.WHILE, "if": TokenType.IF,
                    "else": TokenType.ELSE, "and": TokenType.AND, "or": TokenType.OR, "true": TokenType.TRUE,
                    'false': TokenType.FALSE, 'nil': TokenType.NIL, 'var': TokenType.VAR, "print": TokenType.PRINT,
@@ -29,7 +34,8 @@ class Scanner:
                 case "\r":
                     pass
                 case "\n":
-                    pass
+                    self.line += 1
+                    self.line_start = self.current
                 case ".":
                     self.__add_token(self.__tokenize(TokenType.DOT, "."))
                 case "(":
@@ -77,7 +83,10 @@ class Scanner:
                     else:
                         self.__add_token(self.__tokenize(TokenType.NOT, "!"))
                 case "'":
-                    self.__add_token(self.__string())
+                    token = self.__string()
+                    if token is None:
+                        break
+                    self.__add_token(token)
                 case _:
                     if char.isdigit():
                         token = self.__number()
@@ -86,30 +95,45 @@ class Scanner:
                         token = self.__identifier()
                         self.__add_token(token)
                     else:
-                        raise Exception(f"Invalid syntax: {char}")
+                        self.__error(f"Invalid syntax: {char}")
             self.start = self.current
+        self.start = self.current
         self.token_list.append(self.__tokenize(TokenType.EOF, " "))
         return self.token_list
 
     def __identifier(self) -> Token:
         while self.__peek().isalpha():
             self.__advance()
-        string = self.source_code[self.start: self.current]
+        string = sys.intern(self.source_code[self.start: self.current])
         type = self.keywords.get(string, TokenType.IDENTIFIER)
         return self.__tokenize(type, string)
 
     def __number(self) -> Token:
         while self.__peek().isdigit() or self.__peek() == ".":
             self.__advance()
-        val = float(self.source_code[self.start:self.current])
+        text = self.source_code[self.start:self.current]
+        # integral literals stay exact ints; only a fractional part makes a float
+        try:
+            val = float(text) if "." in text else int(text)
+        except ValueError:
+            # still a number token, so the parser does not report the same mistake a second time
+            self.__error(f"Invalid number: {text}")
+            val = 0
         return self.__tokenize(TokenType.NUMBER, val)
 
-    def __string(self) -> Token:
+    def __string(self) -> Token | None:
+        line, line_start = self.line, self.line_start
         while self.__peek() != "'":
-            self.__advance()
+            if self.__atEnd():
+                self.line, self.line_start = line, line_start
+                self.__error("Unterminated string.")
+                return None
+            if self.__advance() == "\n":
+                self.line += 1
+                self.line_start = self.current
         self.__advance()
-        string = self.source_code[self.start: self.current]
-        return self.__tokenize(TokenType.STRING, string)
+        string = sys.intern(self.source_code[self.start + 1: self.current - 1])
+        return Token(TokenType.STRING, string, line, self.start - line_start + 1)
 
     def __advance(self) -> str:
         self.current += 1
@@ -123,9 +147,11 @@ class Scanner:
     def __atEnd(self) -> bool:
         return self.current >= len(self.source_code)
 
-    @staticmethod
-    def __tokenize(type: TokenType, val: object) -> Token:
-        return Token(type, val)
+    def __tokenize(self, type: int, val: object) -> Token:
+        return Token(type, val, self.line, self.start - self.line_start + 1)
+
+    def __error(self, message: str) -> None:
+        self.errors.append(Diagnostic("Scan", message, self.line, self.start - self.line_start + 1))
 
     def __add_token(self, token: Token) -> None:
         self.token_list.append(token)
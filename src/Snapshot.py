@@ -0,0 +1,106 @@
+import io
+import pickle
+import threading
+import AST
+from Interpreter import Interpreter
+from Analysis import Analysis
+
+SNAPSHOT_PROTOCOL = pickle.HIGHEST_PROTOCOL
+# pickling recurses on the C stack once per level of the object graph (a long linked list of instances
+# is a deep graph), so it runs on a thread with a stack far larger than the main thread's
+PICKLE_STACK_SIZE = 512 * 1024 * 1024
+
+
+def _with_large_stack(function):
+    result, error = [], []
+
+    def run() -> None:
+        try:
+            result.append(function())
+        except BaseException as err:
+            error.append(err)
+
+    previous = threading.stack_size(PICKLE_STACK_SIZE)
+    try:
+        thread = threading.Thread(target=run)
+        thread.start()
+    finally:
+        threading.stack_size(previous)
+    thread.join()
+    if error:
+        raise error[0]
+    return result[0]
+
+
+class _StatePickler(pickle.Pickler):
+    # AST nodes are written as references into a shared node list instead of being copied
+    def __init__(self, file, nodes: list[AST.AST]) -> None:
+        super().__init__(file, SNAPSHOT_PROTOCOL)
+        self.nodes = nodes
+        self.node_ids = {}
+
+    def persistent_id(self, obj: object) -> int | None:
+        if not isinstance(obj, AST.AST):
+            return None
+        index = self.node_ids.get(id(obj))
+        if index is None:
+            index = self.node_ids[id(obj)] = len(self.nodes)
+            self.nodes.append(obj)
+        return index
+
+
+class _StateUnpickler(pickle.Unpickler):
+    def __init__(self, file, nodes: list[AST.AST]) -> None:
+        super().__init__(file)
+        self.nodes = nodes
+
+    def persistent_load(self, index: int) -> AST.AST:
+        return self.nodes[index]
+
+
+class Snapshot:
+    # The global environment after a prelude ran, with the resolver output the prelude's functions need.
+    # The runtime values are frozen into a pickle that every restore unpickles into a private copy;
+    # the AST they point into is shared by all copies.
+    def __init__(self, state: bytes, nodes: list[AST.AST], locals: dict, analysis: Analysis) -> None:
+        self.state = state
+        self.nodes = nodes
+        self.locals = locals
+        self.analysis = analysis
+
+    @staticmethod
+    def capture(interpreter: Interpreter) -> "Snapshot":
+        assert not interpreter.call_stack and interpreter.global_env is interpreter.globals, \
+            "Can only snapshot an interpreter between top-level statements"
+        nodes = []
+        buffer = io.BytesIO()
+        _with_large_stack(lambda: _StatePickler(buffer, nodes).dump(interpreter.globals))
+        return Snapshot(buffer.getvalue(), nodes, dict(interpreter.locals), interpreter.analysis.copy())
+
+    def restore(self, interpreter: Interpreter = None) -> Interpreter:
+        # create the Resolver for the restored interpreter afterwards, it holds on to interpreter.analysis
+        interpreter = interpreter or Interpreter()
+        globals_env = _StateUnpickler(io.BytesIO(self.state), self.nodes).load()
+        interpreter.globals = interpreter.global_env = globals_env
+        interpreter.locals = dict(self.locals)
+        interpreter.analysis = self.analysis.copy()
+        interpreter.program = None
+        interpreter.call_stack = []
+        return interpreter
+
+    def dumps(self) -> bytes:
+        return _with_large_stack(
+            lambda: pickle.dumps((self.state, self.nodes, self.locals, self.analysis), SNAPSHOT_PROTOCOL))
+
+    @staticmethod
+    def loads(data: bytes) -> "Snapshot":
+        return Snapshot(*pickle.loads(data))
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            file.write(self.dumps())
+
+    @staticmethod
+    def load(path: str) -> "Snapshot":
+        with open(path, "rb") as file:
+            return Snapshot.loads(file.read())
@@ -1,7 +1,9 @@
-from enum import Enum
+from array import array
 
 
-class TokenType(Enum):
+# Token types are plain ints: far cheaper to compare in the scanner and parser than Enum members.
+# TokenType.name() gives the readable view back.
+class TokenType:
     # single characters
     ADD = 0
     MINUS = 1
@@ -50,11 +52,50 @@ class TokenType(Enum):
 
     EOF = 100
 
+    @staticmethod
+    def name(type: int) -> str:
+        return _TOKEN_NAMES.get(type, str(type))
+
+
+_TOKEN_NAMES = {val: key for key, val in vars(TokenType).items() if isinstance(val, int)}
+
 
 class Token:
-    def __init__(self, type: TokenType, val: object) -> None:
+    __slots__ = ("type", "val", "line", "column")
+
+    def __init__(self, type: int, val: object, line: int = 0, column: int = 0) -> None:
         self.type = type
         self.val = val
+        self.line = line
+        self.column = column
 
     def __str__(self) -> str:
-        return f"Type: {self.type}, Val: {self.val}"
+        return f"Type: TokenType.{TokenType.name(self.type)}, Val: {self.val}"
+
+
+class TokenArray:
+    # Tokens kept as parallel arrays instead of one object each, for scripts with millions of tokens.
+    # Indexing builds a Token on the fly; the parser reads the types array directly.
+    __slots__ = ("types", "vals", "lines", "columns")
+
+    def __init__(self) -> None:
+        self.types = array("B")
+        self.vals = []
+        self.lines = array("I")
+        self.columns = array("I")
+
+    def add(self, type: int, val: object, line: int, column: int) -> None:
+        self.types.append(type)
+        self.vals.append(val)
+        self.lines.append(line)
+        self.columns.append(column)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        return Token(self.types[index], self.vals[index], self.lines[index], self.columns[index])
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self[index]
@@ -1,14 +1,18 @@
-from typing import Optional, Union
+import os
+import sys
 from Scanner import Scanner
 from Parser import Parser
 from Interpreter import Interpreter
 from Resolver import Resolver
+from Diagnostic import Diagnostic
+from LoxError import LoxRuntimeError
 
 
 class PLox:
-    def __init__(self) -> None:
+    def __init__(self, jit: bool = False, optimize: bool = False) -> None:
         self.parser = Parser()
-        self.interpreter = Interpreter()
+        self.interpreter = Interpreter(jit=jit)
+        self.optimize = optimize
 
     def run(self, input=None) -> None:
         if not input:
@@ -17,29 +21,169 @@ class PLox:
             self.runFile(input)
     
     def repl(self) -> None:
+        from ReplSession import ReplSession
+        session = ReplSession(self.interpreter)
         while True:
-            source_code = input("> ")
-            self.__run(source_code)
+            try:
+                line = input("... " if session.pending else "> ")
+            except EOFError:
+                break
+            try:
+                session.feed(line)
+            except Exception as err:
+                session.discard()
+                print(err)
 
-    def runFile(self, input: str) -> None:
+    def runFile(self, input: str, mapped: bool = False, parallel: bool = False) -> None:
+        if mapped:
+            self.__run_tokens(self.scan_mapped(input))
+            return
         f = open(input, "r")
         source_code = f.read()
         f.close()
+        if parallel:
+            from ParallelParser import ParallelParser
+            parser = ParallelParser()
+            ast = parser.parse(source_code)
+            self.__run_ast(ast, parser.errors)
+            return
         self.__run(source_code)
 
+    def compileFile(self, input: str, output: str) -> bool:
+        # parses and resolves once, and stores the AST with its resolution so running it skips both
+        with open(input, "r") as f:
+            source_code = f.read()
+        scanner = Scanner(source_code)
+        parser = Parser()
+        ast = parser.parse(scanner.scan())
+        if scanner.errors or parser.errors:
+            for diagnostic in scanner.errors + parser.errors:
+                print(diagnostic)
+            return False
+        interpreter = Interpreter()
+        Resolver(interpreter).resolve(ast)
+        from AstCodec import encode
+        with open(output, "wb") as f:
+            f.write(encode(ast, interpreter, parser.positions))
+        return True
+
+    def runCompiled(self, input: str) -> None:
+        from AstCodec import AstDecoder
+        with open(input, "rb") as f:
+            decoder = AstDecoder(f.read())
+        ast = decoder.decode(self.interpreter)
+        if not decoder.resolved:
+            Resolver(self.interpreter).resolve(ast)
+        self.__optimize(ast)
+        try:
+            self.interpreter.interpreter(ast)
+        except LoxRuntimeError as err:
+            print(err)
+
+    @staticmethod
+    def scan_mapped(path: str) -> "ByteScanner":
+        # lexes the file through an mmap, so the source is never held in memory as one str;
+        # the mapping is closed again before anything runs
+        import mmap
+        from ByteScanner import ByteScanner
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # an empty file cannot be mapped
+                scanner = ByteScanner(b"")
+                scanner.scan()
+                return scanner
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                scanner = ByteScanner(buffer)
+                scanner.scan()
+        return scanner
+
     def __run(self, source_code: str) -> None:
-        token_list = Scanner(source_code).scan()
+        scanner = Scanner(source_code)
+        scanner.scan()
+        self.__run_tokens(scanner)
+
+    def __run_tokens(self, scanner) -> None:
+        token_list = scanner.token_list
         # self.print_token_list(token_list)
         ast = self.parser.parse(token_list)
+        self.__run_ast(ast, scanner.errors + self.parser.errors)
+
+    def __run_ast(self, ast: list, diagnostics: list[Diagnostic]) -> None:
+        if diagnostics:
+            for diagnostic in diagnostics:
+                print(diagnostic)
+            return
         resolver = Resolver(self.interpreter)
         resolver.resolve(ast)
-        print(ast)
-        # print(self.interpreter.locals)
-        # print(self.interpreter.global_env.variables)
-        self.interpreter.interpreter(ast)
+        self.__optimize(ast)
+        try:
+            self.interpreter.interpreter(ast)
+        except LoxRuntimeError as err:
+            print(err)
+
+    def __optimize(self, ast: list) -> None:
+        if self.optimize:
+            from Optimizer import Optimizer
+            Optimizer(self.interpreter).optimize(ast)
+
+    @staticmethod
+    def check(source_code: str) -> list[Diagnostic]:
+        scanner = Scanner(source_code)
+        token_list = scanner.scan()
+        parser = Parser()
+        ast = parser.parse(token_list)
+        diagnostics = scanner.errors + parser.errors
+        resolver = Resolver(Interpreter())
+        for stmt, (line, column) in zip(ast, parser.positions):
+            try:
+                resolver.resolve([stmt])
+            except Exception as err:
+                resolver.reset()
+                diagnostics.append(Diagnostic("Resolve", str(err), line, column))
+        diagnostics.sort(key=lambda diagnostic: (diagnostic.line, diagnostic.column))
+        return diagnostics
+
+    def checkFiles(self, paths: list[str]) -> bool:
+        ok = True
+        for path in paths:
+            with open(path, "r") as f:
+                diagnostics = self.check(f.read())
+            for diagnostic in diagnostics:
+                print(f"{path}:{diagnostic}")
+            ok = ok and not diagnostics
+        return ok
 
     @staticmethod
     def print_token_list(token_list):
         for token in token_list:
             print(str(token))
 
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--check":
+        sys.exit(0 if PLox().checkFiles(sys.argv[2:]) else 65)
+    if len(sys.argv) > 1 and sys.argv[1] == "--jit":
+        lox = PLox(jit=True)
+        lox.run(sys.argv[2] if len(sys.argv) > 2 else None)
+        print("loops: compiled={compiled} entered={entered} guard failures={guard_failures} "
+              "rejected={rejected}".format(**lox.interpreter.jit.stats()), file=sys.stderr)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--optimize":
+        PLox(optimize=True).run(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif len(sys.argv) > 2 and sys.argv[1] == "--mmap":
+        PLox().runFile(sys.argv[2], mapped=True)
+    elif len(sys.argv) > 3 and sys.argv[1] == "--compile":
+        sys.exit(0 if PLox().compileFile(sys.argv[2], sys.argv[3]) else 65)
+    elif len(sys.argv) > 2 and sys.argv[1] == "--compiled":
+        PLox().runCompiled(sys.argv[2])
+    elif len(sys.argv) > 2 and sys.argv[1] == "--gc-stats":
+        from GcMonitor import GcMonitor
+        lox = PLox()
+        with GcMonitor() as monitor:
+            lox.runFile(sys.argv[2])
+        print(monitor, file=sys.stderr)
+        print("frames: released={released} cells emptied={cells}".format(**lox.interpreter.releaser.stats()),
+              file=sys.stderr)
+    elif len(sys.argv) > 2 and sys.argv[1] == "--parallel":
+        PLox().runFile(sys.argv[2], parallel=True)
+    else:
+        PLox().run(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from BatchRunner import BatchRunner, collect_scripts, main, EXIT_OK, EXIT_ERROR, EXIT_TIMEOUT
+
+SCRIPTS = {
+    "ok.lox": "print 1 + 2;",
+    "loop.lox": "while (true) {}",
+    "fails.lox": "print nope;",
+    "syntax.lox": "var = 1;",
+}
+
+
+def write(directory, scripts: dict[str, str]) -> list[str]:
+    paths = []
+    for name, source_code in scripts.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source_code)
+        paths.append(str(path))
+    return paths
+
+
+def test_results_keep_script_order_with_a_timeout(tmp_path) -> None:
+    paths = write(tmp_path, SCRIPTS)
+    results = BatchRunner(workers=2, timeout=0.5).run(paths)
+    assert [result.path for result in results] == paths
+    assert [result.status for result in results] == ["ok", "timeout", "error", "error"]
+    assert [result.exit_code for result in results] == [EXIT_OK, EXIT_TIMEOUT, EXIT_ERROR, EXIT_ERROR]
+    assert results[0].output == "3\n"
+    assert results[1].error == "Script exceeded 0.5s timeout"
+    assert "nope" in results[2].error
+
+
+def test_summary_counts_and_order(tmp_path) -> None:
+    paths = write(tmp_path, SCRIPTS)
+    summary = BatchRunner.summary(BatchRunner(workers=2, timeout=0.5).run(paths), 1.25)
+    assert (summary["total"], summary["passed"], summary["failed"], summary["timed_out"]) == (4, 1, 2, 1)
+    assert summary["elapsed"] == 1.25
+    assert [result["path"] for result in summary["results"]] == paths
+
+
+def test_check_mode_reports_diagnostics_without_running(tmp_path) -> None:
+    paths = write(tmp_path, SCRIPTS)
+    results = BatchRunner(workers=2, check=True).run(paths)
+    # checking never executes, so the endless loop and the runtime error pass
+    assert [result.status for result in results] == ["ok", "ok", "ok", "error"]
+    assert results[3].diagnostics == [{"stage": "Parse", "message": "at '=': Expect variable name.",
+                                       "line": 1, "column": 5}]
+
+
+def test_collect_scripts_from_directories_globs_files_and_manifests(tmp_path) -> None:
+    write(tmp_path, {"a.lox": "", "nested/b.lox": "", "nested/notes.txt": "", "c.lox": ""})
+    (tmp_path / "list.txt").write_text("# skipped\nnested/notes.txt\n\nc.lox\n")
+    directory = collect_scripts([str(tmp_path / "nested")])
+    assert directory == [str(tmp_path / "nested" / "b.lox")]
+    assert collect_scripts([str(tmp_path / "*.lox")]) == [str(tmp_path / "a.lox"), str(tmp_path / "c.lox")]
+    assert collect_scripts([str(tmp_path / "a.lox")], manifest=str(tmp_path / "list.txt")) == [
+        str(tmp_path / "a.lox"), str(tmp_path / "nested/notes.txt"), str(tmp_path / "c.lox")]
+    assert collect_scripts([str(tmp_path)], pattern="*.txt") == [str(tmp_path / "list.txt"),
+                                                                 str(tmp_path / "nested" / "notes.txt")]
+
+
+def test_main_writes_the_json_summary(tmp_path) -> None:
+    paths = write(tmp_path, {"ok.lox": "print 1;", "loop.lox": "while (true) {}"})
+    summary_path = tmp_path / "summary.json"
+    exit_code = main([*paths, "--workers", "2", "--timeout", "0.5", "--summary", str(summary_path)])
+    assert exit_code == EXIT_ERROR
+    summary = json.loads(summary_path.read_text())
+    assert [(result["path"], result["status"]) for result in summary["results"]] == [(paths[0], "ok"),
+                                                                                     (paths[1], "timeout")]
+    assert main([paths[0], "--summary", str(summary_path)]) == EXIT_OK
+
+
+def test_check_mode_enforces_the_timeout(tmp_path) -> None:
+    # thousands of declarations take far longer than 10 ms to scan, parse and resolve
+    names = (chr(97 + index % 26) + chr(97 + index // 26 % 26) + chr(97 + index // 676) for index in range(6000))
+    declarations = "\n".join(f"fun f{name}(a) {{ var t = a * 3; if (t > 3) {{ return t; }} return a; }}"
+                             for name in names)
+    paths = write(tmp_path, {"big.lox": declarations})
+    results = BatchRunner(workers=1, timeout=0.01, check=True).run(paths)
+    assert [(result.status, result.exit_code) for result in results] == [("timeout", EXIT_TIMEOUT)]
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Differential import make_engine
+from ExecutionBudget import ExecutionBudget
+from LoxError import BudgetExceeded
+
+METHOD_LOOP = """
+class Counter {
+    init() { this.count = 0; }
+    add() { this.count = this.count + 1; }
+}
+var counter = Counter();
+for (var i = 0; i < 1000; i = i + 1) {
+    counter.add();
+}
+"""
+
+
+@pytest.mark.parametrize("name", ["interpreter", "fused", "async"])
+def test_method_calls_trip_the_environments_limit(name: str) -> None:
+    # add() needs no frame of its own, but every access to counter.add binds `this` in a new environment
+    engine = make_engine(name)
+    interpreter = engine.interpreter()
+    interpreter.budget = ExecutionBudget(environments=500)
+    with pytest.raises(BudgetExceeded) as exceeded:
+        engine.execute(interpreter, engine.compile(interpreter, METHOD_LOOP))
+    assert exceeded.value.resource == "environments"
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from pLox import PLox
+from ByteScanner import ByteScanner
+
+PLOX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "pLox.py")
+
+
+def check(source_code: str) -> list[str]:
+    return [str(diagnostic) for diagnostic in PLox.check(source_code)]
+
+
+def test_malformed_numbers_are_diagnostics(tmp_path) -> None:
+    path = tmp_path / "bad.lox"
+    path.write_text("var a = 1;\nvar b = 1.2.3;\n  print 4..5 + a;\nprint b;\n")
+    result = subprocess.run([sys.executable, PLOX, "--check", str(path)], capture_output=True, text=True)
+    assert result.returncode == 65
+    assert result.stderr == ""
+    assert result.stdout.splitlines() == [f"{path}:[line 2, column 9] Scan error: Invalid number: 1.2.3",
+                                          f"{path}:[line 3, column 9] Scan error: Invalid number: 4..5"]
+
+
+def test_byte_scanner_reports_malformed_numbers_like_scanner() -> None:
+    scanner = ByteScanner("print 1.2.3;".encode("utf-8"))
+    scanner.scan()
+    assert [str(diagnostic) for diagnostic in scanner.errors] == check("print 1.2.3;")
+
+
+@pytest.mark.parametrize("source_code, message", [
+    ("var = 3;", "[line 1, column 5] Parse error: at '=': Expect variable name."),
+    ("var 1 = 2;", "[line 1, column 5] Parse error: at '1': Expect variable name."),
+    ("class { }", "[line 1, column 7] Parse error: at '{': Expect class name."),
+    ("class { m() { print 1; } }", "[line 1, column 7] Parse error: at '{': Expect class name."),
+    ("class A < { }", "[line 1, column 11] Parse error: at '{': Expect superclass name."),
+    ("class A { (x) { print x; } }", "[line 1, column 11] Parse error: at '(': Expect method name."),
+    ("class A { m() { print 1; } 1 n() { print 2; } }",
+     "[line 1, column 28] Parse error: at '1': Expect method name."),
+    ("fun (a) { print a; }", "[line 1, column 5] Parse error: at '(': Expect function name."),
+    ("fun f(1) { print 1; }", "[line 1, column 7] Parse error: at '1': Expect parameter name."),
+    ("fun f(a, ) { print a; }", "[line 1, column 10] Parse error: at ')': Expect parameter name."),
+    ("fun f() { var = 1; }", "[line 1, column 15] Parse error: at '=': Expect variable name."),
+])
+def test_one_diagnostic_per_declaration_error(source_code: str, message: str) -> None:
+    # the statement after the broken one must parse cleanly, without a second report
+    assert check(source_code + "\nprint 'ok';") == [message]
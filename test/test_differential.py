@@ -0,0 +1,84 @@
+import glob
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Differential import Differential, make_engine
+from ProgramGenerator import ProgramGenerator
+from LoxPrinter import to_source
+from Scanner import Scanner
+from Parser import Parser
+from Resolver import Resolver
+from Interpreter import Interpreter
+
+CORPUS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "*.lox")))
+# the loop JIT, the optimizer, the binary format, the async interpreter, frame release and shared programs
+ENGINES = ("jit", "fused", "fused-jit", "codec", "async", "no-release", "threads")
+RANDOM_PROGRAMS = 100
+
+
+@pytest.fixture(scope="module")
+def differential() -> Differential:
+    return Differential([make_engine(name) for name in ENGINES])
+
+
+def assert_agrees(differential: Differential, source_code: str) -> None:
+    comparison = differential.compare(source_code)
+    assert comparison.agrees, "\n".join(f"{engine}: {difference}"
+                                        for engine, differences in comparison.mismatches.items()
+                                        for difference in differences)
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=os.path.basename)
+def test_corpus(differential: Differential, path: str) -> None:
+    with open(path, "r") as f:
+        assert_agrees(differential, f.read())
+
+
+@pytest.mark.parametrize("seed", range(RANDOM_PROGRAMS))
+def test_random_program(differential: Differential, seed: int) -> None:
+    assert_agrees(differential, to_source(ProgramGenerator(seed).program()))
+
+
+def run(source_code: str, engine: str = "interpreter") -> str:
+    outcome = make_engine(engine).run(source_code)
+    assert not outcome.error, outcome.error
+    return outcome.output
+
+
+def test_self_returning_closure_keeps_its_cells() -> None:
+    # the frame of outer() looks confined, but f hands itself out and still needs count
+    source_code = ("fun outer() { var count = 0; fun f() { count = count + 1; print count; return f; } "
+                   "var g = f(); return g; } var h = outer(); h(); h();")
+    assert run(source_code) == "1\n2\n3\n"
+    assert run(source_code, "no-release") == "1\n2\n3\n"
+
+
+def test_self_reference_escapes() -> None:
+    interpreter = Interpreter()
+    ast = Parser().parse(Scanner("fun outer() { fun f() { return f; } return 1; }").scan())
+    Resolver(interpreter).resolve(ast)
+    escapes = {layout.node.name: layout.escapes for layout in interpreter.analysis.functions()}
+    assert escapes == {"outer": False, "f": True}
+    assert ast[0] not in interpreter.analysis.confined
+
+
+def test_memo_keeps_booleans_apart_from_numbers() -> None:
+    source_code = ("fun same(x) { return x; } var m = memo(same); "
+                   "print m(1); print m(true); print m(0); print m(false); print m(1.0); print memoStats(m);")
+    assert run(source_code) == "1\ntrue\n0\nfalse\n1\nhits=1 misses=4 uncached=0 size=4/128\n"
+
+
+def test_memo_of_a_function_changing_its_own_local_through_a_closure(capsys) -> None:
+    # total belongs to sum(), so only add() has the side effect
+    source_code = ("fun sum(n) { var total = 0; fun add(k) { total = total + k; } "
+                   "for (var i = 1; i <= n; i = i + 1) { add(i); } var m = memo(add); return total; } "
+                   "var s = memo(sum); print s(4); print s(4);")
+    engine = make_engine("interpreter")
+    interpreter = engine.interpreter()
+    engine.execute(interpreter, engine.compile(interpreter, source_code))
+    captured = capsys.readouterr()
+    assert captured.out == "10\n10\n"
+    assert captured.err == "Warning: memoized fn: add may not be pure: assigns captured variable 'total'\n"
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from Differential import make_engine
+
+PLOX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "pLox.py")
+
+
+def test_jit_flag_reports_loop_stats(tmp_path) -> None:
+    path = tmp_path / "loops.lox"
+    path.write_text("var t = 0; for (var i = 0; i < 1000; i = i + 1) { t = t + i; } print t;")
+    result = subprocess.run([sys.executable, PLOX, "--jit", str(path)], capture_output=True, text=True)
+    assert result.stdout == "499500\n"
+    assert result.stderr == "loops: compiled=1 entered=1 guard failures=0 rejected=0\n"
+
+
+def test_entry_guard_failure_recompiles_for_the_wider_type() -> None:
+    # the loop is compiled for an int total on the first call; the second call enters it with a float
+    engine = make_engine("jit")
+    interpreter = engine.interpreter()
+    engine.execute(interpreter, engine.compile(interpreter, """
+        var t = 0;
+        fun run() {
+            for (var i = 0; i < 10; i = i + 1) {
+                t = t + 1;
+            }
+        }
+        run();
+        t = t + 0.5;
+        run();
+    """))
+    assert interpreter.globals.variables["t"] == 20.5
+    assert interpreter.jit.stats() == {"compiled": 2, "entered": 2, "guard_failures": 1, "rejected": 0}